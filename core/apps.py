@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from . import querylog, signals  # noqa: F401
+        # Fingerprint and time every statement on every connection
+        connection_created.connect(querylog.install, dispatch_uid='core.querylog')
@@ -0,0 +1,138 @@
+import gc
+import json
+import math
+import time
+from importlib import import_module
+from pathlib import Path
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+# Committed results the suite compares against
+BASELINE_PATH = Path(__file__).with_name('benchmark_baseline.json')
+
+# URL modules whose every route is benchmarked
+BENCHMARK_URLCONFS = ['core.urls', 'inventory.urls', 'sales.urls', 'staff.urls']
+
+# Timed requests per URL, after one untimed warm-up request
+BENCHMARK_RUNS = 20
+
+# Latency may grow by this share of the baseline, plus a fixed allowance for
+# timer noise on fast views, before it counts as a regression
+LATENCY_TOLERANCE = 0.5
+LATENCY_SLACK_MS = 5.0
+
+
+def view_urls(arguments):
+    """
+    [(label, url)] for every route of BENCHMARK_URLCONFS.
+
+    arguments maps the name of each route that takes parameters to its URL
+    kwargs, or to a list of them to benchmark several variants; a route
+    missing from it raises KeyError, so new routes cannot go unmeasured.
+    """
+    urls = []
+    for urlconf in BENCHMARK_URLCONFS:
+        for pattern in import_module(urlconf).urlpatterns:
+            if not pattern.pattern.converters:
+                urls.append((pattern.name, reverse(pattern.name)))
+                continue
+            variants = arguments[pattern.name]
+            if isinstance(variants, dict):
+                urls.append((pattern.name, reverse(pattern.name, kwargs=variants)))
+                continue
+            for kwargs in variants:
+                label = ':'.join([pattern.name, *(str(value) for value in kwargs.values())])
+                urls.append((label, reverse(pattern.name, kwargs=kwargs)))
+    return urls
+
+
+def _percentile(values, fraction):
+    """Nearest-rank percentile of sorted values."""
+    return values[max(math.ceil(fraction * len(values)) - 1, 0)]
+
+
+def measure(client, url, runs=BENCHMARK_RUNS, before_request=None):
+    """
+    Status, worst query count and p50/p95 latency of GET url over runs requests.
+
+    The cache is cleared before every request, so cached views are measured
+    doing their full work, and garbage is collected so no request pays for
+    the previous one's. Streaming responses are read to the end inside the
+    timing. before_request, if given, runs untimed before each request.
+    """
+    timings = []
+    queries = 0
+    status = None
+    for run in range(runs + 1):
+        cache.clear()
+        gc.collect()
+        if before_request:
+            before_request()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+        if run:
+            timings.append(elapsed * 1000)
+        queries = max(queries, len(captured.captured_queries))
+        status = response.status_code
+    timings.sort()
+    return {
+        'status': status,
+        'queries': queries,
+        'p50_ms': round(_percentile(timings, 0.5), 2),
+        'p95_ms': round(_percentile(timings, 0.95), 2),
+    }
+
+
+def read_baseline(path=BASELINE_PATH):
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def write_baseline(results, fixture, path=BASELINE_PATH):
+    with open(path, 'w') as handle:
+        json.dump({'fixture': fixture, 'runs': BENCHMARK_RUNS, 'views': results}, handle, indent=2, sort_keys=True)
+        handle.write('\n')
+
+
+def regressions(results, baseline, check_latency=False):
+    """
+    Every way results fall short of the baseline, as readable lines.
+
+    A view fails when it has no baseline, answers with another status or
+    runs more queries than its baseline count (its query budget); with
+    check_latency, also when its p50 or p95 grew beyond the tolerance.
+    """
+    problems = []
+    views = baseline['views']
+    for label, result in sorted(results.items()):
+        expected = views.get(label)
+        if expected is None:
+            problems.append(f'{label}: no baseline entry')
+            continue
+        if result['status'] != expected['status']:
+            problems.append(f'{label}: status {result["status"]}, baseline {expected["status"]}')
+        if result['queries'] > expected['queries']:
+            problems.append(f'{label}: {result["queries"]} queries, budget {expected["queries"]}')
+        if check_latency:
+            for key in ('p50_ms', 'p95_ms'):
+                limit = expected[key] * (1 + LATENCY_TOLERANCE) + LATENCY_SLACK_MS
+                if result[key] > limit:
+                    problems.append(f'{label}: {key} {result[key]:.1f}, baseline {expected[key]:.1f} (limit {limit:.1f})')
+    return problems
+
+
+def report(results):
+    """Results as an aligned table, slowest p95 first."""
+    lines = [f'{"view":<32} {"status":>6} {"queries":>7} {"p50 ms":>9} {"p95 ms":>9}']
+    for label, result in sorted(results.items(), key=lambda item: -item[1]['p95_ms']):
+        lines.append(
+            f'{label:<32} {result["status"]:>6} {result["queries"]:>7} {result["p50_ms"]:>9.2f} {result["p95_ms"]:>9.2f}'
+        )
+    return '\n'.join(lines)
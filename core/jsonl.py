@@ -0,0 +1,38 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+
+_write_lock = threading.Lock()
+
+
+def append(path, record, max_bytes):
+    """Append a record as one line of compact JSON, rolling the file over to .1 past max_bytes."""
+    path = Path(path)
+    line = json.dumps(record, separators=(',', ':')) + '\n'
+    with _write_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists() and path.stat().st_size > max_bytes:
+            # Keep one previous generation
+            os.replace(path, path.with_suffix(path.suffix + '.1'))
+        with path.open('a', encoding='utf-8') as stream:
+            stream.write(line)
+
+
+def read(path, limit=None):
+    """Records from a JSONL file, newest first; unreadable lines are skipped."""
+    try:
+        with Path(path).open(encoding='utf-8') as stream:
+            lines = stream.readlines()
+    except FileNotFoundError:
+        return []
+    records = []
+    for line in reversed(lines):
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+        if limit and len(records) >= limit:
+            break
+    return records
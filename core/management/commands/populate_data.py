@@ -1,51 +1,58 @@
-from django.core.management.base import BaseCommand
+import time
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
 from django.contrib.auth.models import User
 from decimal import Decimal
 from datetime import date, timedelta
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from core import synthetic
 from inventory.models import Product, Stock, StockTransfer
-from sales.models import Customer, Invoice, SaleItem
+from inventory import ledger, search
+from inventory.signals import stock_levels_changed
+from sales.models import Customer, Invoice, InvoiceSequence, SaleItem
+from sales import numbering, rollups
+from staff import kpis
 from staff.models import StaffProfile, KPI, Bonus
 
 
+# Synthetic sales staff get targets this far above their average month
+TARGET_STRETCH = Decimal('1.10')
+
+
+def _init_worker():
+    # Forked or spawned, every worker needs its own app registry and connections
+    django.setup()
+    connections.close_all()
+
+
+def _next_id(model):
+    return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+
 class Command(BaseCommand):
     help = 'Populate database with sample data for demonstration'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        scale = parser.add_argument_group('scale mode', 'Generate a large synthetic dataset instead of the demo data')
+        scale.add_argument('--products', type=int, default=0, help='Synthetic products to add')
+        scale.add_argument('--customers', type=int, default=0, help='Synthetic customers to add')
+        scale.add_argument('--invoices', type=int, default=0, help='Synthetic invoices to add, with their lines and payments')
+        scale.add_argument('--months', type=int, default=24, help='Months of invoice history up to today')
+        scale.add_argument('--sales-staff', type=int, default=10, help='Sales users the invoices are spread across')
+        scale.add_argument('--seed', type=int, default=42, help='Seed; the same seed and date give the same data')
+        scale.add_argument('--chunk-size', type=int, default=5000, help='Rows per bulk insert and transaction')
+        scale.add_argument('--workers', type=int, default=1, help='Processes generating chunks in parallel')
+
+    def handle(self, *args, **options):
         self.stdout.write('Creating sample data...')
-        
-        # Create superuser
-        if not User.objects.filter(username='admin').exists():
-            admin = User.objects.create_superuser('admin', 'admin@example.com', 'admin123')
-            self.stdout.write(self.style.SUCCESS('✓ Created superuser: admin / admin123'))
-        else:
-            admin = User.objects.get(username='admin')
-            self.stdout.write('✓ Superuser already exists')
-        
-        # Create staff users
-        users_data = [
-            {'username': 'ceo', 'password': 'ceo123', 'role': 'ceo', 'first_name': 'John', 'last_name': 'Smith'},
-            {'username': 'sales1', 'password': 'sales123', 'role': 'sales', 'first_name': 'Sarah', 'last_name': 'Johnson'},
-            {'username': 'warehouse1', 'password': 'warehouse123', 'role': 'warehouse', 'first_name': 'Mike', 'last_name': 'Wilson'},
-            {'username': 'accountant', 'password': 'acc123', 'role': 'accountant', 'first_name': 'Emily', 'last_name': 'Davis'},
-        ]
-        
-        for user_data in users_data:
-            if not User.objects.filter(username=user_data['username']).exists():
-                user = User.objects.create_user(
-                    username=user_data['username'],
-                    password=user_data['password'],
-                    first_name=user_data['first_name'],
-                    last_name=user_data['last_name'],
-                    email=f"{user_data['username']}@company.com"
-                )
-                StaffProfile.objects.create(
-                    user=user,
-                    role=user_data['role'],
-                    attendance_percentage=Decimal('95.50'),
-                    customer_satisfaction=Decimal('88.00'),
-                    hire_date=date.today() - timedelta(days=365)
-                )
-                self.stdout.write(self.style.SUCCESS(f"✓ Created user: {user_data['username']} / {user_data['password']}"))
+        admin = self._create_users()
+        if options['products'] or options['customers'] or options['invoices']:
+            self._generate(options)
+            return
         
         # Create products
         products_data = [
@@ -77,21 +84,20 @@ class Command(BaseCommand):
         # Create stock records
         products = Product.objects.all()
         warehouses = ['main', 'north', 'south', 'east', 'west']
-        for product in products:
-            for warehouse in warehouses:
-                Stock.objects.get_or_create(
-                    product=product,
-                    warehouse=warehouse,
-                    defaults={'quantity': 50 if warehouse == 'main' else 20}
-                )
+        with transaction.atomic():
+            for product in products:
+                for warehouse in warehouses:
+                    if not Stock.objects.filter(product=product, warehouse=warehouse).exists():
+                        ledger.post_movement(product, warehouse, 50 if warehouse == 'main' else 20, 'opening')
         
         self.stdout.write(self.style.SUCCESS('✓ Created stock records'))
         
         # Create some low stock items
-        low_stock_items = Stock.objects.filter(warehouse='east')[:3]
-        for stock in low_stock_items:
-            stock.quantity = 5
-            stock.save()
+        with transaction.atomic():
+            low_stock_items = Stock.objects.filter(warehouse='east')[:3]
+            for stock in low_stock_items:
+                if stock.quantity != 5:
+                    ledger.post_movement(stock.product, stock.warehouse, 5 - stock.quantity, 'adjustment')
         
         # Create stock transfers
         laptop = Product.objects.filter(sku='LAP-001').first()
@@ -132,17 +138,19 @@ class Command(BaseCommand):
         # Create invoices
         customers = Customer.objects.all()
         for i, customer in enumerate(customers, 1):
-            invoice, created = Invoice.objects.get_or_create(
-                invoice_number=f'INV-2024-{i:04d}',
-                defaults={
-                    'customer': customer,
-                    'date': date.today() - timedelta(days=i),
-                    'discount': Decimal('50.00'),
-                    'created_by': admin
-                }
-            )
+            if customer.invoices.exists():
+                continue
             
-            if created:
+            invoice_date = date.today() - timedelta(days=i)
+            with transaction.atomic():
+                invoice = Invoice.objects.create(
+                    customer=customer,
+                    invoice_number=numbering.next_invoice_number(invoice_date),
+                    date=invoice_date,
+                    discount=Decimal('50.00'),
+                    created_by=admin
+                )
+                
                 # Add sale items
                 products_for_invoice = products[:3]
                 for product in products_for_invoice:
@@ -153,9 +161,14 @@ class Command(BaseCommand):
                         price=product.price
                     )
                 
+                # Take the stock and cost the lines as invoice_create does
+                invoice.sync_stock(user=admin)
+                for item in invoice.items.select_related('product'):
+                    item.apply_costing()
+                
                 # Recalculate total
-                invoice.total_amount = invoice.calculate_total()
-                invoice.save()
+                invoice.recalculate_totals()
+                rollups.record_invoice(invoice.pk)
         
         self.stdout.write(self.style.SUCCESS('✓ Created invoices with items'))
         
@@ -167,7 +180,6 @@ class Command(BaseCommand):
                 staff=profile,
                 month=current_month,
                 defaults={
-                    'sales_amount': Decimal('15000.00'),
                     'target_sales': Decimal('20000.00')
                 }
             )
@@ -182,6 +194,9 @@ class Command(BaseCommand):
                 }
             )
         
+        # Sales amounts come from the invoices, not sample figures
+        kpis.recompute_months(current_month, current_month)
+        
         self.stdout.write(self.style.SUCCESS('✓ Created KPIs and bonuses'))
         
         self.stdout.write(self.style.SUCCESS('\n=== Sample Data Created Successfully! ==='))
@@ -192,3 +207,159 @@ class Command(BaseCommand):
         self.stdout.write('- Warehouse: warehouse1 / warehouse123')
         self.stdout.write('- Accountant: accountant / acc123')
         self.stdout.write(self.style.SUCCESS('\nRun: python manage.py runserver'))
+
+    def _generate(self, options):
+        """
+        Scale mode: add a synthetic dataset of the requested size.
+
+        Products, customers, invoices (with lines and payments) and then stock
+        are written in chunks of chunk_size rows, each with its own seed and a
+        fixed id range, so the result is the same whether one process or many
+        write the chunks. Rollups, KPIs, cost totals and the search index are
+        rebuilt from the new rows at the end.
+        """
+        products, customers, invoices = options['products'], options['customers'], options['invoices']
+        if invoices and not (products and customers):
+            raise CommandError('--invoices needs --products and --customers: invoices only sell synthetic products to synthetic customers')
+        chunk_size = max(options['chunk_size'], 1)
+
+        today = date.today()
+        first_day = today.replace(day=1)
+        for _ in range(max(options['months'], 1) - 1):
+            first_day = (first_day - timedelta(days=1)).replace(day=1)
+        days, cum_weights = synthetic.sales_calendar(first_day, today, options['seed'])
+
+        first_product, first_customer, first_invoice = _next_id(Product), _next_id(Customer), _next_id(Invoice)
+        plan = {
+            'seed': options['seed'],
+            'today': today,
+            'days': days,
+            'cum_weights': cum_weights,
+            'invoices': invoices,
+            'first_invoice_id': first_invoice,
+            'product_ids': (first_product, first_product + products - 1),
+            'customer_ids': (first_customer, first_customer + customers - 1),
+            'staff_user_ids': self._sales_staff(options['sales_staff']),
+        }
+        # Numbers continue each year's sequence in date order
+        sequences = dict(InvoiceSequence.objects.values_list('year', 'last_number'))
+        years = synthetic.invoices_per_year(plan) if invoices else {}
+        plan['years'] = {year: (first_index, sequences.get(year, 0)) for year, (first_index, _) in years.items()}
+
+        def chunks(first, count):
+            return [(plan, n, first + start, min(chunk_size, count - start)) for n, start in enumerate(range(0, count, chunk_size))]
+
+        started = time.perf_counter()
+        rows = 0
+        rows += self._run_phase('Products', synthetic.create_products, chunks(first_product, products), options['workers'])
+        rows += self._run_phase('Customers', synthetic.create_customers, chunks(first_customer, customers), options['workers'])
+        rows += self._run_phase('Invoices, lines and payments', synthetic.create_invoices, chunks(0, invoices), options['workers'])
+        rows += self._run_phase('Stock, batches and movements', synthetic.create_stock, chunks(first_product, products), options['workers'])
+
+        derived = time.perf_counter()
+        with transaction.atomic():
+            for year, (_, count) in years.items():
+                if count:
+                    InvoiceSequence.objects.update_or_create(year=year, defaults={'last_number': sequences.get(year, 0) + count})
+            # Explicit ids leave sequence-backed databases behind; SQLite needs nothing here
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [Product, Customer, Invoice]):
+                    cursor.execute(sql)
+        if invoices:
+            rollups.rebuild(first_day, today)
+            kpis.recompute_months(first_day, today)
+            self._set_targets(plan['staff_user_ids'], first_day)
+        call_command('rebuild_cost_totals', stdout=self.stdout)
+        with transaction.atomic():
+            search.rebuild_index()
+        stock_levels_changed.send(sender=Stock)
+        self.stdout.write(f'✓ Rebuilt rollups, KPIs, cost totals and search index in {time.perf_counter() - derived:.1f}s')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'\n=== Generated {rows:,} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s, seed {options["seed"]}) ==='
+        ))
+
+    def _run_phase(self, label, create, tasks, workers):
+        """Write every chunk of a phase, in worker processes if asked to, and report its rate."""
+        if not tasks:
+            return 0
+        started = time.perf_counter()
+        if workers > 1:
+            # Connections must not be shared with forked workers
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                rows = sum(pool.map(create, *zip(*tasks)))
+        else:
+            rows = sum(create(*task) for task in tasks)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {label}: {rows:,} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-6):,.0f} rows/s)'
+        ))
+        return rows
+
+    def _sales_staff(self, count):
+        """User ids of the synthetic sales staff, created as needed."""
+        user_ids = []
+        for n in range(1, max(count, 1) + 1):
+            user, created = User.objects.get_or_create(
+                username=f'synthetic-sales-{n:02d}',
+                defaults={'first_name': 'Synthetic', 'last_name': f'Sales {n}', 'email': f'synthetic-sales-{n:02d}@company.com'}
+            )
+            if created:
+                user.set_unusable_password()
+                user.save(update_fields=['password'])
+                StaffProfile.objects.create(user=user, role='sales', hire_date=date.today() - timedelta(days=730))
+            user_ids.append(user.pk)
+        return user_ids
+
+    def _set_targets(self, user_ids, first_month):
+        """Give the synthetic staff a monthly target a little above their average month."""
+        kpi_rows = list(KPI.objects.filter(staff__user_id__in=user_ids, month__gte=first_month))
+        by_staff = {}
+        for kpi in kpi_rows:
+            by_staff.setdefault(kpi.staff_id, []).append(kpi.sales_amount)
+        targets = {
+            staff_id: (sum(amounts) / len(amounts) * TARGET_STRETCH / 100).quantize(Decimal('1')) * 100
+            for staff_id, amounts in by_staff.items()
+        }
+        for kpi in kpi_rows:
+            kpi.target_sales = targets[kpi.staff_id]
+        KPI.objects.bulk_update(kpi_rows, ['target_sales'])
+
+    def _create_users(self):
+        # Create superuser
+        if not User.objects.filter(username='admin').exists():
+            admin = User.objects.create_superuser('admin', 'admin@example.com', 'admin123')
+            self.stdout.write(self.style.SUCCESS('✓ Created superuser: admin / admin123'))
+        else:
+            admin = User.objects.get(username='admin')
+            self.stdout.write('✓ Superuser already exists')
+        
+        # Create staff users
+        users_data = [
+            {'username': 'ceo', 'password': 'ceo123', 'role': 'ceo', 'first_name': 'John', 'last_name': 'Smith'},
+            {'username': 'sales1', 'password': 'sales123', 'role': 'sales', 'first_name': 'Sarah', 'last_name': 'Johnson'},
+            {'username': 'warehouse1', 'password': 'warehouse123', 'role': 'warehouse', 'first_name': 'Mike', 'last_name': 'Wilson'},
+            {'username': 'accountant', 'password': 'acc123', 'role': 'accountant', 'first_name': 'Emily', 'last_name': 'Davis'},
+        ]
+        
+        for user_data in users_data:
+            if not User.objects.filter(username=user_data['username']).exists():
+                user = User.objects.create_user(
+                    username=user_data['username'],
+                    password=user_data['password'],
+                    first_name=user_data['first_name'],
+                    last_name=user_data['last_name'],
+                    email=f"{user_data['username']}@company.com"
+                )
+                StaffProfile.objects.create(
+                    user=user,
+                    role=user_data['role'],
+                    attendance_percentage=Decimal('95.50'),
+                    customer_satisfaction=Decimal('88.00'),
+                    hire_date=date.today() - timedelta(days=365)
+                )
+                self.stdout.write(self.style.SUCCESS(f"✓ Created user: {user_data['username']} / {user_data['password']}"))
+        
+        return admin
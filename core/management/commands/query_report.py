@@ -0,0 +1,72 @@
+import math
+from collections import defaultdict
+from django.core.management.base import BaseCommand
+from core import querylog
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted values."""
+    return values[max(math.ceil(fraction * len(values)) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = 'Summarise the query log: top SQL fingerprints by total time, slow statements and likely N+1 patterns'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15, help='Fingerprints to list')
+        parser.add_argument('--repeat', type=int, default=5, help='Repeats of one fingerprint in a request flagged as N+1')
+        parser.add_argument('--view', help='Only requests to this view')
+        parser.add_argument('--limit', type=int, help='Only the most recent N logged requests')
+
+    def handle(self, *args, **options):
+        requests = querylog.read_requests(options['limit'])
+        if options['view']:
+            requests = [request for request in requests if request['view'] == options['view']]
+        if not requests:
+            self.stdout.write('No queries logged (is QUERY_LOG_ENABLED on?)')
+            return
+
+        latencies = defaultdict(list)
+        sql = {}
+        repeats = {}
+        slow = defaultdict(list)
+        for request in requests:
+            for key, statement in request['statements'].items():
+                latencies[key].extend(statement['ms'])
+                sql.setdefault(key, statement['sql'])
+                count = len(statement['ms'])
+                if count >= options['repeat']:
+                    seen = repeats.setdefault((key, request['view']), {'requests': 0, 'max': 0, 'site': statement['site']})
+                    seen['requests'] += 1
+                    seen['max'] = max(seen['max'], count)
+            for key, ms, site in request['slow']:
+                slow[(key, site)].append(ms)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'Top fingerprints by total time ({len(requests)} requests)'
+        ))
+        self.stdout.write(f'{"fingerprint":<13} {"count":>7} {"total ms":>10} {"p50":>8} {"p95":>8} {"p99":>8} {"max":>8}  sql')
+        ranked = sorted(latencies.items(), key=lambda item: -sum(item[1]))[:options['top']]
+        for key, values in ranked:
+            values.sort()
+            self.stdout.write(
+                f'{key:<13} {len(values):>7} {sum(values):>10.1f} {percentile(values, 0.5):>8.2f} '
+                f'{percentile(values, 0.95):>8.2f} {percentile(values, 0.99):>8.2f} {values[-1]:>8.2f}  {sql[key][:100]}'
+            )
+
+        if slow:
+            self.stdout.write('')
+            self.stdout.write(self.style.MIGRATE_HEADING('Slow statements by call site'))
+            for (key, site), values in sorted(slow.items(), key=lambda item: -max(item[1]))[:options['top']]:
+                self.stdout.write(f'{key}  {len(values)}x, worst {max(values):.1f} ms  at {site or "?"}')
+                self.stdout.write(f'    {sql.get(key, "")[:160]}')
+
+        self.stdout.write('')
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Possible N+1 patterns (>= {options["repeat"]} repeats in one request)'))
+        if not repeats:
+            self.stdout.write(self.style.SUCCESS('None found'))
+        for (key, view), seen in sorted(repeats.items(), key=lambda item: -item[1]['max']):
+            self.stdout.write(self.style.WARNING(
+                f'{view}: {key} up to {seen["max"]}x per request in {seen["requests"]} request(s) at {seen["site"] or "?"}'
+            ))
+            self.stdout.write(f'    {sql[key][:160]}')
@@ -0,0 +1,136 @@
+import calendar
+import time
+from datetime import date
+from django.core.cache import cache
+from django.db import transaction
+from inventory.models import Product, Stock, StockTransfer
+from sales.models import Customer, Invoice
+from sales import rollups
+from staff.models import StaffProfile
+
+
+# Entries are recomputed after this long even if nothing invalidated them
+METRICS_CACHE_TIMEOUT = 60 * 5
+
+# How long an expired entry is still served while one worker recomputes it
+METRICS_STALE_GRACE = 60
+
+# Upper bound on a recomputation; the lock frees itself if a worker dies holding it
+METRICS_LOCK_TIMEOUT = 30
+
+# Workers that find an entry missing while another recomputes it wait this long for it
+METRICS_LOCK_WAIT = 2.0
+METRICS_LOCK_POLL = 0.05
+
+
+def _key(name, scope=None):
+    return f'dashboard:{name}' if scope is None else f'dashboard:{name}:{scope}'
+
+
+def cached_metric(name, compute, scope=None):
+    """
+    Value of a dashboard metric, computed at most once per expiry.
+
+    Entries carry their own expiry time and are kept a little longer than
+    that. The first worker to find an entry expired takes a cache.add() lock
+    and recomputes it while everyone else keeps getting the old value; a
+    missing entry makes the others wait briefly for the lock holder rather
+    than all querying at once.
+    """
+    key = _key(name, scope)
+    lock = f'{key}:lock'
+    entry = cache.get(key)
+    if entry is not None:
+        fresh_until, value = entry
+        if fresh_until > time.time() or not cache.add(lock, True, METRICS_LOCK_TIMEOUT):
+            return value
+    elif not cache.add(lock, True, METRICS_LOCK_TIMEOUT):
+        deadline = time.monotonic() + METRICS_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(METRICS_LOCK_POLL)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[1]
+        # The lock holder is slow or gone; answer this request without caching
+        return compute()
+
+    try:
+        value = compute()
+        cache.set(key, (time.time() + METRICS_CACHE_TIMEOUT, value), METRICS_CACHE_TIMEOUT + METRICS_STALE_GRACE)
+    finally:
+        cache.delete(lock)
+    return value
+
+
+def invalidate(name, *scopes):
+    """Drop a metric (for the given scopes only, if any) once the current transaction commits."""
+    keys = [_key(name, scope) for scope in scopes] if scopes else [_key(name)]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def user_role(user):
+    """(role, role display) of a user, cached per user."""
+    def compute():
+        try:
+            profile = StaffProfile.objects.get(user=user)
+            return profile.role, profile.get_role_display()
+        except StaffProfile.DoesNotExist:
+            if user.is_superuser:
+                return 'admin', 'Administrator'
+            return None, 'User'
+    return cached_metric('role', compute, scope=user.pk)
+
+
+def _low_stock():
+    items = Stock.objects.filter(Stock.LOW_STOCK).select_related('product').order_by('warehouse', 'product_id')
+    return items.count(), list(items[:5])
+
+
+def dashboard_metrics(user, role, today=None):
+    """
+    Everything the dashboard shows for a user, from the metric cache.
+
+    Shared metrics are cached once for everybody, per day or month where they
+    depend on the date; lists that depend on the user are cached per user.
+    """
+    today = today or date.today()
+    month = today.strftime('%Y-%m')
+    metrics = {
+        'total_products': cached_metric('product_count', Product.objects.count),
+        'total_customers': cached_metric('customer_count', Customer.objects.count),
+        'pending_transfers': cached_metric(
+            'pending_transfers',
+            StockTransfer.objects.filter(status__in=['pending', 'approved', 'in_transit']).count
+        ),
+    }
+    metrics['today_sales'], metrics['today_invoice_count'] = cached_metric(
+        'today_sales', lambda: rollups.sales_totals(today, today), scope=today.isoformat()
+    )
+    # Counted from the partial index of rows below their reorder level
+    metrics['low_stock_count'], metrics['low_stock_items'] = cached_metric('low_stock', _low_stock)
+
+    def recent_invoices():
+        return list(Invoice.objects.select_related('customer')[:5])
+
+    def recent_transfers():
+        return list(StockTransfer.objects.select_related('product')[:5])
+
+    if role in ['admin', 'ceo']:
+        metrics['recent_invoices'] = cached_metric('recent_invoices', recent_invoices)
+        metrics['recent_transfers'] = cached_metric('recent_transfers', recent_transfers)
+    elif role == 'sales':
+        metrics['recent_invoices'] = cached_metric(
+            'recent_invoices',
+            lambda: list(Invoice.objects.filter(created_by=user).select_related('customer')[:5]),
+            scope=f'user-{user.pk}'
+        )
+    elif role == 'warehouse':
+        metrics['recent_transfers'] = cached_metric('recent_transfers', recent_transfers)
+        metrics['recent_products'] = cached_metric('recent_products', lambda: list(Product.objects.all()[:5]))
+    elif role == 'accountant':
+        metrics['recent_invoices'] = cached_metric('recent_invoices', recent_invoices)
+        month_end = today.replace(day=calendar.monthrange(today.year, today.month)[1])
+        metrics['monthly_revenue'] = cached_metric(
+            'monthly_revenue', lambda: rollups.sales_totals(today.replace(day=1), month_end)[0], scope=month
+        )
+    return metrics
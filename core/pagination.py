@@ -0,0 +1,142 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime, time
+from decimal import Decimal, InvalidOperation
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+
+PAGE_SIZE = 25
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset."""
+
+    def __init__(self, object_list, next_cursor, is_first):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.is_first = is_first
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def _json_default(value):
+    # Full precision isoformat; DjangoJSONEncoder truncates microseconds
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f'Cannot encode {type(value).__name__} in a cursor')
+
+
+def _output_field(queryset, name):
+    """Model or annotation field used to decode a cursor value."""
+    if name in queryset.query.annotations:
+        return queryset.query.annotations[name].output_field
+    if name == 'pk':
+        return queryset.model._meta.pk
+    return queryset.model._meta.get_field(name)
+
+
+def encode_cursor(values):
+    payload = json.dumps(values, default=_json_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, queryset, names):
+    """Decode a cursor into typed values, or None if it is malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, binascii.Error):
+        return None
+    if not isinstance(values, list) or len(values) != len(names):
+        return None
+    try:
+        return [_output_field(queryset, name).to_python(value) for name, value in zip(names, values)]
+    except Exception:
+        return None
+
+
+def sort_ordering(sort, allowed, default):
+    """Ordering for a ?sort= value if it names an allowed column, else the default."""
+    if sort and sort.lstrip('-') in allowed:
+        return [sort]
+    return list(default)
+
+
+def keyset_paginate(queryset, ordering, cursor=None, per_page=PAGE_SIZE):
+    """
+    Return the page of queryset that follows cursor.
+
+    Rows are filtered with a seek condition on the ordering columns instead of
+    an OFFSET, so with an index matching the ordering every page costs the same
+    as the first. The primary key is appended as a tie-breaker.
+    """
+    ordering = list(ordering)
+    if ordering[-1].lstrip('-') not in ('pk', 'id'):
+        ordering.append('-pk' if ordering[-1].startswith('-') else 'pk')
+    names = [field.lstrip('-') for field in ordering]
+    queryset = queryset.order_by(*ordering)
+
+    values = decode_cursor(cursor, queryset, names) if cursor else None
+    if values is not None:
+        # (a, b, c) after (x, y, z) == a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+        seek = Q()
+        for i, field in enumerate(ordering):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition = Q(**{f'{names[i]}__{lookup}': values[i]})
+            for j in range(i):
+                condition &= Q(**{names[j]: values[j]})
+            seek |= condition
+        queryset = queryset.filter(seek)
+
+    rows = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, name) for name in names])
+
+    return KeysetPage(rows, next_cursor, is_first=values is None)
+
+
+def _parse_date(value):
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+def date_range(params, start_key='date_from', end_key='date_to'):
+    """Parse an inclusive (start, end) date range from request parameters."""
+    return _parse_date(params.get(start_key)), _parse_date(params.get(end_key))
+
+
+def _parse_decimal(value):
+    try:
+        return Decimal(value) if value else None
+    except InvalidOperation:
+        return None
+
+
+def decimal_range(params, start_key, end_key):
+    """Parse an inclusive (low, high) numeric range from request parameters."""
+    return _parse_decimal(params.get(start_key)), _parse_decimal(params.get(end_key))
+
+
+def day_bounds(start, end):
+    """Convert an inclusive date range into aware datetimes for indexed filtering."""
+    start_at = timezone.make_aware(datetime.combine(start, time.min)) if start else None
+    end_at = timezone.make_aware(datetime.combine(end, time.max)) if end else None
+    return start_at, end_at
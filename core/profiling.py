@@ -0,0 +1,182 @@
+import cProfile
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from . import jsonl
+
+
+# Functions kept per profile, ranked by cumulative time
+TOP_FUNCTIONS = 15
+
+# Call tree depth and the share of the request a call needs to appear in it
+TREE_DEPTH = 12
+TREE_MIN_SHARE = 0.01
+
+# One profiler per process: from Python 3.12 a second concurrent cProfile raises
+_profiler_lock = threading.Lock()
+
+
+def _label(code):
+    filename, line, name = code
+    if filename == '~':
+        # Built-ins such as {method 'execute' of 'sqlite3.Cursor' objects}
+        return name
+    return f'{name} ({os.path.basename(filename)}:{line})'
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def _call_tree(stats, total):
+    """
+    Nested [label, cumulative ms, children] from the caller edges cProfile
+    records, starting at the calls that had no profiled caller.
+    """
+    children = defaultdict(list)
+    roots = []
+    for code, (_, _, _, cumtime, callers) in stats.items():
+        if not callers:
+            roots.append((code, cumtime))
+        for caller, (_, _, _, edge_cumtime) in callers.items():
+            children[caller].append((code, edge_cumtime))
+
+    threshold = total * TREE_MIN_SHARE
+
+    def expand(code, cumtime, depth, path):
+        node = [_label(code), _ms(cumtime), []]
+        if depth < TREE_DEPTH:
+            for child, child_time in sorted(children[code], key=lambda edge: -edge[1]):
+                if child_time >= threshold and child not in path:
+                    node[2].append(expand(child, child_time, depth + 1, path | {child}))
+        return node
+
+    return [expand(code, cumtime, 0, {code}) for code, cumtime in sorted(roots, key=lambda root: -root[1]) if cumtime >= threshold]
+
+
+class _QueryTimer:
+    """execute_wrapper counting the queries of a request and the time spent in them."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+def write_profile(record):
+    """Append one profile as a line of compact JSON."""
+    jsonl.append(settings.PROFILING_LOG, record, settings.PROFILING_LOG_MAX_BYTES)
+
+
+def read_profiles(limit=None):
+    """Profiles from the log, newest first."""
+    return jsonl.read(settings.PROFILING_LOG, limit)
+
+
+def slowest_views(profiles):
+    """Per view: request count, mean and worst wall time, mean DB time and queries; slowest first."""
+    by_view = defaultdict(list)
+    for profile in profiles:
+        by_view[profile['view']].append(profile)
+    rows = []
+    for view, runs in by_view.items():
+        rows.append({
+            'view': view,
+            'requests': len(runs),
+            'mean_ms': round(sum(run['wall_ms'] for run in runs) / len(runs), 2),
+            'max_ms': max(run['wall_ms'] for run in runs),
+            'db_ms': round(sum(run['db_ms'] for run in runs) / len(runs), 2),
+            'queries': round(sum(run['queries'] for run in runs) / len(runs), 1),
+        })
+    return sorted(rows, key=lambda row: -row['mean_ms'])
+
+
+class ProfilingMiddleware:
+    """
+    Run a sample of requests under cProfile and log where their time went.
+
+    A request is profiled at random with probability PROFILING_SAMPLE_RATE,
+    or on demand when a staff user adds ?_profile=1 or an X-Profile: 1
+    header. Each profile records wall, CPU and database time, the query
+    count, the top functions and a call tree, as one JSONL line in
+    PROFILING_LOG. Only one request per process is profiled at a time;
+    requests arriving meanwhile are served unprofiled. Must come after
+    AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def should_profile(self, request):
+        if request.GET.get('_profile') == '1' or request.headers.get('X-Profile') == '1':
+            return request.user.is_staff
+        rate = settings.PROFILING_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+        # Another thread is profiling: serve this request unprofiled rather than wait
+        if not _profiler_lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return self.profile(request)
+        finally:
+            _profiler_lock.release()
+
+    def profile(self, request):
+        timer = _QueryTimer()
+        profiler = cProfile.Profile()
+        wrappers = [connection.execute_wrapper(timer) for connection in connections.all()]
+        for wrapper in wrappers:
+            wrapper.__enter__()
+        started_at = timezone.now()
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            try:
+                profiler.enable()
+            except ValueError:
+                # Some other tool (a debugger, sys.monitoring user) holds the profiler slot
+                return self.get_response(request)
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        finally:
+            cpu = time.thread_time() - cpu
+            wall = time.perf_counter() - wall
+            for wrapper in reversed(wrappers):
+                wrapper.__exit__(None, None, None)
+
+        profiler.create_stats()
+        stats = profiler.stats
+        top = sorted(stats.items(), key=lambda item: -item[1][3])[:TOP_FUNCTIONS]
+        match = request.resolver_match
+        write_profile({
+            'at': started_at.isoformat(timespec='seconds'),
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else request.path,
+            'status': response.status_code,
+            'wall_ms': _ms(wall),
+            'cpu_ms': _ms(cpu),
+            'db_ms': _ms(timer.seconds),
+            'queries': timer.count,
+            # [function, calls, own ms, cumulative ms]
+            'top': [[_label(code), calls, _ms(tottime), _ms(cumtime)] for code, (_, calls, tottime, cumtime, _) in top],
+            'tree': _call_tree(stats, wall),
+        })
+        return response
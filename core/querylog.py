@@ -0,0 +1,131 @@
+import contextvars
+import hashlib
+import re
+import sys
+import time
+from pathlib import Path
+from django.conf import settings
+from django.utils import timezone
+from . import jsonl
+
+
+# Characters of normalised SQL kept per fingerprint in the log
+SQL_PREVIEW = 300
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w."])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_VALUES_LIST = re.compile(r'\bVALUES\s*\(.*?\)(?:\s*,\s*\(.*?\))*', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+_collector = contextvars.ContextVar('querylog_collector', default=None)
+
+
+def normalise(sql):
+    """SQL with literals, placeholders and value lists replaced, so repeated statements compare equal."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _VALUES_LIST.sub('VALUES (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    """(fingerprint id, normalised SQL) of a statement."""
+    normalised = normalise(sql)
+    return hashlib.sha1(normalised.encode()).hexdigest()[:12], normalised
+
+
+def call_site():
+    """file:line (function) of the innermost project frame that issued the current statement."""
+    base = str(settings.BASE_DIR)
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(base) and 'site-packages' not in filename and filename != __file__:
+            relative = Path(filename).relative_to(base)
+            return f'{relative}:{frame.f_lineno} ({frame.f_code.co_name})'
+        frame = frame.f_back
+    return None
+
+
+class QueryCollector:
+    """Statements one request ran, grouped by fingerprint."""
+
+    def __init__(self):
+        self.statements = {}
+        self.slow = []
+
+    def record(self, sql, seconds):
+        key, normalised = fingerprint(sql)
+        ms = round(seconds * 1000, 3)
+        entry = self.statements.get(key)
+        if entry is None:
+            entry = self.statements[key] = {'sql': normalised[:SQL_PREVIEW], 'ms': [], 'site': None}
+        entry['ms'].append(ms)
+        # Where a statement repeats, attribute it once: the likely N+1 loop
+        if len(entry['ms']) == 2:
+            entry['site'] = call_site()
+        if ms >= settings.QUERY_LOG_SLOW_MS:
+            self.slow.append([key, ms, call_site()])
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    """Time every statement and hand it to the current request's collector, if any."""
+    collector = _collector.get()
+    if collector is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        collector.record(sql, time.perf_counter() - started)
+
+
+def install(sender, connection, **kwargs):
+    """connection_created receiver adding execute_wrapper to every new database connection."""
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+def read_requests(limit=None):
+    """Logged requests, newest first."""
+    return jsonl.read(settings.QUERY_LOG, limit)
+
+
+class QueryLogMiddleware:
+    """
+    Collect the statements of each request and log them by fingerprint.
+
+    Each request with queries becomes one JSONL line in QUERY_LOG holding,
+    per fingerprint, the normalised SQL, every latency and the call site of
+    its first repeat, plus the statements slower than QUERY_LOG_SLOW_MS with
+    their call sites. Disabled unless QUERY_LOG_ENABLED.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.QUERY_LOG_ENABLED:
+            return self.get_response(request)
+
+        collector = QueryCollector()
+        token = _collector.set(collector)
+        try:
+            response = self.get_response(request)
+        finally:
+            _collector.reset(token)
+
+        if collector.statements:
+            match = request.resolver_match
+            jsonl.append(settings.QUERY_LOG, {
+                'at': timezone.now().isoformat(timespec='seconds'),
+                'path': request.path,
+                'view': match.view_name if match else request.path,
+                'statements': collector.statements,
+                'slow': collector.slow,
+            }, settings.QUERY_LOG_MAX_BYTES)
+        return response
@@ -0,0 +1,81 @@
+from datetime import date
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from inventory.models import Product, Stock, StockTransfer
+from inventory.signals import stock_levels_changed
+from sales.models import Customer, Invoice
+from sales.signals import payments_changed
+from staff.models import StaffProfile
+from . import metrics
+
+
+def _month(day):
+    return day.strftime('%Y-%m')
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+def invalidate_invoice_metrics(sender, instance, **kwargs):
+    # Today's and this month's keys too, in case an edit moved the invoice away from them
+    today = date.today()
+    metrics.invalidate('today_sales', *{today.isoformat(), instance.date.isoformat()})
+    metrics.invalidate('monthly_revenue', *{_month(today), _month(instance.date)})
+    metrics.invalidate('recent_invoices')
+    if instance.created_by_id:
+        metrics.invalidate('recent_invoices', f'user-{instance.created_by_id}')
+
+
+@receiver(payments_changed)
+def invalidate_payment_metrics(sender, invoice_ids, **kwargs):
+    # Recent invoice lists show the payment status
+    metrics.invalidate('recent_invoices')
+    creators = Invoice.objects.filter(pk__in=invoice_ids, created_by__isnull=False).order_by().values_list(
+        'created_by_id', flat=True
+    ).distinct()
+    scopes = [f'user-{user_id}' for user_id in creators]
+    if scopes:
+        metrics.invalidate('recent_invoices', *scopes)
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def invalidate_customer_metrics(sender, instance, **kwargs):
+    metrics.invalidate('customer_count')
+    # Recent invoice lists show customer names
+    metrics.invalidate('recent_invoices')
+    creators = Invoice.objects.filter(customer_id=instance.pk, created_by__isnull=False).order_by().values_list(
+        'created_by_id', flat=True
+    ).distinct()
+    scopes = [f'user-{user_id}' for user_id in creators]
+    if scopes:
+        metrics.invalidate('recent_invoices', *scopes)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_metrics(sender, **kwargs):
+    metrics.invalidate('product_count')
+    metrics.invalidate('recent_products')
+    # Product names appear in the low stock and transfer lists
+    metrics.invalidate('low_stock')
+    metrics.invalidate('recent_transfers')
+
+
+@receiver(post_save, sender=Stock)
+@receiver(post_delete, sender=Stock)
+@receiver(stock_levels_changed)
+def invalidate_stock_metrics(sender, **kwargs):
+    metrics.invalidate('low_stock')
+
+
+@receiver(post_save, sender=StockTransfer)
+@receiver(post_delete, sender=StockTransfer)
+def invalidate_transfer_metrics(sender, **kwargs):
+    metrics.invalidate('pending_transfers')
+    metrics.invalidate('recent_transfers')
+
+
+@receiver(post_save, sender=StaffProfile)
+@receiver(post_delete, sender=StaffProfile)
+def invalidate_role(sender, instance, **kwargs):
+    metrics.invalidate('role', instance.user_id)
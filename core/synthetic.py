@@ -0,0 +1,329 @@
+import bisect
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from itertools import accumulate
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from inventory.models import Product, Stock, StockBatch, StockMovement
+from sales.models import Customer, Invoice, Payment, SaleItem
+from sales import numbering
+
+
+CENT = Decimal('0.01')
+ZERO = Decimal('0.00')
+
+# Popularity: the product (customer) of rank r sells (buys) in proportion to 1 / r**s
+PRODUCT_ZIPF_S = 1.1
+CUSTOMER_ZIPF_S = 0.8
+
+# Seasonality of invoice counts, January to December and Monday to Sunday
+MONTH_WEIGHTS = (0.85, 0.8, 0.95, 0.95, 1.0, 0.95, 0.9, 0.95, 1.05, 1.1, 1.3, 1.5)
+WEEKDAY_WEIGHTS = (1.0, 1.05, 1.05, 1.0, 1.1, 0.6, 0.35)
+# Day-to-day noise on top of the seasonal weight
+DAY_NOISE = 0.2
+
+LINE_COUNTS = (1, 2, 3, 4, 5)
+LINE_WEIGHTS = (35, 25, 18, 12, 10)
+QUANTITIES = (1, 2, 3, 4, 5, 10, 20)
+QUANTITY_WEIGHTS = (45, 22, 12, 8, 6, 5, 2)
+WAREHOUSES = [code for code, _ in Stock.WAREHOUSE_CHOICES]
+WAREHOUSE_WEIGHTS = (50,) + (50 / (len(WAREHOUSES) - 1),) * (len(WAREHOUSES) - 1)
+
+# Share of invoices with a discount, and the discount as a share of the subtotal
+DISCOUNT_SHARE = 0.2
+DISCOUNT_RATES = (Decimal('0.05'), Decimal('0.10'), Decimal('0.15'))
+
+# Invoices older than this are settled as often as they will ever be
+PAYMENT_TERM_DAYS = 60
+PAID_SHARE = 0.85
+PARTIAL_SHARE = 0.1
+PAYMENT_METHODS = [code for code, _ in Payment.METHOD_CHOICES]
+PAYMENT_METHOD_WEIGHTS = (15, 35, 40, 10)
+
+# Share of stock rows left below their reorder level
+LOW_STOCK_SHARE = 0.05
+
+REFERENCE = 'synthetic'
+
+BRANDS = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Stark', 'Wayne', 'Wonka', 'Hooli', 'Vandelay', 'Soylent',
+          'Tyrell', 'Cyberdyne', 'Aperture', 'Oscorp', 'Massive', 'Dynamic', 'Nakatomi', 'Gringotts']
+ADJECTIVES = ['Wireless', 'Portable', 'Premium', 'Compact', 'Ergonomic', 'Industrial', 'Digital', 'Organic',
+              'Stainless', 'Adjustable', 'Rechargeable', 'Waterproof', 'Foldable', 'Heavy', 'Slim', 'Smart']
+NOUNS = ['Laptop', 'Monitor', 'Keyboard', 'Mouse', 'Chair', 'Desk', 'Lamp', 'Cable', 'Notebook', 'Printer',
+         'Speaker', 'Headphones', 'Router', 'Charger', 'Stapler', 'Cabinet', 'Shelf', 'Kettle', 'Blender', 'Jacket',
+         'Backpack', 'Bottle', 'Scanner', 'Projector', 'Tablet', 'Camera', 'Drill', 'Toaster', 'Heater', 'Fan']
+COMPANY_WORDS = ['North', 'Blue', 'Summit', 'Pioneer', 'Harbor', 'Granite', 'Silver', 'Bright', 'Union', 'Cedar',
+                 'Atlas', 'Metro', 'Prime', 'Evergreen', 'Falcon', 'Keystone', 'Liberty', 'Orchard', 'Redwood', 'Vertex']
+COMPANY_SUFFIXES = ['Corp', 'Inc', 'LLC', 'Group', 'Trading', 'Supplies', 'Partners', 'Holdings']
+STREETS = ['Main St', 'Oak Ave', 'Market St', 'Commerce Dr', 'Industrial Way', 'Park Rd', 'Harbor Blvd', 'Mill Ln']
+CITIES = ['NY', 'LA', 'SF', 'Chicago', 'Boston', 'Seattle', 'Austin', 'Denver', 'Miami', 'Atlanta']
+
+# Per-process catalogue of the run being generated, loaded by the first invoice chunk
+_catalogue = {}
+
+
+def _rng(plan, phase, chunk):
+    # Seeded per chunk, so the data does not depend on the number of workers
+    return random.Random(f'{plan["seed"]}:{phase}:{chunk}')
+
+
+def _zipf_cum_weights(count, s, rng):
+    """Cumulative Zipf weights over count items, with the popularity ranks shuffled."""
+    ranks = list(range(1, count + 1))
+    rng.shuffle(ranks)
+    return list(accumulate(rank ** -s for rank in ranks))
+
+
+def sales_calendar(first, last, seed):
+    """Days from first to last with their cumulative seasonal weights."""
+    rng = random.Random(f'{seed}:calendar')
+    days = [first + timedelta(days=n) for n in range((last - first).days + 1)]
+    weights = [
+        MONTH_WEIGHTS[day.month - 1] * WEEKDAY_WEIGHTS[day.weekday()] * rng.uniform(1 - DAY_NOISE, 1 + DAY_NOISE)
+        for day in days
+    ]
+    return days, list(accumulate(weights))
+
+
+def invoice_day(plan, index):
+    """
+    Date of the index-th of the run's invoices.
+
+    Invoices are spread over the calendar at evenly spaced quantiles of its
+    weights, so dates rise with the index and any process can date any
+    invoice without coordinating with the others.
+    """
+    cum_weights = plan['cum_weights']
+    position = (index + 0.5) / plan['invoices'] * cum_weights[-1]
+    return plan['days'][min(bisect.bisect_right(cum_weights, position), len(cum_weights) - 1)]
+
+
+def invoices_per_year(plan):
+    """{year: (index of the year's first invoice, invoices dated in it)} for the run."""
+    count = plan['invoices']
+    years = sorted({day.year for day in plan['days']})
+    # invoice_day rises with the index, so each year starts where a bisection finds it
+    bounds = [bisect.bisect_left(range(count), year, key=lambda index: invoice_day(plan, index).year) for year in years]
+    bounds.append(count)
+    return {year: (bounds[n], bounds[n + 1] - bounds[n]) for n, year in enumerate(years)}
+
+
+def create_products(plan, chunk, first_id, count):
+    """Insert count products with ids from first_id. Returns the rows written."""
+    rng = _rng(plan, 'products', chunk)
+    categories = [code for code, _ in Product.CATEGORY_CHOICES]
+    products = []
+    for product_id in range(first_id, first_id + count):
+        # Prices are log-normal: many cheap items, a long tail of expensive ones
+        price = Decimal(str(min(max(rng.lognormvariate(3.5, 1.1), 1), 20000))).quantize(CENT)
+        products.append(Product(
+            id=product_id,
+            name=f'{rng.choice(BRANDS)} {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {rng.randint(1, 999)}',
+            sku=f'SYN-{product_id:08d}',
+            category=rng.choice(categories),
+            price=price,
+            cost_price=(price * Decimal(rng.randint(45, 75)) / 100).quantize(CENT),
+            length=Decimal(rng.randint(5, 200)),
+            width=Decimal(rng.randint(1, 100)),
+            height=Decimal(rng.randint(1, 150)),
+        ))
+    with transaction.atomic():
+        Product.objects.bulk_create(products)
+    return len(products)
+
+
+def create_customers(plan, chunk, first_id, count):
+    """Insert count customers with ids from first_id. Returns the rows written."""
+    rng = _rng(plan, 'customers', chunk)
+    customers = []
+    for customer_id in range(first_id, first_id + count):
+        customers.append(Customer(
+            id=customer_id,
+            name=f'{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_SUFFIXES)}',
+            email=f'customer{customer_id}@synthetic.example',
+            phone=f'+1-555-{rng.randint(0, 9999):04d}',
+            address=f'{rng.randint(1, 9999)} {rng.choice(STREETS)}, {rng.choice(CITIES)}',
+        ))
+    with transaction.atomic():
+        Customer.objects.bulk_create(customers)
+    return len(customers)
+
+
+def _load_catalogue(plan):
+    key = (plan['seed'], plan['product_ids'], plan['customer_ids'])
+    if _catalogue.get('key') != key:
+        first, last = plan['product_ids']
+        rows = Product.objects.filter(id__range=(first, last)).order_by('id').values_list('id', 'price', 'cost_price')
+        product_ids, prices, costs = (list(column) for column in zip(*rows))
+        first, last = plan['customer_ids']
+        customer_ids = list(Customer.objects.filter(id__range=(first, last)).order_by('id').values_list('id', flat=True))
+        _catalogue.clear()
+        _catalogue.update({
+            'key': key,
+            'product_ids': product_ids,
+            'prices': prices,
+            'costs': costs,
+            'product_weights': _zipf_cum_weights(len(product_ids), PRODUCT_ZIPF_S, random.Random(f'{plan["seed"]}:products:popularity')),
+            'customer_ids': customer_ids,
+            'customer_weights': _zipf_cum_weights(len(customer_ids), CUSTOMER_ZIPF_S, random.Random(f'{plan["seed"]}:customers:popularity')),
+        })
+    return _catalogue
+
+
+def _payments(rng, invoice_id, day, total, today, user_id):
+    """Payments of an invoice, likelier to be settled the older it is."""
+    age = (today - day).days
+    settled = min(age / PAYMENT_TERM_DAYS, 1)
+    draw = rng.random()
+    if draw < PAID_SHARE * settled:
+        amounts = [total]
+        if rng.random() < 0.15:
+            deposit = (total * Decimal(rng.randint(20, 50)) / 100).quantize(CENT)
+            amounts = [deposit, total - deposit]
+    elif draw < (PAID_SHARE + PARTIAL_SHARE) * settled:
+        amounts = [(total * Decimal(rng.randint(20, 80)) / 100).quantize(CENT)]
+    else:
+        return []
+
+    payments = []
+    paid_on = day
+    for amount in amounts:
+        paid_on = min(paid_on + timedelta(days=rng.randint(0, min(age, PAYMENT_TERM_DAYS) // len(amounts))), today)
+        payments.append(Payment(
+            invoice_id=invoice_id,
+            amount=amount,
+            date=paid_on,
+            method=rng.choices(PAYMENT_METHODS, PAYMENT_METHOD_WEIGHTS)[0],
+            created_by_id=user_id,
+        ))
+    return payments
+
+
+def create_invoices(plan, chunk, first_index, count):
+    """
+    Insert the run's invoices first_index to first_index + count with their lines and payments.
+
+    Invoice ids and numbers follow from the index, so chunks can be written
+    by any process in any order. Returns the rows written.
+    """
+    catalogue = _load_catalogue(plan)
+    product_ids, prices, costs = catalogue['product_ids'], catalogue['prices'], catalogue['costs']
+    products = range(len(product_ids))
+    customers = range(len(catalogue['customer_ids']))
+    years = plan['years']
+    rng = _rng(plan, 'invoices', chunk)
+
+    invoices, items, payments = [], [], []
+    for index in range(first_index, first_index + count):
+        invoice_id = plan['first_invoice_id'] + index
+        day = invoice_day(plan, index)
+        first_of_year, previous_number = years[day.year]
+        lines = rng.choices(LINE_COUNTS, LINE_WEIGHTS)[0]
+
+        subtotal = ZERO
+        for product in set(rng.choices(products, cum_weights=catalogue['product_weights'], k=lines)):
+            quantity = rng.choices(QUANTITIES, QUANTITY_WEIGHTS)[0]
+            subtotal += prices[product] * quantity
+            items.append(SaleItem(
+                invoice_id=invoice_id,
+                product_id=product_ids[product],
+                warehouse=rng.choices(WAREHOUSES, WAREHOUSE_WEIGHTS)[0],
+                quantity=quantity,
+                price=prices[product],
+                cost_amount=costs[product] * quantity,
+            ))
+        discount = (subtotal * rng.choice(DISCOUNT_RATES)).quantize(CENT) if rng.random() < DISCOUNT_SHARE else ZERO
+        total = subtotal - discount
+
+        user_id = rng.choice(plan['staff_user_ids'])
+        invoice_payments = _payments(rng, invoice_id, day, total, plan['today'], user_id)
+        payments.extend(invoice_payments)
+        paid = sum((payment.amount for payment in invoice_payments), ZERO)
+        customer = rng.choices(customers, cum_weights=catalogue['customer_weights'])[0]
+        invoices.append(Invoice(
+            id=invoice_id,
+            customer_id=catalogue['customer_ids'][customer],
+            invoice_number=numbering.format_invoice_number(day.year, previous_number + index - first_of_year + 1),
+            date=day,
+            discount=discount,
+            total_amount=total,
+            amount_paid=paid,
+            status=Invoice.status_for(total, paid),
+            created_by_id=user_id,
+        ))
+
+    with transaction.atomic():
+        Invoice.objects.bulk_create(invoices)
+        SaleItem.objects.bulk_create(items)
+        Payment.objects.bulk_create(payments)
+    return len(invoices) + len(items) + len(payments)
+
+
+def create_stock(plan, chunk, first_id, count):
+    """
+    Insert stock, FIFO batches and ledger movements for products first_id to first_id + count.
+
+    Every warehouse receives what it sold plus what it has on hand, the
+    journal records the receipts and the sales as one movement each, and the
+    batches are consumed oldest first, so stock, batches and journal agree
+    with the invoices already written. Returns the rows written.
+    """
+    rng = _rng(plan, 'stock', chunk)
+    last_id = first_id + count - 1
+    sold = {
+        (row['product_id'], row['warehouse']): row['units']
+        for row in SaleItem.objects.filter(product__gte=first_id, product__lte=last_id).order_by()
+        .values('product_id', 'warehouse').annotate(units=Sum('quantity'))
+    }
+    costs = dict(Product.objects.filter(id__range=(first_id, last_id)).values_list('id', 'cost_price'))
+    opened_at = timezone.make_aware(datetime.combine(plan['days'][0], time()))
+    restock_day = plan['days'][len(plan['days']) // 2]
+    now = timezone.now()
+    reorder_level = Stock.DEFAULT_REORDER_LEVEL
+
+    stocks, batches, movements = [], [], []
+    for product_id in sorted(costs):
+        received_total = sold_total = 0
+        for warehouse in WAREHOUSES:
+            units_sold = sold.get((product_id, warehouse), 0)
+            if rng.random() < LOW_STOCK_SHARE:
+                on_hand = rng.randrange(reorder_level)
+            else:
+                on_hand = rng.randint(reorder_level, reorder_level * 8)
+            received = units_sold + on_hand
+            received_total += received
+            sold_total += units_sold
+            stocks.append(Stock(product_id=product_id, warehouse=warehouse, quantity=on_hand, reorder_level=reorder_level))
+            if received:
+                movements.append(StockMovement(
+                    product_id=product_id, warehouse=warehouse, kind='receipt', quantity=received,
+                    balance=received, reference=REFERENCE, created_at=opened_at
+                ))
+            if units_sold:
+                movements.append(StockMovement(
+                    product_id=product_id, warehouse=warehouse, kind='sale', quantity=-units_sold,
+                    balance=on_hand, reference=REFERENCE, created_at=now
+                ))
+
+        if received_total:
+            first_batch = max(round(received_total * rng.uniform(0.5, 0.8)), 1)
+            cost = costs[product_id]
+            batches.append(StockBatch(
+                product_id=product_id, quantity=first_batch, remaining_quantity=max(first_batch - sold_total, 0),
+                unit_cost=(cost * Decimal('0.97')).quantize(CENT), received_date=plan['days'][0]
+            ))
+            if received_total > first_batch:
+                second_batch = received_total - first_batch
+                batches.append(StockBatch(
+                    product_id=product_id, quantity=second_batch,
+                    remaining_quantity=second_batch - max(sold_total - first_batch, 0),
+                    unit_cost=(cost * Decimal('1.03')).quantize(CENT), received_date=restock_day
+                ))
+
+    with transaction.atomic():
+        Stock.objects.bulk_create(stocks)
+        StockBatch.objects.bulk_create(batches)
+        StockMovement.objects.bulk_create(movements)
+    return len(stocks) + len(batches) + len(movements)
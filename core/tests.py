@@ -1,3 +1,339 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import date
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from inventory.models import Product, Stock, StockMovement, StockTransfer
+from sales.models import Customer, Invoice, InvoiceSequence, Payment, SaleItem
+from sales import exports, rollups
+from staff.models import StaffProfile
+from . import benchmarks, metrics, pagination, profiling, querylog
 
-# Create your tests here.
+
+class DashboardMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser('boss', password='x')
+        self.client.force_login(self.user)
+
+    def test_warm_dashboard_runs_no_metric_queries(self):
+        self.client.get(reverse('dashboard'))
+        with self.assertNumQueries(0):
+            metrics.user_role(self.user)
+            metrics.dashboard_metrics(self.user, 'admin')
+
+    def test_new_invoice_invalidates_todays_sales(self):
+        self.assertEqual(self.client.get(reverse('dashboard')).context['today_invoice_count'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            customer = Customer.objects.create(name='Walk-in', email='walkin@example.com', phone='000', address='-')
+            invoice = Invoice.objects.create(
+                customer=customer, invoice_number='INV-1', date=date.today(), total_amount=Decimal('12.50')
+            )
+            rollups.record_invoice(invoice.pk)
+
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['today_invoice_count'], 1)
+        self.assertEqual(response.context['today_sales'], Decimal('12.50'))
+        self.assertEqual(response.context['total_customers'], 1)
+
+
+class MetricStampedeTests(TransactionTestCase):
+    def test_only_one_worker_computes_a_missing_entry(self):
+        cache.clear()
+        calls = []
+        start_gate = threading.Barrier(8)
+
+        def compute():
+            calls.append(1)
+            threading.Event().wait(0.2)
+            return 42
+
+        results = []
+
+        def worker():
+            try:
+                start_gate.wait()
+                results.append(metrics.cached_metric('stampede', compute))
+            finally:
+                connection.close()
+
+        pool = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        self.assertEqual(results, [42] * 8)
+        self.assertEqual(len(calls), 1)
+
+
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.log = Path(directory) / 'profiles.jsonl'
+        override = override_settings(PROFILING_LOG=self.log, PROFILING_SAMPLE_RATE=0.0)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_staff_can_profile_a_request_on_demand(self):
+        self.client.force_login(User.objects.create_user('ops', is_staff=True))
+        self.client.get(reverse('dashboard'), {'_profile': '1'})
+
+        [record] = [json.loads(line) for line in self.log.read_text().splitlines()]
+        self.assertEqual(record['view'], 'dashboard')
+        self.assertGreater(record['queries'], 0)
+        self.assertTrue(record['top'])
+        self.assertEqual(profiling.slowest_views(profiling.read_profiles())[0]['view'], 'dashboard')
+        self.assertEqual(self.client.get(reverse('profiling_report'), {'view': 'dashboard', 'run': '0'}).status_code, 200)
+
+    def test_busy_profiler_serves_the_request_unprofiled(self):
+        self.client.force_login(User.objects.create_user('ops', is_staff=True))
+        # Another request holds the profiler
+        with profiling._profiler_lock:
+            response = self.client.get(reverse('dashboard'), {'_profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        # Python 3.12+ refuses a second active profiler
+        with mock.patch('cProfile.Profile') as profile:
+            profile.return_value.enable.side_effect = ValueError('Another profiling tool is already active')
+            response = self.client.get(reverse('dashboard'), {'_profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(self.log.exists())
+
+    def test_other_users_are_not_profiled(self):
+        self.client.force_login(User.objects.create_user('clerk'))
+        self.client.get(reverse('dashboard'), HTTP_X_PROFILE='1')
+        self.assertFalse(self.log.exists())
+        self.assertEqual(self.client.get(reverse('profiling_report')).status_code, 403)
+
+
+class QueryLogTests(TestCase):
+    def test_fingerprint_ignores_literals(self):
+        first, _ = querylog.fingerprint("SELECT * FROM t WHERE id = 1 AND name = 'a''b' AND x IN (%s, %s)")
+        second, normalised = querylog.fingerprint("SELECT *\n  FROM t WHERE id = 42 AND name = 'z' AND x IN (%s)")
+        self.assertEqual(first, second)
+        self.assertEqual(normalised, "SELECT * FROM t WHERE id = ? AND name = ? AND x IN (...)")
+        self.assertNotEqual(first, querylog.fingerprint('SELECT * FROM t2 WHERE id = 1')[0])
+
+    def test_middleware_logs_requests_only_when_enabled(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        log = Path(directory) / 'queries.jsonl'
+        self.client.force_login(User.objects.create_user('clerk'))
+
+        with override_settings(QUERY_LOG=log):
+            self.client.get(reverse('dashboard'))
+            self.assertFalse(log.exists())
+            with override_settings(QUERY_LOG_ENABLED=True):
+                self.client.get(reverse('dashboard'))
+                [request] = querylog.read_requests()
+        self.assertEqual(request['view'], 'dashboard')
+        self.assertTrue(request['statements'])
+
+    def test_per_row_lookups_are_attributed_to_their_call_site(self):
+        customers = [
+            Customer.objects.create(name=f'c{i}', email=f'c{i}@example.com', phone='000', address='-')
+            for i in range(3)
+        ]
+        for i, customer in enumerate(customers):
+            Invoice.objects.create(customer=customer, invoice_number=f'INV-{i}', date=date(2026, 6, 1))
+
+        collector = querylog.QueryCollector()
+        token = querylog._collector.set(collector)
+        try:
+            names = [invoice.customer.name for invoice in Invoice.objects.all()]
+        finally:
+            querylog._collector.reset(token)
+
+        self.assertEqual(len(names), 3)
+        repeated = [entry for entry in collector.statements.values() if len(entry['ms']) == 3]
+        self.assertEqual(len(repeated), 1)
+        self.assertIn('sales_customer', repeated[0]['sql'])
+        self.assertTrue(repeated[0]['site'].startswith('core/tests.py:'))
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        # Repeated prices, so pages break inside runs of equal sort keys
+        for i in range(11):
+            Product.objects.create(name=f'Part {i}', sku=f'PRT-{i:03d}', category='other', price=Decimal(10 + i % 3),
+                                   length=1, width=1, height=1)
+
+    def walk(self, queryset, ordering, per_page=3):
+        seen, cursor = [], None
+        for _ in range(queryset.count()):
+            page = pagination.keyset_paginate(queryset, ordering, cursor, per_page=per_page)
+            seen.extend(row.pk for row in page)
+            if not page.has_next:
+                return seen
+            cursor = page.next_cursor
+        self.fail('pagination did not finish')
+
+    def test_pages_cover_every_row_once_in_order(self):
+        products = Product.objects.all()
+        for ordering, tie_breaker in ((['price'], 'pk'), (['-price'], '-pk'), (['-created_at'], '-pk')):
+            expected = list(products.order_by(*ordering, tie_breaker).values_list('pk', flat=True))
+            self.assertEqual(self.walk(products, ordering), expected, ordering)
+
+    def test_bad_cursor_restarts_from_the_first_page(self):
+        first = pagination.keyset_paginate(Product.objects.all(), ['price'], per_page=3)
+        for cursor in ('not-base64!', pagination.encode_cursor(['12.00']), pagination.encode_cursor(['x', 1])):
+            page = pagination.keyset_paginate(Product.objects.all(), ['price'], cursor, per_page=3)
+            self.assertTrue(page.is_first, cursor)
+            self.assertEqual(page.object_list, first.object_list)
+
+    def test_list_view_follows_its_next_cursor(self):
+        for i in range(11, pagination.PAGE_SIZE + 5):
+            Product.objects.create(name=f'Part {i}', sku=f'PRT-{i:03d}', category='other', price=Decimal(10 + i % 3),
+                                   length=1, width=1, height=1)
+        self.client.force_login(User.objects.create_superuser('boss', password='x'))
+
+        first = self.client.get(reverse('product_list'), {'sort': '-price'}).context['page']
+        second = self.client.get(reverse('product_list'), {'sort': '-price', 'cursor': first.next_cursor}).context['page']
+
+        self.assertFalse(second.has_next)
+        self.assertEqual([product.pk for product in [*first, *second]],
+                         list(Product.objects.order_by('-price', '-pk').values_list('pk', flat=True)))
+
+    def test_unknown_sort_falls_back_to_the_default(self):
+        self.assertEqual(pagination.sort_ordering('-price', ['price'], ['name']), ['-price'])
+        self.assertEqual(pagination.sort_ordering('password', ['price'], ['name']), ['name'])
+
+
+class SyntheticDataTests(TestCase):
+    def test_scale_mode_writes_consistent_rows(self):
+        call_command('populate_data', products=40, customers=15, invoices=300, months=3, chunk_size=64, stdout=StringIO())
+
+        self.assertEqual(Invoice.objects.count(), 300)
+        by_year = Invoice.objects.values('date__year').annotate(count=Count('id'))
+        self.assertEqual(
+            {row['date__year']: row['count'] for row in by_year},
+            dict(InvoiceSequence.objects.values_list('year', 'last_number'))
+        )
+        paid = dict(Payment.objects.values('invoice').annotate(total=Sum('amount')).values_list('invoice', 'total'))
+        for invoice in Invoice.objects.all():
+            self.assertEqual(invoice.amount_paid, paid.get(invoice.pk, Decimal('0.00')))
+            self.assertEqual(invoice.status, Invoice.status_for(invoice.total_amount, invoice.amount_paid))
+
+        # Stock, open batches and the journal all agree on what is left
+        on_hand = dict(Stock.objects.values('product').annotate(units=Sum('quantity')).values_list('product', 'units'))
+        for product in Product.objects.all():
+            self.assertEqual(product.open_units, on_hand[product.pk])
+        for stock in Stock.objects.all():
+            latest = StockMovement.objects.filter(product=stock.product_id, warehouse=stock.warehouse).order_by('-created_at', '-id').first()
+            self.assertEqual(latest.balance if latest else 0, stock.quantity)
+        self.assertEqual(rollups.sales_totals(date.min, date.max)[1], 300)
+
+
+    def test_demo_invoices_take_their_stock(self):
+        call_command('populate_data', stdout=StringIO())
+        # Eight products at 50 in main and 20 elsewhere, with three east rows cut to 5
+        opening = 8 * (50 + 4 * 20) - 3 * 15
+        sold = SaleItem.objects.aggregate(units=Sum('quantity'))['units']
+        self.assertEqual(Stock.objects.aggregate(units=Sum('quantity'))['units'], opening - sold)
+
+        # Deleting a demo invoice gives back exactly what it took
+        invoice = Invoice.objects.first()
+        returned = invoice.items.aggregate(units=Sum('quantity'))['units']
+        self.client.force_login(User.objects.get(username='admin'))
+        self.client.post(reverse('invoice_delete', args=[invoice.pk]))
+        self.assertEqual(Stock.objects.aggregate(units=Sum('quantity'))['units'], opening - sold + returned)
+
+# Generated fixture for the view benchmarks; BENCHMARK_SCALE multiplies it
+BENCHMARK_FIXTURE = {'products': 1000, 'customers': 250, 'invoices': 5000}
+
+
+class ViewBenchmarkTests(TestCase):
+    """
+    Every URL of the project against core/benchmark_baseline.json.
+
+    Query budgets are always enforced. Set BENCHMARK_LATENCY=1 to also fail
+    on p50/p95 regressions (compare on the machine the baseline was recorded
+    on), BENCHMARK_SCALE=N for an N times larger fixture, and
+    BENCHMARK_WRITE_BASELINE=1 to record a new baseline instead of comparing.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        scale = int(os.environ.get('BENCHMARK_SCALE', '1'))
+        cls.fixture = {name: count * scale for name, count in BENCHMARK_FIXTURE.items()}
+        call_command('populate_data', months=12, seed=1, stdout=StringIO(), **cls.fixture)
+        cls.admin = User.objects.get(username='admin')
+        cls.product = Product.objects.order_by('id').first()
+        cls.invoice = Invoice.objects.filter(status='partial').order_by('id').first()
+        cls.transfer = StockTransfer.objects.create(
+            product=cls.product, from_warehouse='main', to_warehouse='north', quantity=1, created_by=cls.admin
+        )
+        cls.profile = StaffProfile.objects.get(user__username='synthetic-sales-01')
+
+    def setUp(self):
+        self.document_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.document_dir)
+        override = override_settings(INVOICE_DOCUMENT_DIR=self.document_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_regressions_flag_budget_status_and_latency(self):
+        baseline = {'views': {'page': {'status': 200, 'queries': 4, 'p50_ms': 10.0, 'p95_ms': 20.0}}}
+        result = {'status': 200, 'queries': 4, 'p50_ms': 19.0, 'p95_ms': 34.0}
+        self.assertEqual(benchmarks.regressions({'page': result}, baseline, check_latency=True), [])
+
+        slower = dict(result, queries=5, p95_ms=40.0)
+        problems = benchmarks.regressions({'page': slower, 'new': result}, baseline, check_latency=True)
+        self.assertEqual(len(problems), 3)
+        self.assertIn('5 queries, budget 4', problems[1])
+        # Latency only counts when asked for
+        self.assertEqual(len(benchmarks.regressions({'page': slower}, baseline)), 1)
+
+    def test_views_within_baseline(self):
+        write = bool(os.environ.get('BENCHMARK_WRITE_BASELINE'))
+        check_latency = bool(os.environ.get('BENCHMARK_LATENCY'))
+        # Query counts do not need many samples; latencies do
+        runs = benchmarks.BENCHMARK_RUNS if write or check_latency else 2
+        urls = benchmarks.view_urls({
+            'product_update': {'pk': self.product.pk},
+            'product_delete': {'pk': self.product.pk},
+            'transfer_update': {'pk': self.transfer.pk},
+            'invoice_export': [{'kind': kind} for kind in exports.EXPORTS],
+            'invoice_detail': {'pk': self.invoice.pk},
+            'invoice_print': {'pk': self.invoice.pk},
+            'invoice_update': {'pk': self.invoice.pk},
+            'invoice_delete': {'pk': self.invoice.pk},
+            'payment_create': {'invoice_id': self.invoice.pk},
+            'staff_profile': {'pk': self.profile.pk},
+        })
+
+        def login():
+            self.client.force_login(self.admin)
+
+        login()
+        results = {}
+        for label, url in urls:
+            if label == 'logout':
+                # Logging out ends the session: log in before every request and again afterwards
+                results[label] = benchmarks.measure(self.client, url, runs, before_request=login)
+                login()
+            else:
+                results[label] = benchmarks.measure(self.client, url, runs)
+
+        if write:
+            benchmarks.write_baseline(results, self.fixture)
+            print(f'\n{benchmarks.report(results)}\nWrote {benchmarks.BASELINE_PATH}')
+            return
+
+        baseline = benchmarks.read_baseline()
+        if check_latency and baseline['fixture'] != self.fixture:
+            self.fail(f'Latency baseline was recorded with fixture {baseline["fixture"]}, not {self.fixture}')
+        problems = benchmarks.regressions(results, baseline, check_latency)
+        self.assertFalse(problems, '\n'.join(problems) + '\n\n' + benchmarks.report(results))
@@ -1,14 +1,13 @@
+from django.conf import settings
 from django.shortcuts import render, redirect
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum, Count, Q
-from django.utils import timezone
-from datetime import date
-from decimal import Decimal
+from django.core.exceptions import PermissionDenied
 from .forms import CustomLoginForm
-from inventory.models import Product, Stock, StockTransfer
-from sales.models import Invoice, Customer
-from staff.models import StaffProfile
+from . import metrics, profiling
+
+# Most recent profiles read by the profiling report
+PROFILING_REPORT_LIMIT = 2000
 
 
 def custom_login(request):
@@ -39,60 +38,42 @@ def custom_logout(request):
 
 @login_required
 def dashboard(request):
-    """Dashboard view with role-based context."""
+    """Dashboard view with role-based context, served from the metric cache."""
+    role, role_display = metrics.user_role(request.user)
+    
     context = {
         'user': request.user,
+        'role': role,
+        'role_display': role_display,
     }
+    # Counts, today's sales, transfers, low stock and the role's recent lists
+    context.update(metrics.dashboard_metrics(request.user, role))
     
-    # Get user profile and role
-    try:
-        profile = request.user.profile
-        role = profile.role
-        context['role'] = role
-        context['role_display'] = profile.get_role_display()
-    except StaffProfile.DoesNotExist:
-        role = 'admin' if request.user.is_superuser else None
-        context['role'] = role
-        context['role_display'] = 'Administrator' if request.user.is_superuser else 'User'
-    
-    # Common metrics for all roles
-    context['total_products'] = Product.objects.count()
-    context['total_customers'] = Customer.objects.count()
-    
-    # Today's sales
-    today = date.today()
-    today_invoices = Invoice.objects.filter(date=today)
-    context['today_sales'] = today_invoices.aggregate(
-        total=Sum('total_amount')
-    )['total'] or Decimal('0.00')
-    context['today_invoice_count'] = today_invoices.count()
-    
-    # Pending transfers
-    context['pending_transfers'] = StockTransfer.objects.filter(
-        status__in=['pending', 'approved', 'in_transit']
-    ).count()
+    return render(request, 'core/dashboard.html', context)
+
+
+@login_required
+def profiling_report(request):
+    """Staff-only ranking of the slowest profiled views, with per-request breakdowns."""
+    if not request.user.is_staff:
+        raise PermissionDenied
     
-    # Low stock alerts
-    low_stock_items = Stock.objects.filter(quantity__lt=10)
-    context['low_stock_count'] = low_stock_items.count()
-    context['low_stock_items'] = low_stock_items[:5]  # Show top 5
+    profiles = profiling.read_profiles(limit=PROFILING_REPORT_LIMIT)
+    view = request.GET.get('view')
+    runs = sorted((p for p in profiles if p['view'] == view), key=lambda p: -p['wall_ms']) if view else []
     
-    # Recent activities based on role
-    if role in ['admin', 'ceo']:
-        context['recent_invoices'] = Invoice.objects.all()[:5]
-        context['recent_transfers'] = StockTransfer.objects.all()[:5]
-    elif role == 'sales':
-        context['recent_invoices'] = Invoice.objects.filter(
-            created_by=request.user
-        )[:5]
-    elif role == 'warehouse':
-        context['recent_transfers'] = StockTransfer.objects.all()[:5]
-        context['recent_products'] = Product.objects.all()[:5]
-    elif role == 'accountant':
-        context['recent_invoices'] = Invoice.objects.all()[:5]
-        context['monthly_revenue'] = Invoice.objects.filter(
-            date__year=today.year,
-            date__month=today.month
-        ).aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00')
+    selected = None
+    run = request.GET.get('run')
+    if run and run.isdigit() and int(run) < len(runs):
+        selected = runs[int(run)]
     
-    return render(request, 'core/dashboard.html', context)
+    context = {
+        'views': profiling.slowest_views(profiles),
+        'profile_count': len(profiles),
+        'view': view,
+        'runs': runs[:50],
+        'selected': selected,
+        'sample_rate': settings.PROFILING_SAMPLE_RATE,
+        'title': 'Request Profiles'
+    }
+    return render(request, 'core/profiling_report.html', context)
@@ -0,0 +1,145 @@
+from decimal import Decimal
+from django.db.models import F
+from .models import Product, StockBatch
+
+
+# Number of open batches fetched (and locked) per round trip while consuming.
+BATCH_WINDOW = 20
+
+
+def adjust_open_totals(product_id, units, value, reprice=True):
+    """
+    Add units and value to a product's open-batch totals and re-derive its average cost.
+
+    The totals are incremented in SQL so concurrent writers never lose an update.
+    Pass reprice=False when several changes are applied in a row and call
+    reprice() once at the end. Returns the resulting cost price, or None when
+    repricing was skipped.
+    """
+    products = Product.objects.filter(pk=product_id)
+    products.update(
+        open_units=F('open_units') + units,
+        open_value=F('open_value') + value
+    )
+    if not reprice:
+        return None
+
+    totals = products.values('open_units', 'open_value', 'cost_price').get()
+    if totals['open_units'] <= 0:
+        return totals['cost_price']
+
+    cost_price = (totals['open_value'] / totals['open_units']).quantize(Decimal('0.01'))
+    products.update(cost_price=cost_price)
+    return cost_price
+
+
+def reprice(product_ids, chunk_size=500):
+    """Derive cost_price from the open totals of the given products, a chunk at a time."""
+    product_ids = list(product_ids)
+    repriced = 0
+    for start in range(0, len(product_ids), chunk_size):
+        products = list(
+            Product.objects.filter(
+                pk__in=product_ids[start:start + chunk_size],
+                open_units__gt=0
+            ).only('open_units', 'open_value')
+        )
+        for product in products:
+            product.cost_price = (product.open_value / product.open_units).quantize(Decimal('0.01'))
+        Product.objects.bulk_update(products, ['cost_price'])
+        repriced += len(products)
+    return repriced
+
+
+def record_receipt(batch):
+    """Add a newly received batch to its product's open totals."""
+    return adjust_open_totals(batch.product_id, batch.quantity, batch.unit_cost * batch.quantity)
+
+
+def _open_batches(product):
+    """Open batches of a product in consumption order for its valuation method."""
+    if product.valuation_method == 'lifo':
+        order = ['-received_date', '-created_at', '-id']
+    else:
+        # FIFO and AVCO both deplete the oldest stock first
+        order = ['received_date', 'created_at', 'id']
+    return StockBatch.objects.filter(
+        product=product,
+        remaining_quantity__gt=0
+    ).order_by(*order)
+
+
+def consume(product, quantity):
+    """
+    Deplete open batches of a product by quantity.
+
+    Batches are read and locked a small window at a time through the open-batch
+    index, so the work done is proportional to the batches actually touched.
+    Must be called inside a transaction.
+
+    Returns (cost, allocations) where cost is the cost of goods sold and
+    allocations is a list of (batch, quantity_taken, unit_cost) tuples.
+    FIFO and LIFO charge each batch at its own cost; AVCO charges every unit
+    at the current average and takes the same amount off the open value, so
+    the average is unchanged by a sale. Any quantity not covered by open
+    batches is costed at the average cost.
+    """
+    allocations = []
+    batch_cost = Decimal('0.00')
+    needed = quantity
+    products = Product.objects.filter(pk=product.pk)
+    if product.valuation_method == 'avco':
+        # Read under the product row lock, so the average cannot move until commit
+        totals = products.select_for_update().values('open_units', 'open_value', 'cost_price').get()
+        average = totals['cost_price']
+    else:
+        average = product.cost_price
+
+    while needed > 0:
+        window = list(_open_batches(product).select_for_update()[:BATCH_WINDOW])
+        if not window:
+            break
+
+        touched = []
+        for batch in window:
+            taken = min(needed, batch.remaining_quantity)
+            batch.remaining_quantity -= taken
+            touched.append(batch)
+            unit_cost = average if product.valuation_method == 'avco' else batch.unit_cost
+            allocations.append((batch, taken, unit_cost))
+            batch_cost += unit_cost * taken
+            needed -= taken
+            if needed == 0:
+                break
+
+        StockBatch.objects.bulk_update(touched, ['remaining_quantity'])
+
+    if allocations:
+        units = sum(taken for _, taken, _ in allocations)
+        if product.valuation_method == 'avco' and units >= totals['open_units']:
+            # Emptying the pool: take all of its value, rounding residue included
+            batch_cost = totals['open_value']
+        adjust_open_totals(product.pk, -units, -batch_cost)
+
+    return batch_cost + average * needed, allocations
+
+
+def restore(product, allocations):
+    """
+    Return previously consumed quantities to their batches.
+
+    allocations is an iterable of (batch_id, quantity, unit_cost) tuples, as
+    recorded by consume(); their value goes back into the open totals at the
+    unit cost charged for them, which for AVCO is the average at the time.
+    """
+    units = 0
+    value = Decimal('0.00')
+    for batch_id, quantity, unit_cost in allocations:
+        StockBatch.objects.filter(pk=batch_id).update(
+            remaining_quantity=F('remaining_quantity') + quantity
+        )
+        units += quantity
+        value += unit_cost * quantity
+
+    if units:
+        adjust_open_totals(product.pk, units, value)
@@ -4,19 +4,22 @@ from .models import Product, Stock, StockTransfer, StockBatch, StockAdjustment
 class ProductForm(forms.ModelForm):
     class Meta:
         model = Product
-        fields = ['name', 'sku', 'category', 'price', 'cost_price', 'valuation_method', 'length', 'width', 'height']
+        fields = ['name', 'sku', 'category', 'price', 'valuation_method', 'length', 'width', 'height']
         widgets = {
             'name': forms.TextInput(attrs={'class': 'form-control'}),
             'sku': forms.TextInput(attrs={'class': 'form-control'}),
             'category': forms.Select(attrs={'class': 'form-select'}),
             'price': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
-            'cost_price': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
             'valuation_method': forms.Select(attrs={'class': 'form-select'}),
             'length': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
             'width': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
             'height': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
         }
 
+    def clean_sku(self):
+        # Stored upper-case, so uniqueness and the SKU prefix search ignore case
+        return self.cleaned_data['sku'].strip().upper()
+
 class StockForm(forms.ModelForm):
     class Meta:
         model = Stock
@@ -84,3 +87,29 @@ class StockAdjustmentForm(forms.ModelForm):
             'reason': forms.Select(attrs={'class': 'form-select'}),
             'note': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
         }
+
+class ReorderLevelForm(forms.Form):
+    """Form for setting the reorder point of a product in one warehouse."""
+    product = forms.ModelChoiceField(
+        queryset=Product.objects.all(),
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    warehouse = forms.ChoiceField(
+        choices=Stock.WAREHOUSE_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    reorder_level = forms.IntegerField(
+        min_value=0,
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+        help_text='Stock below this quantity is flagged as low.'
+    )
+
+class StockImportForm(forms.Form):
+    """Upload form for bulk purchase receipts."""
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('jsonl', 'JSON Lines'),
+    ]
+    
+    file = forms.FileField(widget=forms.ClearableFileInput(attrs={'class': 'form-control'}))
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, widget=forms.Select(attrs={'class': 'form-select'}))
@@ -0,0 +1,148 @@
+import csv
+import json
+import time
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from .models import Product, Stock, StockBatch
+from . import costing, ledger
+
+
+RECEIPT_FIELDS = ['sku', 'warehouse', 'quantity', 'unit_cost', 'received_date']
+
+
+class ImportReport:
+    """Outcome of a bulk import: counts, rejected rows and throughput."""
+
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    @property
+    def rejected(self):
+        return len(self.errors)
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+def iter_records(stream, fmt):
+    """Yield (line_number, dict) pairs from a text stream of CSV or JSONL records."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError:
+                yield line_number, None
+    else:
+        raise ValueError(f'Unsupported import format: {fmt}')
+
+
+def parse_receipt(record, sku_map, warehouses):
+    """Validate one receipt record; return (product_id, warehouse, quantity, unit_cost, received_date)."""
+    if not isinstance(record, dict):
+        raise ValueError('Malformed record')
+
+    sku = str(record.get('sku') or '').strip()
+    product_id = sku_map.get(sku.upper(), sku_map.get(sku))
+    if product_id is None:
+        raise ValueError(f'Unknown SKU "{sku}"')
+
+    warehouse = str(record.get('warehouse') or '').strip()
+    if warehouse not in warehouses:
+        raise ValueError(f'Unknown warehouse "{warehouse}"')
+
+    try:
+        quantity = int(record.get('quantity'))
+        unit_cost = Decimal(str(record.get('unit_cost'))).quantize(Decimal('0.01'))
+        received_date = date.fromisoformat(str(record.get('received_date')).strip())
+    except (TypeError, ValueError, InvalidOperation):
+        raise ValueError('Invalid quantity, unit_cost or received_date')
+
+    if quantity <= 0:
+        raise ValueError('Quantity must be positive')
+    if unit_cost < 0:
+        raise ValueError('Unit cost cannot be negative')
+
+    return product_id, warehouse, quantity, unit_cost, received_date
+
+
+def _import_chunk(rows, reference, user):
+    """Insert one chunk of parsed receipts in a single transaction."""
+    stock_deltas = defaultdict(int)
+    open_totals = defaultdict(lambda: [0, Decimal('0.00')])
+    batches = []
+    for product_id, warehouse, quantity, unit_cost, received_date in rows:
+        batches.append(StockBatch(
+            product_id=product_id,
+            quantity=quantity,
+            remaining_quantity=quantity,
+            unit_cost=unit_cost,
+            received_date=received_date
+        ))
+        stock_deltas[(product_id, warehouse)] += quantity
+        open_totals[product_id][0] += quantity
+        open_totals[product_id][1] += unit_cost * quantity
+
+    with transaction.atomic():
+        StockBatch.objects.bulk_create(batches)
+        # Sorted so concurrent imports touch stock rows in the same order
+        ledger.post_movements(
+            [(product_id, warehouse, quantity) for (product_id, warehouse), quantity in sorted(stock_deltas.items())],
+            'receipt', reference, user
+        )
+        for product_id, (units, value) in sorted(open_totals.items()):
+            costing.adjust_open_totals(product_id, units, value, reprice=False)
+
+    return open_totals.keys()
+
+
+def import_receipts(stream, fmt, chunk_size=1000, reference='import', user=None):
+    """
+    Stream purchase receipts from a CSV or JSONL text stream into stock.
+
+    Rows are validated against a preloaded SKU map and written chunk by chunk:
+    batches with bulk_create, stock as one delta per (product, warehouse), and
+    average cost recomputed once per affected product at the end. Invalid rows
+    are skipped and listed in the report.
+    """
+    report = ImportReport()
+    started = time.perf_counter()
+
+    sku_map = dict(Product.objects.values_list('sku', 'id'))
+    warehouses = {code for code, _ in Stock.WAREHOUSE_CHOICES}
+    affected = set()
+
+    chunk = []
+    for line_number, record in iter_records(stream, fmt):
+        report.rows += 1
+        try:
+            chunk.append(parse_receipt(record, sku_map, warehouses))
+        except ValueError as e:
+            report.errors.append((line_number, str(e)))
+            continue
+
+        if len(chunk) >= chunk_size:
+            affected.update(_import_chunk(chunk, reference, user))
+            report.imported += len(chunk)
+            chunk = []
+
+    if chunk:
+        affected.update(_import_chunk(chunk, reference, user))
+        report.imported += len(chunk)
+
+    costing.reprice(affected)
+
+    report.elapsed = time.perf_counter() - started
+    return report
@@ -0,0 +1,69 @@
+from .models import StockMovement
+from . import services
+
+
+def post_movement(product, warehouse, quantity, kind, reference='', user=None):
+    """
+    Apply a signed quantity change to a warehouse and journal it.
+
+    The quantity is changed through services.apply_delta, whose UPDATE holds
+    the Stock row until the transaction ends, so the running balance written to
+    the journal always matches the projected quantity. Must be called inside a
+    transaction. Raises services.InsufficientStock if the warehouse would go
+    negative. Returns the new balance.
+    """
+    balance = services.apply_delta(product, warehouse, quantity)
+
+    StockMovement.objects.create(
+        product=product,
+        warehouse=warehouse,
+        kind=kind,
+        quantity=quantity,
+        balance=balance,
+        reference=reference,
+        created_by=user
+    )
+    return balance
+
+
+def post_movements(changes, kind, reference='', user=None):
+    """
+    Apply many (product_id, warehouse, quantity) changes and journal them in bulk.
+
+    Stock is changed through services.apply_deltas, which checks and locks every
+    affected row before updating them together, so either all changes apply or
+    InsufficientStock is raised. The journal rows are inserted with a single
+    bulk_create. Must be called inside a transaction.
+    """
+    changes = list(changes)
+    quantities = services.apply_deltas(changes)
+
+    # Rewind each row to its starting quantity so repeated rows journal a running balance
+    balances = dict(quantities)
+    for product_id, warehouse, quantity in changes:
+        balances[(product_id, warehouse)] -= quantity
+
+    movements = []
+    for product_id, warehouse, quantity in changes:
+        balances[(product_id, warehouse)] += quantity
+        movements.append(StockMovement(
+            product_id=product_id,
+            warehouse=warehouse,
+            kind=kind,
+            quantity=quantity,
+            balance=balances[(product_id, warehouse)],
+            reference=reference,
+            created_by=user
+        ))
+    StockMovement.objects.bulk_create(movements)
+    return movements
+
+
+def quantity_at(product, warehouse, when):
+    """Quantity of a product in a warehouse as of the given datetime."""
+    balance = StockMovement.objects.filter(
+        product=product,
+        warehouse=warehouse,
+        created_at__lte=when
+    ).order_by('-created_at', '-id').values_list('balance', flat=True).first()
+    return balance or 0
@@ -0,0 +1,114 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.synthetic import ADJECTIVES, BRANDS, NOUNS
+from inventory.models import Product
+from inventory import search
+
+
+SKU_PREFIXES = ['ELC', 'FUR', 'OFF', 'CLO', 'FOD', 'OTH']
+
+
+def _typo(word, rng):
+    i = rng.randrange(1, len(word))
+    return word[:i] + rng.choice('abcdefghijklmnopqrstuvwxyz') + word[i + 1:]
+
+
+class Command(BaseCommand):
+    help = 'Seed synthetic products and measure product search latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=500000, help='Catalogue size to benchmark against')
+        parser.add_argument('--queries', type=int, default=500, help='Number of search queries to time')
+        parser.add_argument('--seed', type=int, default=7)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded products for the next run')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        try:
+            self._benchmark(rng, options)
+        finally:
+            if not options['keep']:
+                self._cleanup()
+
+    def _benchmark(self, rng, options):
+        seeded = self._seed(options['products'], rng)
+        # Queries are typed in lower case, like users do
+        nouns = [noun.lower() for noun in NOUNS]
+        words = nouns + [adjective.lower() for adjective in ADJECTIVES]
+
+        queries = []
+        for _ in range(options['queries']):
+            kind = rng.random()
+            if kind < 0.35:
+                queries.append(rng.choice(nouns)[:rng.randint(3, 6)])
+            elif kind < 0.65:
+                queries.append(f'{rng.choice(BRANDS).lower()} {rng.choice(nouns)[:4]}')
+            elif kind < 0.85:
+                queries.append(_typo(rng.choice(words), rng))
+            else:
+                n = rng.randrange(max(seeded, 1))
+                queries.append(f'BNC-{SKU_PREFIXES[n % len(SKU_PREFIXES)]}-{n:07d}')
+
+        # Warm up connection and page cache
+        for query in queries[:20]:
+            search.search_products(query)
+
+        timings = []
+        empty = 0
+        for query in queries:
+            started = time.perf_counter()
+            results = search.search_products(query)
+            timings.append((time.perf_counter() - started) * 1000)
+            empty += not results
+
+        timings.sort()
+        p50 = statistics.median(timings)
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        self.stdout.write(f'Catalogue: {Product.objects.count()} products, backend: {"FTS5" if search.uses_fts() else "search term table"}')
+        self.stdout.write(f'Queries: {len(timings)} ({empty} without results)')
+        self.stdout.write(f'Latency ms: p50 {p50:.2f}, p95 {p95:.2f}, p99 {p99:.2f}, max {timings[-1]:.2f}')
+        if p95 < 10:
+            self.stdout.write(self.style.SUCCESS('✓ p95 under 10 ms'))
+        else:
+            self.stdout.write(self.style.WARNING('p95 is above 10 ms'))
+
+    def _cleanup(self):
+        """Delete the benchmark products so they never linger in a real catalogue."""
+        with transaction.atomic():
+            deleted, _ = Product.objects.filter(sku__startswith='BNC-').delete()
+            search.rebuild_index()
+        self.stdout.write(f'Removed {deleted} benchmark rows')
+
+    def _seed(self, target, rng, chunk_size=10000):
+        """Top up benchmark products (SKU prefix BNC-) to the target count."""
+        existing = Product.objects.filter(sku__startswith='BNC-').count()
+        if existing >= target:
+            return existing
+
+        started = time.perf_counter()
+        categories = [code for code, _ in Product.CATEGORY_CHOICES]
+        for start in range(existing, target, chunk_size):
+            batch = []
+            for n in range(start, min(start + chunk_size, target)):
+                batch.append(Product(
+                    name=f'{rng.choice(BRANDS)} {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {rng.randint(1, 999)}',
+                    sku=f'BNC-{SKU_PREFIXES[n % len(SKU_PREFIXES)]}-{n:07d}',
+                    category=rng.choice(categories),
+                    price=Decimal(rng.randint(100, 100000)) / 100,
+                    length=Decimal('10.00'),
+                    width=Decimal('10.00'),
+                    height=Decimal('10.00'),
+                ))
+            with transaction.atomic():
+                Product.objects.bulk_create(batch)
+
+        # bulk_create skips the save signals, so index in one pass
+        with transaction.atomic():
+            search.rebuild_index()
+        self.stdout.write(f'Seeded {target - existing} products in {time.perf_counter() - started:.1f}s')
+        return target
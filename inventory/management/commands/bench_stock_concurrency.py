@@ -0,0 +1,94 @@
+import random
+import threading
+import time
+import uuid
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Sum
+from inventory.models import Product, Stock, StockMovement
+from inventory import ledger, services
+
+
+class Command(BaseCommand):
+    help = 'Fire concurrent stock-ins and adjustments at one product and verify no update is lost'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Number of concurrent writers')
+        parser.add_argument('--ops', type=int, default=200, help='Stock changes per writer')
+        parser.add_argument('--warehouse', default='main', choices=[code for code, _ in Stock.WAREHOUSE_CHOICES])
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark product afterwards')
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        ops = options['ops']
+        warehouse = options['warehouse']
+
+        product = Product.objects.create(
+            name='Concurrency Benchmark',
+            sku=f'BENCH-{uuid.uuid4().hex[:12]}',
+            price=Decimal('1.00'),
+            length=Decimal('1.00'),
+            width=Decimal('1.00'),
+            height=Decimal('1.00'),
+        )
+
+        applied = [0] * threads
+        rejected = [0] * threads
+        errors = []
+        start_gate = threading.Barrier(threads)
+
+        def worker(index):
+            rng = random.Random(options['seed'] + index)
+            try:
+                start_gate.wait()
+                for _ in range(ops):
+                    # Mostly stock-ins, with removals that may run the warehouse dry
+                    if rng.random() < 0.6:
+                        delta, kind = rng.randint(1, 10), 'receipt'
+                    else:
+                        delta, kind = -rng.randint(1, 10), 'adjustment'
+                    try:
+                        with transaction.atomic():
+                            ledger.post_movement(product, warehouse, delta, kind, 'benchmark')
+                    except services.InsufficientStock:
+                        rejected[index] += 1
+                    else:
+                        applied[index] += delta
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        started = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        try:
+            if errors:
+                raise CommandError(f'{len(errors)} writers failed: {errors[0]!r}')
+
+            expected = sum(applied)
+            quantity = services.available_quantity(product, warehouse)
+            movements = StockMovement.objects.filter(product=product, warehouse=warehouse)
+            journaled = movements.aggregate(total=Sum('quantity'))['total'] or 0
+            last_balance = movements.order_by('-created_at', '-id').values_list('balance', flat=True).first() or 0
+
+            total_ops = threads * ops
+            self.stdout.write(f'Writers: {threads}, operations: {total_ops}, rejected for insufficient stock: {sum(rejected)}')
+            self.stdout.write(f'Elapsed: {elapsed:.2f}s, throughput: {total_ops / elapsed:.0f} ops/s')
+            self.stdout.write(f'Expected quantity: {expected}, stock: {quantity}, journal sum: {journaled}, last balance: {last_balance}')
+
+            if not (quantity == expected == journaled == last_balance):
+                raise CommandError('Lost update detected: stock, journal and applied deltas disagree')
+            if quantity < 0:
+                raise CommandError('Stock went negative')
+            self.stdout.write(self.style.SUCCESS('✓ No lost updates'))
+        finally:
+            if not options['keep']:
+                product.delete()
@@ -0,0 +1,31 @@
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from inventory.importers import RECEIPT_FIELDS, import_receipts
+
+
+class Command(BaseCommand):
+    help = f'Import purchase receipts from a CSV or JSONL file (fields: {", ".join(RECEIPT_FIELDS)})'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSONL file to import')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows written per transaction')
+        parser.add_argument('--show-errors', type=int, default=20, help='Number of rejected rows to print')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'File not found: {path}')
+
+        fmt = options['format'] or ('jsonl' if path.suffix.lower() in ('.jsonl', '.ndjson') else 'csv')
+
+        with path.open(newline='', encoding='utf-8') as stream:
+            report = import_receipts(stream, fmt, options['chunk_size'], reference=f'import:{path.name}'[:50])
+
+        for line_number, message in report.errors[:options['show_errors']]:
+            self.stdout.write(self.style.WARNING(f'  line {line_number}: {message}'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Imported {report.imported} of {report.rows} rows ({report.rejected} rejected) '
+            f'in {report.elapsed:.2f}s, {report.rows_per_sec:.0f} rows/sec'
+        ))
@@ -0,0 +1,48 @@
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from inventory.models import Product, StockBatch
+
+
+class Command(BaseCommand):
+    help = 'Rebuild product open-batch totals and average cost from StockBatch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Products written per bulk update of cost_price')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        open_batches = StockBatch.objects.filter(
+            product=OuterRef('pk'),
+            remaining_quantity__gt=0
+        ).order_by().values('product')
+        units = open_batches.annotate(total=Sum('remaining_quantity')).values('total')
+        value = open_batches.annotate(
+            total=Sum(F('remaining_quantity') * F('unit_cost'), output_field=DecimalField(max_digits=14, decimal_places=2))
+        ).values('total')
+
+        with transaction.atomic():
+            updated = Product.objects.update(
+                open_units=Coalesce(Subquery(units), 0),
+                open_value=Coalesce(Subquery(value), Value(Decimal('0.00')), output_field=DecimalField(max_digits=14, decimal_places=2))
+            )
+            self.stdout.write(f'Recomputed open totals for {updated} products')
+
+            # Derive the average cost for every product that still has open stock
+            batch = []
+            repriced = 0
+            for product in Product.objects.filter(open_units__gt=0).only('open_units', 'open_value').iterator(chunk_size=chunk_size):
+                product.cost_price = (product.open_value / product.open_units).quantize(Decimal('0.01'))
+                batch.append(product)
+                if len(batch) >= chunk_size:
+                    Product.objects.bulk_update(batch, ['cost_price'])
+                    repriced += len(batch)
+                    batch = []
+            if batch:
+                Product.objects.bulk_update(batch, ['cost_price'])
+                repriced += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Updated average cost for {repriced} products'))
@@ -0,0 +1,16 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from inventory import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the product search index from the product table'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            count = search.rebuild_index()
+        elapsed = time.perf_counter() - started
+        backend = 'FTS5' if search.uses_fts() else 'search term table'
+        self.stdout.write(self.style.SUCCESS(f'✓ Indexed {count} products ({backend}) in {elapsed:.2f}s'))
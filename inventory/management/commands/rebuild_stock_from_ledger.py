@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Subquery
+from inventory.models import Stock, StockMovement
+from inventory.signals import stock_levels_changed
+
+
+class Command(BaseCommand):
+    help = 'Rebuild Stock quantities from the latest running balance in the movement journal'
+
+    def handle(self, *args, **options):
+        movements = StockMovement.objects.filter(
+            product=OuterRef('product'),
+            warehouse=OuterRef('warehouse')
+        ).order_by('-created_at', '-id')
+        latest_balance = Subquery(movements.values('balance')[:1])
+
+        # Rows that were never journaled are left alone
+        journaled = Stock.objects.filter(Exists(movements))
+
+        with transaction.atomic():
+            drifted = journaled.exclude(quantity=latest_balance).count()
+            journaled.update(quantity=latest_balance)
+            stock_levels_changed.send(sender=Stock)
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt stock levels ({drifted} rows corrected)'))
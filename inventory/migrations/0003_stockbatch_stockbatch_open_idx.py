@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-17 03:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_product_cost_price_product_valuation_method_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stockbatch',
+            index=models.Index(condition=models.Q(('remaining_quantity__gt', 0)), fields=['product', 'received_date', 'created_at'], name='stockbatch_open_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.9 on 2026-10-17 03:20
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_stockbatch_stockbatch_open_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='open_units',
+            field=models.IntegerField(default=0, help_text='Units remaining across open batches'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='open_value',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Cost value of units remaining across open batches', max_digits=14),
+        ),
+    ]
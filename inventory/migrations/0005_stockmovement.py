@@ -0,0 +1,56 @@
+# Generated by Django 5.2.9 on 2026-10-17 03:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def open_existing_balances(apps, schema_editor):
+    """Seed the journal with the current quantity of every existing stock row."""
+    Stock = apps.get_model('inventory', 'Stock')
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+    StockMovement.objects.bulk_create(
+        (
+            StockMovement(
+                product_id=stock.product_id,
+                warehouse=stock.warehouse,
+                kind='opening',
+                quantity=stock.quantity,
+                balance=stock.quantity,
+                created_at=stock.last_updated,
+            )
+            for stock in Stock.objects.exclude(quantity=0).iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_product_open_totals'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('warehouse', models.CharField(choices=[('main', 'Main Warehouse'), ('north', 'North Branch'), ('south', 'South Branch'), ('east', 'East Branch'), ('west', 'West Branch')], max_length=50)),
+                ('kind', models.CharField(choices=[('opening', 'Opening Balance'), ('receipt', 'Stock In'), ('adjustment', 'Adjustment'), ('transfer_out', 'Transfer Out'), ('transfer_in', 'Transfer In'), ('sale', 'Sale'), ('sale_return', 'Sale Reversal')], max_length=20)),
+                ('quantity', models.IntegerField(help_text='Signed change in quantity')),
+                ('balance', models.IntegerField(help_text='Quantity in the warehouse after this movement')),
+                ('reference', models.CharField(blank=True, help_text='Source document, e.g. transfer:12', max_length=50)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='inventory.product')),
+            ],
+            options={
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['product', 'warehouse', 'created_at', 'id'], name='stockmovement_balance_idx')],
+            },
+        ),
+        migrations.RunPython(open_existing_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.9 on 2026-10-17 03:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+import re
+
+
+def create_search_index(apps, schema_editor):
+    """Create the FTS5 name index on SQLite, or fill ProductSearchTerm elsewhere."""
+    Product = apps.get_model('inventory', 'Product')
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE inventory_product_fts USING fts5(name, prefix='2 3', tokenize='unicode61')"
+        )
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE inventory_product_fts_vocab USING fts5vocab(inventory_product_fts, 'row')"
+        )
+        schema_editor.execute(
+            "INSERT INTO inventory_product_fts (rowid, name) SELECT id, name FROM inventory_product"
+        )
+        return
+
+    ProductSearchTerm = apps.get_model('inventory', 'ProductSearchTerm')
+    terms = []
+    for product_id, name in Product.objects.values_list('id', 'name').iterator():
+        words = {word.lower() for word in re.findall(r'\w+', name)}
+        terms.extend(ProductSearchTerm(product_id=product_id, term=word[:100]) for word in words)
+    ProductSearchTerm.objects.bulk_create(terms, batch_size=1000)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS inventory_product_fts_vocab')
+        schema_editor.execute('DROP TABLE IF EXISTS inventory_product_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(db_index=True, max_length=100)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='inventory.product')),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.9 on 2026-10-17 03:34
+
+import django.db.models.expressions
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_product_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='volume_m3',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('length'), '*', models.F('width')), '*', models.F('height')), '*', models.Value(Decimal('0.000001'))), output_field=models.DecimalField(decimal_places=6, max_digits=24), verbose_name='Volume (m³)'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['volume_m3', 'id'], name='product_volume_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.9 on 2026-10-17 03:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_product_volume'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stock',
+            name='reorder_level',
+            field=models.PositiveIntegerField(default=10, help_text='Flag as low stock below this quantity'),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(condition=models.Q(('quantity__lt', models.F('reorder_level'))), fields=['warehouse', 'product'], name='stock_low_idx'),
+        ),
+    ]
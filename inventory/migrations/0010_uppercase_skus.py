@@ -0,0 +1,27 @@
+from django.db import migrations
+from django.db.models.functions import Upper
+
+
+def uppercase_skus(apps, schema_editor):
+    """Upper-case stored SKUs so prefix search finds them; SKUs that would collide are left alone."""
+    Product = apps.get_model('inventory', 'Product')
+    taken = set(Product.objects.values_list('sku', flat=True))
+    renamed = []
+    for product in Product.objects.exclude(sku=Upper('sku')).only('sku').iterator():
+        sku = product.sku.upper()
+        if sku not in taken:
+            taken.add(sku)
+            product.sku = sku
+            renamed.append(product)
+    Product.objects.bulk_update(renamed, ['sku'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_stock_reorder_level'),
+    ]
+
+    operations = [
+        migrations.RunPython(uppercase_skus, migrations.RunPython.noop),
+    ]
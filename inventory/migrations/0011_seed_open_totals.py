@@ -0,0 +1,33 @@
+from decimal import Decimal
+from django.db import migrations
+
+
+def seed_open_totals(apps, schema_editor):
+    """Fill open_units, open_value and cost_price from the open batches of existing products."""
+    Product = apps.get_model('inventory', 'Product')
+    StockBatch = apps.get_model('inventory', 'StockBatch')
+    totals = {}
+    batches = StockBatch.objects.filter(remaining_quantity__gt=0).values_list('product_id', 'remaining_quantity', 'unit_cost')
+    for product_id, remaining, unit_cost in batches.iterator(chunk_size=1000):
+        units, value = totals.get(product_id, (0, Decimal('0.00')))
+        totals[product_id] = (units + remaining, value + remaining * unit_cost)
+    products = []
+    for product in Product.objects.only('open_units', 'open_value', 'cost_price').iterator(chunk_size=1000):
+        units, value = totals.get(product.pk, (0, Decimal('0.00')))
+        product.open_units = units
+        product.open_value = value.quantize(Decimal('0.01'))
+        if units:
+            product.cost_price = (product.open_value / units).quantize(Decimal('0.01'))
+        products.append(product)
+    Product.objects.bulk_update(products, ['open_units', 'open_value', 'cost_price'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_uppercase_skus'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_open_totals, migrations.RunPython.noop),
+    ]
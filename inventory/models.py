@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from decimal import Decimal
 
 
@@ -25,28 +26,53 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2, help_text='Selling Price')
     cost_price = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'), help_text='Average Cost Price')
     valuation_method = models.CharField(max_length=4, choices=VALUATION_CHOICES, default='fifo')
+    open_units = models.IntegerField(default=0, help_text='Units remaining across open batches')
+    open_value = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'), help_text='Cost value of units remaining across open batches')
     
     length = models.DecimalField(max_digits=10, decimal_places=2, help_text='Length in cm')
     width = models.DecimalField(max_digits=10, decimal_places=2, help_text='Width in cm')
     height = models.DecimalField(max_digits=10, decimal_places=2, help_text='Height in cm')
+    # Computed by the database so lists and reports can filter, sort and sum by volume
+    volume_m3 = models.GeneratedField(
+        # cm³ to m³ as a multiplication: SQLite would cast a 1000000 divisor to integer and truncate
+        expression=models.F('length') * models.F('width') * models.F('height') * models.Value(Decimal('0.000001')),
+        output_field=models.DecimalField(max_digits=24, decimal_places=6),
+        db_persist=True,
+        verbose_name='Volume (m³)'
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination: each index matches a list ordering plus the pk tie-breaker
+            models.Index(fields=['-created_at', '-id'], name='product_created_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], name='product_category_idx'),
+            models.Index(fields=['name', 'id'], name='product_name_idx'),
+            models.Index(fields=['price', 'id'], name='product_price_idx'),
+            models.Index(fields=['cost_price', 'id'], name='product_cost_price_idx'),
+            models.Index(fields=['volume_m3', 'id'], name='product_volume_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.sku})"
     
     @property
     def volume(self):
-        """Calculate volume in cubic meters (m³)."""
-        # Convert cm to m: cm / 100
-        l_m = self.length / Decimal('100.00')
-        w_m = self.width / Decimal('100.00')
-        h_m = self.height / Decimal('100.00')
-        return l_m * w_m * h_m
+        """Volume in cubic meters (m³), from the current dimensions; queries use volume_m3."""
+        # Same expression as volume_m3, which is only refreshed when the row is reloaded
+        return self.length * self.width * self.height * Decimal('0.000001')
+
+
+class ProductSearchTerm(models.Model):
+    """Search index entry for backends without SQLite FTS5: one row per word of a product name."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='search_terms')
+    term = models.CharField(max_length=100, db_index=True)
+    
+    def __str__(self):
+        return f"{self.term} -> {self.product_id}"
 
 
 class StockBatch(models.Model):
@@ -60,6 +86,14 @@ class StockBatch(models.Model):
     
     class Meta:
         ordering = ['received_date', 'created_at']
+        indexes = [
+            # Only open batches are ever consumed, so keep the index to those rows
+            models.Index(
+                fields=['product', 'received_date', 'created_at'],
+                condition=models.Q(remaining_quantity__gt=0),
+                name='stockbatch_open_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.product.sku} - {self.received_date} (Qty: {self.remaining_quantity})"
@@ -75,22 +109,71 @@ class Stock(models.Model):
         ('west', 'West Branch'),
     ]
     
+    DEFAULT_REORDER_LEVEL = 10
+    
+    # Rows below their reorder point; also the condition of the partial low-stock index
+    LOW_STOCK = models.Q(quantity__lt=models.F('reorder_level'))
+    
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stocks')
     warehouse = models.CharField(max_length=50, choices=WAREHOUSE_CHOICES)
     quantity = models.IntegerField(default=0)
+    reorder_level = models.PositiveIntegerField(default=DEFAULT_REORDER_LEVEL, help_text='Flag as low stock below this quantity')
     last_updated = models.DateTimeField(auto_now=True)
     
     class Meta:
         unique_together = ['product', 'warehouse']
         ordering = ['warehouse', 'product']
+        indexes = [
+            # Only low rows are indexed, so the low-stock count and list never touch healthy stock
+            models.Index(fields=['warehouse', 'product'], condition=models.Q(quantity__lt=models.F('reorder_level')), name='stock_low_idx'),
+        ]
     
     def __str__(self):
         return f"{self.product.name} - {self.warehouse}: {self.quantity}"
     
     @property
     def is_low_stock(self):
-        """Check if stock is below minimum threshold (10 units)."""
-        return self.quantity < 10
+        """Check if stock is below its reorder level."""
+        return self.quantity < self.reorder_level
+
+
+class StockMovement(models.Model):
+    """Append-only journal of stock changes with the running balance per warehouse."""
+    KIND_CHOICES = [
+        ('opening', 'Opening Balance'),
+        ('receipt', 'Stock In'),
+        ('adjustment', 'Adjustment'),
+        ('transfer_out', 'Transfer Out'),
+        ('transfer_in', 'Transfer In'),
+        ('sale', 'Sale'),
+        ('sale_return', 'Sale Reversal'),
+    ]
+    
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='movements')
+    warehouse = models.CharField(max_length=50, choices=Stock.WAREHOUSE_CHOICES)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    quantity = models.IntegerField(help_text='Signed change in quantity')
+    balance = models.IntegerField(help_text='Quantity in the warehouse after this movement')
+    reference = models.CharField(max_length=50, blank=True, help_text='Source document, e.g. transfer:12')
+    created_at = models.DateTimeField(default=timezone.now)
+    created_by = models.ForeignKey('auth.User', on_delete=models.SET_NULL, null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['product', 'warehouse', 'created_at', 'id'], name='stockmovement_balance_idx'),
+            # Movements of one source document, e.g. what an invoice has taken
+            models.Index(fields=['reference'], name='stockmovement_reference_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.product.sku} @ {self.warehouse}: {self.quantity:+d} -> {self.balance}"
+    
+    def save(self, *args, **kwargs):
+        """Movements are never rewritten; corrections are posted as new movements."""
+        if self.pk is not None:
+            raise ValueError('Stock movements are append-only.')
+        super().save(*args, **kwargs)
 
 
 class StockTransfer(models.Model):
@@ -119,6 +202,13 @@ class StockTransfer(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='transfer_created_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='transfer_status_idx'),
+            models.Index(fields=['from_warehouse', '-created_at', '-id'], name='transfer_from_idx'),
+            models.Index(fields=['to_warehouse', '-created_at', '-id'], name='transfer_to_idx'),
+            models.Index(fields=['quantity', 'id'], name='transfer_quantity_idx'),
+        ]
     
     def __str__(self):
         return f"Transfer #{self.id}: {self.product.name} ({self.from_warehouse} → {self.to_warehouse}) - {self.status}"
@@ -0,0 +1,86 @@
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from .models import Product, Stock
+
+
+UTILISATION_CACHE_KEY = 'inventory:warehouse_utilisation'
+
+# Safety net only; writes invalidate the cached report as they commit
+UTILISATION_CACHE_TIMEOUT = 60 * 60
+
+VOLUME_PLACES = Decimal('0.001')
+
+
+def warehouse_capacity(warehouse):
+    """Configured capacity of a warehouse in m³, or None if not set."""
+    capacity = getattr(settings, 'WAREHOUSE_CAPACITY_M3', {}).get(warehouse)
+    return Decimal(str(capacity)) if capacity else None
+
+
+def _compute_utilisation():
+    # One grouped aggregate over stock joined to the stored product volume
+    rows = Stock.objects.filter(quantity__gt=0).values('warehouse', 'product__category').annotate(
+        units=Sum('quantity'),
+        volume=Sum(F('quantity') * F('product__volume_m3'))
+    ).order_by()
+
+    by_warehouse = {}
+    for row in rows:
+        by_warehouse.setdefault(row['warehouse'], []).append(row)
+
+    categories = dict(Product.CATEGORY_CHOICES)
+    warehouses = []
+    for code, name in Stock.WAREHOUSE_CHOICES:
+        breakdown = sorted(
+            (
+                {
+                    'category': row['product__category'],
+                    'name': categories.get(row['product__category'], row['product__category']),
+                    'units': row['units'],
+                    'used_m3': (row['volume'] or Decimal('0')).quantize(VOLUME_PLACES),
+                }
+                for row in by_warehouse.get(code, [])
+            ),
+            key=lambda category: category['used_m3'],
+            reverse=True
+        )
+        used = sum((category['used_m3'] for category in breakdown), Decimal('0.000'))
+        capacity = warehouse_capacity(code)
+        warehouses.append({
+            'warehouse': code,
+            'name': name,
+            'units': sum(category['units'] for category in breakdown),
+            'used_m3': used,
+            'capacity_m3': capacity,
+            'percent_full': (used * 100 / capacity).quantize(Decimal('0.1')) if capacity else None,
+            'categories': breakdown,
+        })
+
+    return {
+        'warehouses': warehouses,
+        'total_m3': sum((warehouse['used_m3'] for warehouse in warehouses), Decimal('0.000')),
+        'generated_at': timezone.now(),
+    }
+
+
+def warehouse_utilisation():
+    """
+    Volume of stock held per warehouse and category, in m³.
+
+    Computed as a single grouped aggregate and cached until stock or
+    products change.
+    """
+    report = cache.get(UTILISATION_CACHE_KEY)
+    if report is None:
+        report = _compute_utilisation()
+        cache.set(UTILISATION_CACHE_KEY, report, UTILISATION_CACHE_TIMEOUT)
+    return report
+
+
+def invalidate_utilisation():
+    """Drop the cached utilisation report once the current transaction commits."""
+    transaction.on_commit(lambda: cache.delete(UTILISATION_CACHE_KEY))
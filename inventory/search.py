@@ -0,0 +1,227 @@
+import re
+from django.db import connection
+from django.db.models import Count
+from .models import Product, ProductSearchTerm
+
+
+FTS_TABLE = 'inventory_product_fts'
+FTS_VOCAB_TABLE = 'inventory_product_fts_vocab'
+
+# Most matches returned per query; the table backend also bounds its candidate set by it
+MAX_CANDIDATES = 200
+
+# Typo candidates considered per query word
+MAX_FUZZY_TERMS = 10
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    return [token.lower() for token in _TOKEN_RE.findall(text or '')]
+
+
+def uses_fts():
+    """SQLite uses the FTS5 name index created by migration; other backends use ProductSearchTerm."""
+    return connection.vendor == 'sqlite'
+
+
+def _max_distance(token):
+    if len(token) < 4:
+        return 0
+    return 1 if len(token) < 8 else 2
+
+
+def edit_distance(a, b, limit):
+    """
+    Optimal string alignment distance between a and b, or limit + 1 once it exceeds limit.
+
+    Like Levenshtein, but swapping two adjacent letters ('chiar') is one edit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            cost = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            )
+            if before is not None and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def _fuzzy_terms(token, vocabulary):
+    """Indexed terms within edit distance of token, sharing its first letter, to tolerate typos."""
+    limit = _max_distance(token)
+    if not limit or vocabulary(token, 1):
+        return []
+    matches = []
+    for term in vocabulary(token[0]):
+        if term != token and not term.startswith(token) and edit_distance(token, term, limit) <= limit:
+            matches.append(term)
+            if len(matches) >= MAX_FUZZY_TERMS:
+                break
+    return matches
+
+
+def _next_prefix(prefix):
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def index_product(product):
+    """Add or refresh one product in the search index."""
+    if uses_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [product.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name) VALUES (%s, %s)',
+                [product.pk, product.name]
+            )
+        return
+
+    ProductSearchTerm.objects.filter(product_id=product.pk).delete()
+    ProductSearchTerm.objects.bulk_create(_terms_for(product.pk, product.name))
+
+
+def remove_product(product_id):
+    """Drop one product from the search index."""
+    if uses_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [product_id])
+        return
+    ProductSearchTerm.objects.filter(product_id=product_id).delete()
+
+
+def _terms_for(product_id, name):
+    return [ProductSearchTerm(product_id=product_id, term=term[:100]) for term in set(tokenize(name))]
+
+
+def rebuild_index(chunk_size=5000):
+    """Rebuild the whole search index from the product table. Returns the number of products."""
+    if uses_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name) '
+                f'SELECT id, name FROM {Product._meta.db_table}'
+            )
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+        return Product.objects.count()
+
+    ProductSearchTerm.objects.all().delete()
+    count = 0
+    pending = []
+    for product_id, name in Product.objects.values_list('id', 'name').iterator(chunk_size=chunk_size):
+        pending.extend(_terms_for(product_id, name))
+        count += 1
+        if len(pending) >= chunk_size:
+            ProductSearchTerm.objects.bulk_create(pending)
+            pending = []
+    ProductSearchTerm.objects.bulk_create(pending)
+    return count
+
+
+def _fts_vocabulary(prefix, limit=-1):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT term FROM {FTS_VOCAB_TABLE} WHERE term >= %s AND term < %s LIMIT %s',
+            [prefix, _next_prefix(prefix), limit]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _fts_match(groups, limit):
+    # Every match is scored, so the best ones win however many there are;
+    # bm25() directly is cheaper than the configurable rank column
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY bm25({FTS_TABLE}) LIMIT %s',
+            [' AND '.join(groups), min(limit, MAX_CANDIDATES)]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _fts_search(tokens, limit):
+    ids = _fts_match([f'"{token}"*' for token in tokens], limit)
+    if ids:
+        return ids
+
+    # Nothing matched as typed; widen each word with near-miss terms from the index
+    groups = []
+    for token in tokens:
+        alternatives = [f'"{token}"*'] + [f'"{term}"' for term in _fuzzy_terms(token, _fts_vocabulary)]
+        groups.append('(' + ' OR '.join(alternatives) + ')')
+    return _fts_match(groups, limit)
+
+
+def _table_vocabulary(prefix, limit=None):
+    terms = ProductSearchTerm.objects.filter(
+        term__gte=prefix, term__lt=_next_prefix(prefix)
+    ).values_list('term', flat=True).distinct()
+    return list(terms[:limit] if limit else terms)
+
+
+def _table_search(tokens, limit):
+    matching = None
+    hits = ProductSearchTerm.objects.none()
+    for token in tokens:
+        fuzzy = _fuzzy_terms(token, _table_vocabulary)
+        token_hits = ProductSearchTerm.objects.filter(term__startswith=token)
+        if fuzzy:
+            token_hits = token_hits | ProductSearchTerm.objects.filter(term__in=fuzzy)
+        ids = set(token_hits.values_list('product_id', flat=True)[:MAX_CANDIDATES])
+        matching = ids if matching is None else matching & ids
+        hits = hits | token_hits
+
+    if not matching:
+        return []
+    ranked = hits.filter(product_id__in=matching).values('product_id').annotate(
+        score=Count('id')
+    ).order_by('-score', 'product_id')[:limit]
+    return [row['product_id'] for row in ranked]
+
+
+def _sku_matches(query, limit):
+    """
+    Products whose SKU equals or starts with query, via a range scan on the unique SKU index.
+
+    SKUs are stored upper-case (ProductForm and migration 0010 normalise
+    them), so the upper-cased query matches whatever case it was typed in.
+    """
+    prefix = query.upper()
+    return list(
+        Product.objects.filter(
+            sku__gte=prefix, sku__lt=_next_prefix(prefix)
+        ).order_by('sku').values_list('id', flat=True)[:limit]
+    )
+
+
+def search_products(query, limit=25):
+    """
+    Products matching query, best first.
+
+    SKUs match exactly or by prefix, in any case, and rank first. Every other query word
+    matches a prefix of a word in the product name, or an indexed name word a
+    small edit distance away, ranked by relevance.
+    """
+    query = (query or '').strip()
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+
+    # SKUs never contain spaces, so multi-word queries skip the lookup
+    ids = _sku_matches(query, limit) if ' ' not in query else []
+    ranked = _fts_search(tokens, limit) if uses_fts() else _table_search(tokens, limit)
+    ids += [product_id for product_id in ranked if product_id not in ids]
+    ids = list(dict.fromkeys(ids))[:limit]
+
+    products = Product.objects.in_bulk(ids)
+    return [products[product_id] for product_id in ids if product_id in products]
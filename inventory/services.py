@@ -0,0 +1,110 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.utils import timezone
+from .models import Product, Stock
+from .signals import stock_levels_changed
+
+
+class InsufficientStock(Exception):
+    """Raised when a stock change would take a warehouse below zero."""
+
+    def __init__(self, product, warehouse, available, requested):
+        self.product = product
+        self.warehouse = warehouse
+        self.available = available
+        self.requested = requested
+        warehouse_name = dict(Stock.WAREHOUSE_CHOICES).get(warehouse, warehouse)
+        super().__init__(f'Insufficient stock of {product} in {warehouse_name}. Available: {available}')
+
+
+def available_quantity(product, warehouse, lock=False):
+    """Current quantity of a product in a warehouse, optionally locking the row."""
+    stocks = Stock.objects.filter(product=product, warehouse=warehouse)
+    if lock:
+        stocks = stocks.select_for_update()
+    return stocks.values_list('quantity', flat=True).first() or 0
+
+
+def apply_delta(product, warehouse, delta):
+    """
+    Atomically add delta to a warehouse's quantity and return the new quantity.
+
+    The change is a single conditional UPDATE (quantity = quantity + delta
+    WHERE quantity + delta >= 0), so concurrent writers never lose updates.
+    Raises InsufficientStock instead of letting the quantity go negative.
+    product may be a Product or its primary key.
+    """
+    product_id = getattr(product, 'pk', product)
+    stocks = Stock.objects.filter(product_id=product_id, warehouse=warehouse)
+
+    updated = stocks.filter(quantity__gte=-delta).update(
+        quantity=F('quantity') + delta,
+        last_updated=timezone.now()
+    )
+    if not updated:
+        if delta < 0:
+            raise InsufficientStock(product, warehouse, available_quantity(product, warehouse), -delta)
+        try:
+            with transaction.atomic():
+                Stock.objects.create(product_id=product_id, warehouse=warehouse, quantity=delta)
+        except IntegrityError:
+            # Another writer created the row first; apply on top of theirs
+            stocks.update(quantity=F('quantity') + delta, last_updated=timezone.now())
+
+    # Queryset updates bypass the Stock signals
+    stock_levels_changed.send(sender=Stock)
+    return stocks.values_list('quantity', flat=True).get()
+
+
+def apply_deltas(changes):
+    """
+    Apply many (product_id, warehouse, delta) changes at once and return the new quantities.
+
+    The affected Stock rows are read and locked in one query, always in
+    (product, warehouse) order so concurrent callers cannot deadlock, and every
+    change is checked before any is applied. Existing rows are then updated with
+    a single UPDATE; rows that do not exist yet fall back to apply_delta. Raises
+    InsufficientStock, changing nothing, if any warehouse would go negative.
+    Changes to the same row are merged. Must be called inside a transaction.
+    """
+    totals = {}
+    for product_id, warehouse, delta in changes:
+        totals[(product_id, warehouse)] = totals.get((product_id, warehouse), 0) + delta
+    keys = sorted(totals)
+    if not keys:
+        return {}
+
+    match = Q()
+    for product_id, warehouse in keys:
+        match |= Q(product_id=product_id, warehouse=warehouse)
+    rows = {
+        (product_id, warehouse): (pk, quantity)
+        for pk, product_id, warehouse, quantity in Stock.objects.filter(match).select_for_update().order_by(
+            'product_id', 'warehouse'
+        ).values_list('pk', 'product_id', 'warehouse', 'quantity')
+    }
+
+    for key in keys:
+        available = rows[key][1] if key in rows else 0
+        if available + totals[key] < 0:
+            product = Product.objects.filter(pk=key[0]).first() or key[0]
+            raise InsufficientStock(product, key[1], available, -totals[key])
+
+    existing = [key for key in keys if key in rows and totals[key]]
+    if existing:
+        Stock.objects.filter(pk__in=[rows[key][0] for key in existing]).update(
+            quantity=F('quantity') + Case(
+                *[When(pk=rows[key][0], then=Value(totals[key])) for key in existing],
+                output_field=IntegerField()
+            ),
+            last_updated=timezone.now()
+        )
+        stock_levels_changed.send(sender=Stock)
+
+    quantities = {}
+    for key in keys:
+        if key in rows:
+            quantities[key] = rows[key][1] + totals[key]
+        else:
+            quantities[key] = apply_delta(key[0], key[1], totals[key])
+    return quantities
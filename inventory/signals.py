@@ -0,0 +1,29 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from .models import Product, Stock
+from . import reports, search
+
+
+# Sent after Stock quantities change through queryset updates, which skip post_save
+stock_levels_changed = Signal()
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    """Keep the product search index in sync with saved products."""
+    search.index_product(instance)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    search.remove_product(instance.pk)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Stock)
+@receiver(post_delete, sender=Stock)
+@receiver(stock_levels_changed)
+def invalidate_utilisation(sender, **kwargs):
+    """Dimensions, categories and stock rows all feed the utilisation report."""
+    reports.invalidate_utilisation()
@@ -1,3 +1,419 @@
-from django.test import TestCase
+import threading
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from .forms import ProductForm
+from .models import Product, Stock, StockBatch, StockMovement
+from . import costing, importers, ledger, reports, search, services
 
-# Create your tests here.
+
+def make_product(sku='TST-001', **fields):
+    fields = {'name': 'Test product', 'price': Decimal('10.00'), 'length': 1, 'width': 1, 'height': 1, **fields}
+    return Product.objects.create(sku=sku, **fields)
+
+
+class CostingTests(TestCase):
+    def receive(self, product, quantity, unit_cost, day):
+        batch = StockBatch.objects.create(
+            product=product, quantity=quantity, remaining_quantity=quantity,
+            unit_cost=Decimal(unit_cost), received_date=date(2026, 1, day)
+        )
+        costing.record_receipt(batch)
+        return batch
+
+    def consume(self, product, quantity):
+        product.refresh_from_db()
+        with transaction.atomic():
+            return costing.consume(product, quantity)
+
+    def test_fifo_charges_oldest_batches_first(self):
+        product = make_product(valuation_method='fifo')
+        old = self.receive(product, 10, '1.00', 1)
+        new = self.receive(product, 10, '3.00', 2)
+
+        cost, allocations = self.consume(product, 15)
+
+        self.assertEqual(cost, Decimal('25.00'))
+        self.assertEqual([(batch.pk, taken) for batch, taken, _ in allocations], [(old.pk, 10), (new.pk, 5)])
+        product.refresh_from_db()
+        self.assertEqual((product.open_units, product.open_value, product.cost_price), (5, Decimal('15.00'), Decimal('3.00')))
+
+    def test_lifo_charges_newest_batches_first_across_windows(self):
+        product = make_product(valuation_method='lifo')
+        batches = [self.receive(product, 1, f'{day}.00', day) for day in range(1, costing.BATCH_WINDOW + 6)]
+
+        cost, allocations = self.consume(product, costing.BATCH_WINDOW + 2)
+
+        taken = [batch.pk for batch, _, _ in allocations]
+        self.assertEqual(taken, [batch.pk for batch in reversed(batches)][:costing.BATCH_WINDOW + 2])
+        self.assertEqual(cost, sum(Decimal(day) for day in range(4, costing.BATCH_WINDOW + 6)))
+        self.assertEqual(list(product.batches.filter(remaining_quantity__gt=0).values_list('pk', flat=True).order_by('pk')),
+                         [batch.pk for batch in batches[:3]])
+
+    def test_avco_charges_the_average_and_keeps_it(self):
+        product = make_product(valuation_method='avco')
+        self.receive(product, 10, '1.00', 1)
+        self.receive(product, 10, '3.00', 2)
+
+        cost, allocations = self.consume(product, 10)
+
+        self.assertEqual(cost, Decimal('20.00'))
+        self.assertTrue(all(unit_cost == Decimal('2.00') for _, _, unit_cost in allocations))
+        product.refresh_from_db()
+        # COGS and the open value move by the same amount, so no value is created
+        self.assertEqual((product.open_units, product.open_value, product.cost_price), (10, Decimal('20.00'), Decimal('2.00')))
+
+    def test_avco_emptying_the_pool_takes_its_rounding_residue(self):
+        product = make_product(valuation_method='avco')
+        self.receive(product, 2, '1.00', 1)
+        self.receive(product, 1, '2.00', 2)
+
+        cost, _ = self.consume(product, 3)
+
+        self.assertEqual(cost, Decimal('4.00'))
+        product.refresh_from_db()
+        self.assertEqual((product.open_units, product.open_value), (0, Decimal('0.00')))
+
+    def test_restore_returns_units_and_value(self):
+        for method in ('fifo', 'avco'):
+            product = make_product(sku=f'TST-{method}', valuation_method=method)
+            self.receive(product, 10, '1.00', 1)
+            self.receive(product, 10, '3.00', 2)
+            _, allocations = self.consume(product, 12)
+
+            costing.restore(product, [(batch.pk, taken, unit_cost) for batch, taken, unit_cost in allocations])
+
+            product.refresh_from_db()
+            self.assertEqual((product.open_units, product.open_value, product.cost_price), (20, Decimal('40.00'), Decimal('2.00')))
+            self.assertEqual(sum(product.batches.values_list('remaining_quantity', flat=True)), 20)
+
+    def test_uncovered_quantity_is_costed_at_average(self):
+        product = make_product(valuation_method='fifo')
+        self.receive(product, 2, '4.00', 1)
+
+        cost, _ = self.consume(product, 5)
+
+        self.assertEqual(cost, Decimal('20.00'))
+
+    def test_reprice_derives_cost_from_open_totals(self):
+        product = make_product()
+        Product.objects.filter(pk=product.pk).update(open_units=4, open_value=Decimal('10.00'))
+
+        self.assertEqual(costing.reprice([product.pk]), 1)
+        product.refresh_from_db()
+        self.assertEqual(product.cost_price, Decimal('2.50'))
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        self.product = make_product()
+
+    def test_movements_journal_running_balances(self):
+        with transaction.atomic():
+            ledger.post_movement(self.product, 'main', 10, 'receipt')
+        before_sale = timezone.now()
+        with transaction.atomic():
+            # The same row twice in one posting still journals a running balance
+            ledger.post_movements([(self.product.pk, 'main', -3), (self.product.pk, 'main', -2), (self.product.pk, 'north', 4)], 'sale')
+
+        journal = StockMovement.objects.filter(product=self.product).order_by('id')
+        self.assertEqual(list(journal.values_list('warehouse', 'quantity', 'balance')),
+                         [('main', 10, 10), ('main', -3, 7), ('main', -2, 5), ('north', 4, 4)])
+        self.assertEqual(Stock.objects.get(product=self.product, warehouse='main').quantity, 5)
+        self.assertEqual(ledger.quantity_at(self.product, 'main', before_sale), 10)
+        self.assertEqual(ledger.quantity_at(self.product, 'main', timezone.now()), 5)
+        self.assertEqual(ledger.quantity_at(self.product, 'east', timezone.now()), 0)
+
+    def test_movements_are_append_only(self):
+        with transaction.atomic():
+            ledger.post_movement(self.product, 'main', 10, 'receipt')
+        movement = StockMovement.objects.get()
+        movement.quantity = 20
+        with self.assertRaises(ValueError):
+            movement.save()
+
+    def test_rebuild_restores_drifted_stock_from_the_journal(self):
+        with transaction.atomic():
+            ledger.post_movement(self.product, 'main', 10, 'receipt')
+        unjournaled = Stock.objects.create(product=make_product(sku='TST-002'), warehouse='main', quantity=7)
+        Stock.objects.filter(product=self.product).update(quantity=99)
+
+        call_command('rebuild_stock_from_ledger', stdout=StringIO())
+
+        self.assertEqual(Stock.objects.get(product=self.product).quantity, 10)
+        unjournaled.refresh_from_db()
+        self.assertEqual(unjournaled.quantity, 7)
+
+
+class StockServiceTests(TestCase):
+    def setUp(self):
+        self.product = make_product()
+
+    def quantities(self):
+        return dict(Stock.objects.filter(product=self.product).values_list('warehouse', 'quantity'))
+
+    def test_apply_delta_creates_the_row_and_rejects_oversells(self):
+        self.assertEqual(services.apply_delta(self.product, 'main', 5), 5)
+        self.assertEqual(services.apply_delta(self.product.pk, 'main', -5), 0)
+
+        with self.assertRaises(services.InsufficientStock) as raised:
+            services.apply_delta(self.product, 'main', -1)
+        self.assertEqual((raised.exception.available, raised.exception.requested), (0, 1))
+        self.assertEqual(self.quantities(), {'main': 0})
+
+    def test_apply_delta_adds_to_a_row_created_concurrently(self):
+        atomic = transaction.atomic
+
+        def racing_atomic(*args, **kwargs):
+            # Another writer inserts the row after our UPDATE found nothing
+            Stock.objects.create(product=self.product, warehouse='north', quantity=5)
+            return atomic(*args, **kwargs)
+
+        with mock.patch('inventory.services.transaction.atomic', racing_atomic):
+            self.assertEqual(services.apply_delta(self.product, 'north', 3), 8)
+
+    def test_apply_deltas_changes_all_rows_or_none(self):
+        other = make_product(sku='TST-002')
+        services.apply_delta(self.product, 'main', 10)
+        with transaction.atomic():
+            quantities = services.apply_deltas([(self.product.pk, 'main', -4), (self.product.pk, 'main', -1), (other.pk, 'east', 6)])
+        self.assertEqual(quantities, {(self.product.pk, 'main'): 5, (other.pk, 'east'): 6})
+
+        with self.assertRaises(services.InsufficientStock):
+            with transaction.atomic():
+                services.apply_deltas([(other.pk, 'east', -1), (self.product.pk, 'main', -6)])
+        self.assertEqual(self.quantities(), {'main': 5})
+        self.assertEqual(Stock.objects.get(product=other).quantity, 6)
+
+
+class ConcurrentStockServiceTests(TransactionTestCase):
+    THREADS = 8
+    SALES_PER_THREAD = 10
+
+    def test_parallel_sales_never_oversell(self):
+        product = make_product()
+        services.apply_delta(product, 'main', 50)
+        sold, errors = [], []
+        start_gate = threading.Barrier(self.THREADS)
+
+        def run():
+            try:
+                start_gate.wait()
+                for _ in range(self.SALES_PER_THREAD):
+                    try:
+                        with transaction.atomic():
+                            services.apply_delta(product, 'main', -1)
+                        sold.append(1)
+                    except services.InsufficientStock:
+                        pass
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        pool = [threading.Thread(target=run) for _ in range(self.THREADS)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(sold), 50)
+        self.assertEqual(Stock.objects.get(product=product).quantity, 0)
+
+
+class ReceiptImportTests(TestCase):
+    def setUp(self):
+        self.product = make_product(sku='BOLT')
+
+    def test_csv_rows_are_imported_in_chunks_and_bad_rows_reported(self):
+        stream = StringIO('\n'.join([
+            'sku,warehouse,quantity,unit_cost,received_date',
+            'BOLT,main,10,1.00,2026-01-01',
+            'bolt,north,5,4.00,2026-01-02',
+            'NUT,main,1,1.00,2026-01-02',
+            'BOLT,attic,1,1.00,2026-01-02',
+            'BOLT,main,0,1.00,2026-01-02',
+            'BOLT,main,5,3.00,2026-01-03',
+        ]))
+
+        report = importers.import_receipts(stream, 'csv', chunk_size=2)
+
+        self.assertEqual((report.rows, report.imported, report.rejected), (6, 3, 3))
+        self.assertEqual([line for line, _ in report.errors], [4, 5, 6])
+        self.assertEqual(dict(Stock.objects.values_list('warehouse', 'quantity')), {'main': 15, 'north': 5})
+        self.assertEqual(self.product.batches.count(), 3)
+        self.assertEqual(StockMovement.objects.filter(kind='receipt').count(), 3)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.open_units, self.product.open_value, self.product.cost_price),
+                         (20, Decimal('45.00'), Decimal('2.25')))
+
+    def test_jsonl_reports_malformed_lines(self):
+        stream = StringIO(
+            '{"sku": "BOLT", "warehouse": "east", "quantity": 3, "unit_cost": "2.00", "received_date": "2026-02-01"}\n'
+            '\n'
+            'not json\n'
+        )
+
+        report = importers.import_receipts(stream, 'jsonl')
+
+        self.assertEqual((report.imported, report.errors), (1, [(3, 'Malformed record')]))
+        self.assertEqual(Stock.objects.get(product=self.product, warehouse='east').quantity, 3)
+
+
+class LowStockTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('boss', password='x'))
+        self.bolt, self.nut = make_product(sku='BOLT'), make_product(sku='NUT')
+        services.apply_delta(self.bolt, 'main', 5)
+        services.apply_delta(self.bolt, 'east', 20)
+        services.apply_delta(self.nut, 'main', 12)
+
+    def low_rows(self, **params):
+        page = self.client.get(reverse('low_stock_list'), params).context['page']
+        return [(stock.product.sku, stock.warehouse) for stock in page]
+
+    def test_rows_below_their_reorder_level_are_listed(self):
+        self.assertEqual(self.low_rows(), [('BOLT', 'main')])
+
+        # Raising a level flags the row; restocking above it clears it
+        self.client.post(reverse('stock_reorder_level'), {'product': self.nut.pk, 'warehouse': 'main', 'reorder_level': 15})
+        self.assertEqual(self.low_rows(), [('BOLT', 'main'), ('NUT', 'main')])
+        services.apply_delta(self.bolt, 'main', 10)
+        self.assertEqual(self.low_rows(), [('NUT', 'main')])
+        self.assertEqual(self.low_rows(warehouse='east'), [])
+
+    def test_low_stock_query_uses_the_partial_index(self):
+        self.assertIn('stock_low_idx', Stock.objects.filter(Stock.LOW_STOCK).order_by('warehouse', 'product').explain())
+
+
+@override_settings(WAREHOUSE_CAPACITY_M3={'main': 2, 'north': 1})
+class WarehouseUtilisationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # 0.2 m³ and 0.001 m³ per unit
+        self.desk = make_product(sku='DESK', category='furniture', length=100, width=50, height=40)
+        self.mouse = make_product(sku='MOUSE', category='electronics', length=10, width=10, height=10)
+        services.apply_delta(self.desk, 'main', 3)
+        services.apply_delta(self.mouse, 'main', 7)
+        services.apply_delta(self.mouse, 'north', 2)
+        services.apply_delta(self.desk, 'east', 1)
+        services.apply_delta(self.desk, 'east', -1)
+
+    def test_volumes_are_summed_per_warehouse_and_category(self):
+        with self.assertNumQueries(1):
+            report = reports.warehouse_utilisation()
+
+        warehouses = {warehouse['warehouse']: warehouse for warehouse in report['warehouses']}
+        main = warehouses['main']
+        self.assertEqual((main['units'], main['used_m3'], main['percent_full']), (10, Decimal('0.607'), Decimal('30.4')))
+        self.assertEqual([(category['category'], category['units'], category['used_m3']) for category in main['categories']],
+                         [('furniture', 3, Decimal('0.600')), ('electronics', 7, Decimal('0.007'))])
+        self.assertEqual((warehouses['north']['used_m3'], warehouses['north']['percent_full']), (Decimal('0.002'), Decimal('0.2')))
+        # Empty rows count for nothing, and warehouses without a capacity have no percentage
+        self.assertEqual((warehouses['east']['units'], warehouses['east']['categories'], warehouses['east']['percent_full']), (0, [], None))
+        self.assertEqual(report['total_m3'], Decimal('0.609'))
+
+    def test_cached_report_is_dropped_only_when_a_change_commits(self):
+        reports.warehouse_utilisation()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                services.apply_delta(self.desk, 'main', 2)
+            self.assertIsNotNone(cache.get(reports.UTILISATION_CACHE_KEY))
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(cache.get(reports.UTILISATION_CACHE_KEY))
+        self.assertEqual(reports.warehouse_utilisation()['warehouses'][0]['used_m3'], Decimal('1.007'))
+
+        # A change that rolls back never commits, so the report stays cached
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertRaises(services.InsufficientStock):
+                with transaction.atomic():
+                    services.apply_delta(self.mouse, 'main', -1)
+                    services.apply_delta(self.mouse, 'north', -5)
+        self.assertEqual(callbacks, [])
+        self.assertIsNotNone(cache.get(reports.UTILISATION_CACHE_KEY))
+
+
+class ProductVolumeTests(TestCase):
+    def test_stored_volume_follows_the_dimensions(self):
+        product = make_product(length=100, width=50, height=40)
+        product.refresh_from_db()
+        self.assertEqual(product.volume_m3, Decimal('0.2'))
+
+        product.height = Decimal('20.50')
+        product.save()
+        product.refresh_from_db()
+        self.assertEqual(product.volume_m3, Decimal('0.1025'))
+
+        Product.objects.filter(pk=product.pk).update(length=10, width=10)
+        self.assertEqual(Product.objects.get(pk=product.pk).volume_m3, Decimal('0.00205'))
+
+    def test_product_list_sorts_and_filters_by_volume(self):
+        self.client.force_login(User.objects.create_superuser('boss', password='x'))
+        sides = {'SML': 10, 'MED': 50, 'BIG': 100, 'HGE': 200}
+        for sku, side in sides.items():
+            make_product(sku=sku, length=side, width=side, height=side)
+
+        def skus(**params):
+            return [product.sku for product in self.client.get(reverse('product_list'), params).context['products']]
+
+        self.assertEqual(skus(sort='-volume_m3'), ['HGE', 'BIG', 'MED', 'SML'])
+        self.assertEqual(skus(sort='volume_m3', volume_min='0.1', volume_max='1'), ['MED', 'BIG'])
+        self.assertEqual(skus(volume_min='not a number', sort='volume_m3'), ['SML', 'MED', 'BIG', 'HGE'])
+
+
+class ProductSearchTests(TestCase):
+    def test_sku_prefix_matches_in_any_case(self):
+        form = ProductForm(data={
+            'name': 'Desk Lamp', 'sku': ' lmp-00042 ', 'category': 'office', 'price': '45.00',
+            'valuation_method': 'fifo', 'length': '20', 'width': '15', 'height': '40',
+        })
+        self.assertTrue(form.is_valid(), form.errors)
+        product = form.save()
+
+        self.assertEqual(product.sku, 'LMP-00042')
+        for query in ('lmp-000', 'LMP-00042', 'Lmp'):
+            self.assertEqual(search.search_products(query), [product], query)
+        duplicate = ProductForm(data={**form.data, 'sku': 'LMP-00042'})
+        self.assertIn('sku', duplicate.errors)
+
+    def test_product_form_leaves_the_average_cost_to_costing(self):
+        product = make_product(cost_price=Decimal('2.50'))
+        form = ProductForm(instance=product, data={
+            'name': product.name, 'sku': product.sku, 'category': 'other', 'price': '12.00',
+            'cost_price': '99.00', 'valuation_method': 'avco', 'length': '1', 'width': '1', 'height': '1',
+        })
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+
+        product.refresh_from_db()
+        self.assertEqual((product.price, product.cost_price), (Decimal('12.00'), Decimal('2.50')))
+
+    def test_swapped_letters_count_as_one_typo(self):
+        names = ['Office Chair', 'Desk Lamp', 'Monitor 27 inch', 'Laptop Pro']
+        products = [make_product(sku=f'TYP-{i}', name=name) for i, name in enumerate(names)]
+
+        for query, product in zip(['chiar', 'lmap', 'moniotr', 'laptpo'], products):
+            self.assertEqual(search.search_products(query), [product], query)
+        self.assertEqual(search.edit_distance('chiar', 'chair', 1), 1)
+        self.assertEqual(search.edit_distance('kitten', 'sitting', 1), 2)
+
+    def test_best_matches_rank_first_beyond_the_candidate_window(self):
+        Product.objects.bulk_create([
+            Product(name=f'Kettle Stand Holder Tray Mat {i}', sku=f'KET-{i:04d}', price=Decimal('1.00'), length=1, width=1, height=1)
+            for i in range(search.MAX_CANDIDATES + 50)
+        ])
+        search.rebuild_index()
+        best = make_product(sku='KET-BEST', name='Kettle')
+
+        self.assertEqual(search.search_products('kettle', limit=5)[0], best)
@@ -12,6 +12,11 @@ urlpatterns = [
     path('stock/', views.stock_list, name='stock_list'),
     path('stock/add/', views.stock_entry_create, name='stock_entry_create'),
     path('stock/adjust/', views.stock_adjustment_create, name='stock_adjustment_create'),
+    path('stock/import/', views.stock_import, name='stock_import'),
+    path('stock/low/', views.low_stock_list, name='low_stock_list'),
+    path('stock/reorder-level/', views.stock_reorder_level, name='stock_reorder_level'),
+    path('stock/utilisation/', views.warehouse_utilisation, name='warehouse_utilisation'),
+    path('stock/utilisation.json', views.warehouse_utilisation_json, name='warehouse_utilisation_json'),
     
     # Transfer URLs
     path('transfers/', views.transfer_list, name='transfer_list'),
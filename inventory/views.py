@@ -1,16 +1,60 @@
+import io
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib import messages
-from django.db.models import Sum, F
+from django.db.models import Q
 from django.db import transaction
-from .models import Product, Stock, StockTransfer, StockBatch, StockAdjustment
-from .forms import ProductForm, StockForm, StockTransferForm, StockTransferUpdateForm, StockEntryForm, StockAdjustmentForm
+from core.pagination import PAGE_SIZE, date_range, day_bounds, decimal_range, keyset_paginate, sort_ordering
+from .models import Product, Stock, StockTransfer
+from . import costing, ledger, reports, search, services
+from .importers import RECEIPT_FIELDS, import_receipts
+from .forms import ProductForm, StockTransferForm, StockTransferUpdateForm, StockEntryForm, StockAdjustmentForm, StockImportForm, ReorderLevelForm
+
+PRODUCT_SORTS = ['name', 'sku', 'price', 'cost_price', 'volume_m3', 'created_at']
+TRANSFER_SORTS = ['created_at', 'quantity']
+
 
 @login_required
 def product_list(request):
     products = Product.objects.all()
+    category = request.GET.get('category')
+    sort = request.GET.get('sort')
+    query = request.GET.get('q', '').strip()
+    volume_min, volume_max = decimal_range(request.GET, 'volume_min', 'volume_max')
+    
+    if query:
+        # Ranked search results replace the paginated listing
+        products = search.search_products(query, limit=PAGE_SIZE * 2)
+        products = [
+            product for product in products
+            if (not category or product.category == category)
+            and (volume_min is None or product.volume_m3 >= volume_min)
+            and (volume_max is None or product.volume_m3 <= volume_max)
+        ]
+        page = None
+    else:
+        # Filter by category
+        if category:
+            products = products.filter(category=category)
+        if volume_min is not None:
+            products = products.filter(volume_m3__gte=volume_min)
+        if volume_max is not None:
+            products = products.filter(volume_m3__lte=volume_max)
+        
+        ordering = sort_ordering(sort, PRODUCT_SORTS, Product._meta.ordering)
+        page = keyset_paginate(products, ordering, request.GET.get('cursor'))
+        products = page.object_list
+    
     context = {
         'products': products,
+        'page': page,
+        'category_choices': Product.CATEGORY_CHOICES,
+        'current_category': category,
+        'query': query,
+        'volume_min': volume_min,
+        'volume_max': volume_max,
+        'sort': sort,
         'title': 'Product Management'
     }
     return render(request, 'inventory/product_list.html', context)
@@ -80,6 +124,63 @@ def stock_list(request):
     }
     return render(request, 'inventory/stock_list.html', context)
 
+@login_required
+def low_stock_list(request):
+    """Stock rows below their reorder level, read from the partial low-stock index."""
+    stocks = Stock.objects.filter(Stock.LOW_STOCK).select_related('product')
+    warehouse = request.GET.get('warehouse')
+    
+    if warehouse:
+        stocks = stocks.filter(warehouse=warehouse)
+    
+    page = keyset_paginate(stocks, ['warehouse', 'product_id'], request.GET.get('cursor'))
+    
+    context = {
+        'stocks': page.object_list,
+        'page': page,
+        'warehouse_choices': Stock.WAREHOUSE_CHOICES,
+        'current_warehouse': warehouse,
+        'title': 'Low Stock'
+    }
+    return render(request, 'inventory/low_stock_list.html', context)
+
+@login_required
+def stock_reorder_level(request):
+    """View to set the reorder level of a product in a warehouse."""
+    if request.method == 'POST':
+        form = ReorderLevelForm(request.POST)
+        if form.is_valid():
+            product = form.cleaned_data['product']
+            warehouse = form.cleaned_data['warehouse']
+            Stock.objects.update_or_create(
+                product=product,
+                warehouse=warehouse,
+                defaults={'reorder_level': form.cleaned_data['reorder_level']}
+            )
+            messages.success(request, f'Reorder level for {product.name} in {warehouse} updated.')
+            return redirect('low_stock_list')
+    else:
+        form = ReorderLevelForm(initial=request.GET)
+    
+    context = {
+        'form': form,
+        'title': 'Set Reorder Level'
+    }
+    return render(request, 'inventory/reorder_level_form.html', context)
+
+@login_required
+def warehouse_utilisation(request):
+    """Stock volume per warehouse and category against configured capacity."""
+    context = {
+        'report': reports.warehouse_utilisation(),
+        'title': 'Warehouse Utilisation'
+    }
+    return render(request, 'inventory/warehouse_utilisation.html', context)
+
+@login_required
+def warehouse_utilisation_json(request):
+    return JsonResponse(reports.warehouse_utilisation())
+
 @login_required
 def transfer_list(request):
     transfers = StockTransfer.objects.select_related('product', 'created_by').all()
@@ -88,10 +189,34 @@ def transfer_list(request):
     status = request.GET.get('status')
     if status:
         transfers = transfers.filter(status=status)
+    
+    # Filter by warehouse on either leg
+    warehouse = request.GET.get('warehouse')
+    if warehouse:
+        transfers = transfers.filter(Q(from_warehouse=warehouse) | Q(to_warehouse=warehouse))
+    
+    # Filter by creation date
+    date_from, date_to = date_range(request.GET)
+    start_at, end_at = day_bounds(date_from, date_to)
+    if start_at:
+        transfers = transfers.filter(created_at__gte=start_at)
+    if end_at:
+        transfers = transfers.filter(created_at__lte=end_at)
+    
+    sort = request.GET.get('sort')
+    ordering = sort_ordering(sort, TRANSFER_SORTS, StockTransfer._meta.ordering)
+    page = keyset_paginate(transfers, ordering, request.GET.get('cursor'))
         
     context = {
-        'transfers': transfers,
+        'transfers': page.object_list,
+        'page': page,
+        'status_choices': StockTransfer.STATUS_CHOICES,
+        'warehouse_choices': Stock.WAREHOUSE_CHOICES,
         'current_status': status,
+        'current_warehouse': warehouse,
+        'date_from': date_from,
+        'date_to': date_to,
+        'sort': sort,
         'title': 'Stock Transfers'
     }
     return render(request, 'inventory/transfer_list.html', context)
@@ -104,20 +229,14 @@ def transfer_create(request):
             transfer = form.save(commit=False)
             transfer.created_by = request.user
             
-            # Check if sufficient stock exists
-            try:
-                source_stock = Stock.objects.get(
-                    product=transfer.product,
-                    warehouse=transfer.from_warehouse
-                )
-                if source_stock.quantity < transfer.quantity:
-                    messages.error(request, f'Insufficient stock in {transfer.get_from_warehouse_display()}. Available: {source_stock.quantity}')
+            # Check if sufficient stock exists, holding the source row while the transfer is saved
+            with transaction.atomic():
+                available = services.available_quantity(transfer.product, transfer.from_warehouse, lock=True)
+                if available < transfer.quantity:
+                    messages.error(request, f'Insufficient stock in {transfer.get_from_warehouse_display()}. Available: {available}')
                     return render(request, 'inventory/transfer_form.html', {'form': form, 'title': 'Create Transfer'})
-            except Stock.DoesNotExist:
-                messages.error(request, f'No stock record found for {transfer.product} in {transfer.get_from_warehouse_display()}')
-                return render(request, 'inventory/transfer_form.html', {'form': form, 'title': 'Create Transfer'})
+                transfer.save()
             
-            transfer.save()
             messages.success(request, 'Transfer request created successfully.')
             return redirect('transfer_list')
     else:
@@ -136,34 +255,35 @@ def transfer_update(request, pk):
     if request.method == 'POST':
         form = StockTransferUpdateForm(request.POST, instance=transfer)
         if form.is_valid():
-            with transaction.atomic():
-                old_status = StockTransfer.objects.get(pk=pk).status
-                transfer = form.save()
-                
-                # Handle status changes
-                if transfer.status == 'reconciled' and old_status != 'reconciled':
-                    # Deduct from source
-                    source_stock, _ = Stock.objects.get_or_create(
-                        product=transfer.product,
-                        warehouse=transfer.from_warehouse
-                    )
-                    source_stock.quantity -= transfer.quantity
-                    source_stock.save()
-                    
-                    # Add to destination (use actual received if available, else requested)
-                    qty_to_add = transfer.actual_quantity_received if transfer.actual_quantity_received is not None else transfer.quantity
-                    dest_stock, _ = Stock.objects.get_or_create(
-                        product=transfer.product,
-                        warehouse=transfer.to_warehouse
-                    )
-                    dest_stock.quantity += qty_to_add
-                    dest_stock.save()
-                    
-                    messages.success(request, 'Transfer reconciled and stock levels updated.')
-                else:
-                    messages.success(request, 'Transfer updated successfully.')
+            try:
+                with transaction.atomic():
+                    old_status = StockTransfer.objects.select_for_update().get(pk=pk).status
+                    transfer = form.save()
                     
-            return redirect('transfer_list')
+                    # Handle status changes
+                    if transfer.status == 'reconciled' and old_status != 'reconciled':
+                        reference = f'transfer:{transfer.pk}'
+                        
+                        # Deduct from source
+                        ledger.post_movement(
+                            transfer.product, transfer.from_warehouse, -transfer.quantity,
+                            'transfer_out', reference, request.user
+                        )
+                        
+                        # Add to destination (use actual received if available, else requested)
+                        qty_to_add = transfer.actual_quantity_received if transfer.actual_quantity_received is not None else transfer.quantity
+                        ledger.post_movement(
+                            transfer.product, transfer.to_warehouse, qty_to_add,
+                            'transfer_in', reference, request.user
+                        )
+                        
+                        messages.success(request, 'Transfer reconciled and stock levels updated.')
+                    else:
+                        messages.success(request, 'Transfer updated successfully.')
+            except services.InsufficientStock as e:
+                messages.error(request, str(e))
+            else:
+                return redirect('transfer_list')
     else:
         form = StockTransferUpdateForm(instance=transfer)
     
@@ -187,30 +307,15 @@ def stock_entry_create(request):
                 
                 # Update Stock model
                 warehouse = form.cleaned_data['warehouse']
-                stock, _ = Stock.objects.get_or_create(
-                    product=batch.product,
-                    warehouse=warehouse
+                ledger.post_movement(
+                    batch.product, warehouse, batch.quantity,
+                    'receipt', f'batch:{batch.pk}', request.user
                 )
-                stock.quantity += batch.quantity
-                stock.save()
-                
-                # Update Product Average Cost
-                # Simple moving average calculation
-                product = batch.product
-                current_total_value = (product.cost_price * (stock.quantity - batch.quantity)) if stock.quantity > batch.quantity else 0
-                new_batch_value = batch.unit_cost * batch.quantity
-                total_qty = stock.quantity # This is approximation across all warehouses if we want global average
                 
-                # Better: Calculate global weighted average
-                all_batches = StockBatch.objects.filter(product=product, remaining_quantity__gt=0)
-                total_value = sum(b.remaining_quantity * b.unit_cost for b in all_batches)
-                total_units = sum(b.remaining_quantity for b in all_batches)
+                # Update product open totals and derived average cost
+                cost_price = costing.record_receipt(batch)
                 
-                if total_units > 0:
-                    product.cost_price = total_value / total_units
-                    product.save()
-                
-                messages.success(request, f'Stock added successfully. New Average Cost: ${product.cost_price:.2f}')
+                messages.success(request, f'Stock added successfully. New Average Cost: ${cost_price:.2f}')
                 return redirect('stock_list')
     else:
         form = StockEntryForm()
@@ -227,19 +332,20 @@ def stock_adjustment_create(request):
     if request.method == 'POST':
         form = StockAdjustmentForm(request.POST)
         if form.is_valid():
-            with transaction.atomic():
-                adj = form.save(commit=False)
-                adj.created_by = request.user
-                adj.save()
-                
-                # Update Stock model
-                stock, _ = Stock.objects.get_or_create(
-                    product=adj.product,
-                    warehouse=adj.warehouse
-                )
-                stock.quantity += adj.quantity # Quantity can be negative
-                stock.save()
-                
+            try:
+                with transaction.atomic():
+                    adj = form.save(commit=False)
+                    adj.created_by = request.user
+                    adj.save()
+                    
+                    # Update Stock model (quantity can be negative)
+                    ledger.post_movement(
+                        adj.product, adj.warehouse, adj.quantity,
+                        'adjustment', f'adjustment:{adj.pk}', request.user
+                    )
+            except services.InsufficientStock as e:
+                messages.error(request, str(e))
+            else:
                 messages.success(request, 'Stock adjustment recorded successfully.')
                 return redirect('stock_list')
     else:
@@ -250,3 +356,36 @@ def stock_adjustment_create(request):
         'title': 'Stock Adjustment'
     }
     return render(request, 'inventory/stock_adjustment_form.html', context)
+
+@login_required
+def stock_import(request):
+    """View to bulk import purchase receipts from an uploaded CSV or JSONL file."""
+    if request.method == 'POST':
+        form = StockImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            stream = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+            report = import_receipts(
+                stream,
+                form.cleaned_data['format'],
+                reference=f'import:{upload.name}'[:50],
+                user=request.user
+            )
+            
+            for line_number, message in report.errors[:10]:
+                messages.warning(request, f'Line {line_number}: {message}')
+            messages.success(
+                request,
+                f'Imported {report.imported} of {report.rows} rows ({report.rejected} rejected) '
+                f'at {report.rows_per_sec:.0f} rows/sec.'
+            )
+            return redirect('stock_list')
+    else:
+        form = StockImportForm()
+    
+    context = {
+        'form': form,
+        'fields': RECEIPT_FIELDS,
+        'title': 'Import Stock Receipts'
+    }
+    return render(request, 'inventory/stock_import_form.html', context)
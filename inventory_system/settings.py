@@ -50,6 +50,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.profiling.ProfilingMiddleware',
+    'core.querylog.QueryLogMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -82,6 +84,17 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock when a transaction starts so concurrent stock
+            # updates wait for each other instead of failing on lock upgrade
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # A file rather than the shared-cache in-memory default, whose table
+        # locks fail immediately instead of honouring the timeout above
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
@@ -123,11 +136,48 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 
+# Pre-rendered printable invoices, keyed by invoice and last change
+INVOICE_DOCUMENT_DIR = BASE_DIR / 'var' / 'invoices'
+
+# Request profiling: the fraction of requests profiled at random (0 disables
+# sampling); staff can still profile a request with ?_profile=1 or X-Profile: 1
+PROFILING_SAMPLE_RATE = 0.0
+PROFILING_LOG = BASE_DIR / 'var' / 'profiles.jsonl'
+PROFILING_LOG_MAX_BYTES = 50 * 1024 * 1024
+
+# SQL fingerprint log read by the query_report command; statements slower than
+# QUERY_LOG_SLOW_MS are logged with the line of code that ran them. Off unless
+# switched on deliberately, so test runs and ordinary DEBUG sessions do not
+# append to the log query_report reads
+QUERY_LOG_ENABLED = False
+QUERY_LOG = BASE_DIR / 'var' / 'queries.jsonl'
+QUERY_LOG_MAX_BYTES = 50 * 1024 * 1024
+QUERY_LOG_SLOW_MS = 100
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Caches
+# Cached reports are invalidated on write; use a shared backend (e.g. Redis)
+# when running more than one process so invalidations reach every worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Usable storage volume of each warehouse in cubic metres, for the utilisation report
+WAREHOUSE_CAPACITY_M3 = {
+    'main': 5000,
+    'north': 1500,
+    'south': 1500,
+    'east': 1000,
+    'west': 1000,
+}
+
 # Authentication settings
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
@@ -0,0 +1,78 @@
+import os
+import tempfile
+from pathlib import Path
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils import timezone
+from .models import Invoice
+
+
+# Bump when invoice_print.html changes so cached documents are re-rendered
+DOCUMENT_VERSION = 1
+
+
+def document_dir():
+    return Path(settings.INVOICE_DOCUMENT_DIR)
+
+
+def document_key(invoice_id, updated_at, customer_updated_at):
+    """Cache key of a printable invoice: changes whenever the invoice or its customer does."""
+    stamps = '-'.join(f'{int(value.timestamp() * 1_000_000):x}' for value in (updated_at, customer_updated_at))
+    return f'{invoice_id}-{stamps}-v{DOCUMENT_VERSION}'
+
+
+def invoice_document_key(invoice_id):
+    """document_key for an invoice id from one indexed lookup, or None if it does not exist."""
+    stamps = Invoice.objects.filter(pk=invoice_id).values_list('updated_at', 'customer__updated_at').first()
+    return document_key(invoice_id, *stamps) if stamps else None
+
+
+def render_document(invoice):
+    """Render the self-contained print HTML of an invoice."""
+    context = {
+        'invoice': invoice,
+        'items': invoice.items.select_related('product'),
+        'payments': invoice.payments.all(),
+        'subtotal': invoice.total_amount + invoice.discount,
+        'balance': invoice.total_amount - invoice.amount_paid,
+        'rendered_at': timezone.now(),
+    }
+    return render_to_string('sales/invoice_print.html', context)
+
+
+def get_document(invoice):
+    """
+    Printable HTML of an invoice, rendered once per change and cached on disk.
+
+    Older renderings of the same invoice are removed when a new one is written.
+    Returns (key, content bytes).
+    """
+    key = document_key(invoice.pk, invoice.updated_at, invoice.customer.updated_at)
+    path = document_dir() / f'{key}.html'
+    try:
+        return key, path.read_bytes()
+    except FileNotFoundError:
+        pass
+
+    content = render_document(invoice).encode('utf-8')
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write then rename, so concurrent readers never see a partial file
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as stream:
+        stream.write(content)
+    os.replace(tmp, path)
+
+    for stale in path.parent.glob(f'{invoice.pk}-*.html'):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    return key, content
+
+
+def render_invoices(invoice_ids):
+    """Pre-render the given invoices; returns how many were rendered or already cached."""
+    invoices = Invoice.objects.filter(pk__in=invoice_ids).select_related('customer', 'created_by')
+    count = 0
+    for invoice in invoices:
+        get_document(invoice)
+        count += 1
+    return count
@@ -0,0 +1,106 @@
+import csv
+import zlib
+from .models import Invoice, Payment, SaleItem
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+def _invoices(filters):
+    return Invoice.objects.filter(**filters).order_by('date', 'created_at', 'id')
+
+
+def _lines(filters):
+    return SaleItem.objects.filter(**{f'invoice__{key}': value for key, value in filters.items()}).order_by(
+        'invoice__date', 'invoice_id', 'id'
+    )
+
+
+def _payments(filters):
+    return Payment.objects.filter(**{f'invoice__{key}': value for key, value in filters.items()}).order_by(
+        'invoice__date', 'invoice_id', 'id'
+    )
+
+
+# kind -> (queryset for filters, [(header, field)])
+EXPORTS = {
+    'invoices': (_invoices, [
+        ('invoice_number', 'invoice_number'),
+        ('date', 'date'),
+        ('customer', 'customer__name'),
+        ('customer_email', 'customer__email'),
+        ('status', 'status'),
+        ('discount', 'discount'),
+        ('total_amount', 'total_amount'),
+        ('amount_paid', 'amount_paid'),
+    ]),
+    'lines': (_lines, [
+        ('invoice_number', 'invoice__invoice_number'),
+        ('date', 'invoice__date'),
+        ('customer', 'invoice__customer__name'),
+        ('sku', 'product__sku'),
+        ('product', 'product__name'),
+        ('warehouse', 'warehouse'),
+        ('quantity', 'quantity'),
+        ('price', 'price'),
+        ('cost_amount', 'cost_amount'),
+    ]),
+    'payments': (_payments, [
+        ('invoice_number', 'invoice__invoice_number'),
+        ('invoice_date', 'invoice__date'),
+        ('customer', 'invoice__customer__name'),
+        ('date', 'date'),
+        ('method', 'method'),
+        ('reference', 'reference'),
+        ('amount', 'amount'),
+    ]),
+}
+
+
+def export_filters(date_from=None, date_to=None, customer_id=None):
+    """Invoice-level filters shared by every export kind."""
+    filters = {}
+    if date_from:
+        filters['date__gte'] = date_from
+    if date_to:
+        filters['date__lte'] = date_to
+    if customer_id:
+        filters['customer_id'] = customer_id
+    return filters
+
+
+def export_rows(kind, filters, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield the header and then one tuple per row of an export.
+
+    Rows come from values_list over the joined tables and are fetched
+    chunk_size at a time, so no model instances are built and memory stays
+    flat however many rows match.
+    """
+    queryset, columns = EXPORTS[kind]
+    yield [header for header, _ in columns]
+    yield from queryset(filters).values_list(*[field for _, field in columns]).iterator(chunk_size=chunk_size)
+
+
+class _Echo:
+    """File-like object whose write() hands the written line back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def csv_chunks(rows):
+    """Encode rows as CSV, yielding one UTF-8 line at a time."""
+    writer = csv.writer(_Echo())
+    for row in rows:
+        yield writer.writerow(row).encode('utf-8')
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress a stream of byte chunks into a gzip stream incrementally."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
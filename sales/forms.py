@@ -16,10 +16,10 @@ class CustomerForm(forms.ModelForm):
 class InvoiceForm(forms.ModelForm):
     class Meta:
         model = Invoice
-        fields = ['customer', 'invoice_number', 'date', 'discount']
+        # invoice_number is allocated on save by sales.numbering
+        fields = ['customer', 'date', 'discount']
         widgets = {
             'customer': forms.Select(attrs={'class': 'form-select'}),
-            'invoice_number': forms.TextInput(attrs={'class': 'form-control'}),
             'date': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
             'discount': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
         }
@@ -27,9 +27,10 @@ class InvoiceForm(forms.ModelForm):
 class SaleItemForm(forms.ModelForm):
     class Meta:
         model = SaleItem
-        fields = ['product', 'quantity', 'price']
+        fields = ['product', 'warehouse', 'quantity', 'price']
         widgets = {
             'product': forms.Select(attrs={'class': 'form-select'}),
+            'warehouse': forms.Select(attrs={'class': 'form-select'}),
             'quantity': forms.NumberInput(attrs={'class': 'form-control item-quantity'}),
             'price': forms.NumberInput(attrs={'class': 'form-control item-price', 'step': '0.01'}),
         }
@@ -55,3 +56,13 @@ class PaymentForm(forms.ModelForm):
             'reference': forms.TextInput(attrs={'class': 'form-control'}),
             'note': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
         }
+
+class StatementImportForm(forms.Form):
+    """Upload form for bank statement payments."""
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('jsonl', 'JSON Lines'),
+    ]
+    
+    file = forms.FileField(widget=forms.ClearableFileInput(attrs={'class': 'form-control'}))
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, widget=forms.Select(attrs={'class': 'form-select'}))
@@ -0,0 +1,120 @@
+import time
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from inventory.importers import ImportReport, iter_records
+from .models import Invoice, Payment
+from .signals import payments_changed
+
+
+STATEMENT_FIELDS = ['date', 'amount', 'invoice_number', 'reference', 'method']
+
+STATEMENT_DEFAULT_METHOD = 'transfer'
+
+
+class StatementReport(ImportReport):
+    """Import report that also lists statement lines matching no invoice."""
+
+    def __init__(self):
+        super().__init__()
+        self.unmatched = []
+
+
+def parse_statement_line(record, methods):
+    """Validate one statement line; return (invoice_number, reference, amount, date, method)."""
+    if not isinstance(record, dict):
+        raise ValueError('Malformed record')
+
+    invoice_number = str(record.get('invoice_number') or '').strip()
+    reference = str(record.get('reference') or '').strip()[:100]
+    if not invoice_number and not reference:
+        raise ValueError('Neither invoice_number nor reference given')
+
+    try:
+        amount = Decimal(str(record.get('amount'))).quantize(Decimal('0.01'))
+        paid_on = date.fromisoformat(str(record.get('date')).strip())
+    except (TypeError, ValueError, InvalidOperation):
+        raise ValueError('Invalid amount or date')
+
+    if amount <= 0:
+        raise ValueError('Amount must be positive')
+
+    method = str(record.get('method') or '').strip().lower() or STATEMENT_DEFAULT_METHOD
+    if method not in methods:
+        raise ValueError(f'Unknown payment method "{method}"')
+
+    return invoice_number, reference, amount, paid_on, method
+
+
+def _import_chunk(lines, report, user):
+    """Match one chunk of parsed lines to invoices and record them in a single transaction."""
+    keys = {key for _, (number, reference, *_) in lines for key in (number, reference) if key}
+    invoices = dict(Invoice.objects.filter(invoice_number__in=keys).values_list('invoice_number', 'id'))
+
+    # Lines already imported (same invoice and bank reference) are skipped, so re-running a statement is safe
+    references = {reference for _, (_, reference, *_) in lines if reference}
+    existing = set(Payment.objects.filter(
+        invoice_id__in=invoices.values(), reference__in=references
+    ).values_list('invoice_id', 'reference'))
+
+    payments = []
+    for line_number, (number, reference, amount, paid_on, method) in lines:
+        invoice_id = invoices.get(number) or invoices.get(reference)
+        if invoice_id is None:
+            report.unmatched.append((line_number, number or reference, amount))
+            continue
+        if reference and (invoice_id, reference) in existing:
+            report.errors.append((line_number, f'Payment "{reference}" already recorded'))
+            continue
+        existing.add((invoice_id, reference))
+        payments.append(Payment(
+            invoice_id=invoice_id,
+            amount=amount,
+            date=paid_on,
+            method=method,
+            reference=reference,
+            note='Imported from bank statement',
+            created_by=user
+        ))
+
+    invoice_ids = {payment.invoice_id for payment in payments}
+    with transaction.atomic():
+        Payment.objects.bulk_create(payments)
+        Invoice.refresh_payment_totals(invoice_ids)
+        if invoice_ids:
+            payments_changed.send(sender=Invoice, invoice_ids=invoice_ids)
+
+    return len(payments)
+
+
+def import_statement(stream, fmt, chunk_size=1000, user=None):
+    """
+    Stream bank statement lines from a CSV or JSONL text stream into payments.
+
+    Each line is matched to an invoice by invoice_number, falling back to its
+    reference. Payments are written chunk by chunk with bulk_create, and the
+    touched invoices get amount_paid and status recomputed in one grouped
+    UPDATE per chunk. Unmatched lines are listed in the report.
+    """
+    report = StatementReport()
+    started = time.perf_counter()
+    methods = {code for code, _ in Payment.METHOD_CHOICES}
+
+    chunk = []
+    for line_number, record in iter_records(stream, fmt):
+        report.rows += 1
+        try:
+            chunk.append((line_number, parse_statement_line(record, methods)))
+        except ValueError as e:
+            report.errors.append((line_number, str(e)))
+            continue
+
+        if len(chunk) >= chunk_size:
+            report.imported += _import_chunk(chunk, report, user)
+            chunk = []
+
+    if chunk:
+        report.imported += _import_chunk(chunk, report, user)
+
+    report.elapsed = time.perf_counter() - started
+    return report
@@ -0,0 +1,34 @@
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from sales.importers import STATEMENT_FIELDS, import_statement
+
+
+class Command(BaseCommand):
+    help = f'Record payments from a bank statement CSV or JSONL file (fields: {", ".join(STATEMENT_FIELDS)})'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSONL statement to import')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Lines written per transaction')
+        parser.add_argument('--show-errors', type=int, default=20, help='Number of unmatched and rejected lines to print')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'File not found: {path}')
+
+        fmt = options['format'] or ('jsonl' if path.suffix.lower() in ('.jsonl', '.ndjson') else 'csv')
+
+        with path.open(newline='', encoding='utf-8') as stream:
+            report = import_statement(stream, fmt, options['chunk_size'])
+
+        for line_number, key, amount in report.unmatched[:options['show_errors']]:
+            self.stdout.write(self.style.WARNING(f'  line {line_number}: no invoice matches "{key}" (${amount})'))
+        for line_number, message in report.errors[:options['show_errors']]:
+            self.stdout.write(self.style.WARNING(f'  line {line_number}: {message}'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Recorded {report.imported} of {report.rows} payments '
+            f'({len(report.unmatched)} unmatched, {report.rejected} rejected) '
+            f'in {report.elapsed:.2f}s, {report.rows_per_sec:.0f} lines/sec'
+        ))
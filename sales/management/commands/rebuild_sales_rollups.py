@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from sales import rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily product, customer and staff sales rollups from the invoices'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help='First invoice date to rebuild, YYYY-MM-DD (default: earliest)')
+        parser.add_argument('--to', dest='date_to', help='Last invoice date to rebuild, YYYY-MM-DD (default: latest)')
+        parser.add_argument('--chunk-days', type=int, default=rollups.REBUILD_CHUNK_DAYS, help='Days rebuilt per transaction')
+
+    def handle(self, *args, **options):
+        dates = []
+        for key in ('date_from', 'date_to'):
+            value = options[key]
+            parsed = parse_date(value) if value else None
+            if value and parsed is None:
+                raise CommandError(f'Invalid date: {value}')
+            dates.append(parsed)
+        if options['chunk_days'] < 1:
+            raise CommandError('--chunk-days must be at least 1')
+
+        covered = rollups.rebuild(*dates, chunk_days=options['chunk_days'])
+        if covered is None:
+            self.stdout.write('No invoices to roll up')
+            return
+        first, last = covered
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt sales rollups from {first} to {last}'))
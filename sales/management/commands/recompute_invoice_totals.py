@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import DecimalField, Exists, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Round
+from sales.models import Invoice, SaleItem
+from sales import rollups
+from staff import kpis
+
+
+class Command(BaseCommand):
+    help = 'Recompute every invoice total and payment status from its sale items in set-based SQL'
+
+    def handle(self, *args, **options):
+        items = SaleItem.objects.filter(invoice=OuterRef('pk')).order_by().values('invoice')
+        subtotal = Subquery(
+            items.annotate(total=Sum(SaleItem.line_total())).values('total'),
+            output_field=DecimalField(max_digits=14, decimal_places=2)
+        )
+        total = Round(subtotal - F('discount'), 2, output_field=DecimalField(max_digits=10, decimal_places=2))
+
+        # Invoices without items keep their current total, as when saved from the views
+        invoices = Invoice.objects.filter(Exists(items))
+
+        with transaction.atomic():
+            drifted = invoices.exclude(total_amount=total).count()
+            # Status is computed from the new total in the same UPDATE
+            updated = invoices.update(total_amount=total, status=Invoice.status_expression(total))
+            # Corrected totals feed the daily rollups and staff KPIs
+            if drifted:
+                covered = rollups.rebuild()
+                if covered:
+                    kpis.recompute_months(*covered)
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Recomputed {updated} invoices ({drifted} totals corrected)'))
@@ -0,0 +1,50 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+def _init_worker():
+    # Forked or spawned, every worker needs its own app registry and connections
+    django.setup()
+    connections.close_all()
+
+
+def _render_batch(invoice_ids):
+    from sales import documents
+    return documents.render_invoices(invoice_ids)
+
+
+class Command(BaseCommand):
+    help = 'Pre-render the printable documents of every invoice dated in a month'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', required=True, help='Month to render, YYYY-MM')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+        parser.add_argument('--batch-size', type=int, default=100, help='Invoices handed to a worker at a time')
+
+    def handle(self, *args, **options):
+        from sales.models import Invoice
+
+        try:
+            year, month = (int(part) for part in options['month'].split('-'))
+            first = date(year, month, 1)
+        except ValueError:
+            raise CommandError(f'Invalid month: {options["month"]}')
+        following = date(year + month // 12, month % 12 + 1, 1)
+
+        ids = list(Invoice.objects.filter(date__gte=first, date__lt=following).order_by('id').values_list('id', flat=True))
+        if not ids:
+            self.stdout.write(f'No invoices dated {options["month"]}')
+            return
+
+        size = max(options['batch_size'], 1)
+        batches = [ids[i:i + size] for i in range(0, len(ids), size)]
+        # Connections must not be shared with forked workers
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=max(options['workers'], 1), initializer=_init_worker) as pool:
+            rendered = sum(pool.map(_render_batch, batches))
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Rendered {rendered} invoices for {options["month"]}'))
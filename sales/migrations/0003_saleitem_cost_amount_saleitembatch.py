@@ -0,0 +1,31 @@
+# Generated by Django 5.2.9 on 2026-10-17 03:19
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_stockbatch_stockbatch_open_idx'),
+        ('sales', '0002_invoice_amount_paid_invoice_status_payment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='saleitem',
+            name='cost_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Cost of goods sold', max_digits=12),
+        ),
+        migrations.CreateModel(
+            name='SaleItemBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField()),
+                ('unit_cost', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sale_allocations', to='inventory.stockbatch')),
+                ('sale_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='batch_allocations', to='sales.saleitem')),
+            ],
+        ),
+    ]
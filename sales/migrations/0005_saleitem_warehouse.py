@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-17 03:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0004_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='saleitem',
+            name='warehouse',
+            field=models.CharField(choices=[('main', 'Main Warehouse'), ('north', 'North Branch'), ('south', 'South Branch'), ('east', 'East Branch'), ('west', 'West Branch')], default='main', help_text='Warehouse the units are shipped from', max_length=50),
+        ),
+    ]
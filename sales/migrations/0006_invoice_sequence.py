@@ -0,0 +1,39 @@
+# Generated by Django 5.2.9 on 2026-10-17 03:41
+
+import re
+from django.db import migrations, models
+
+
+def seed_sequences(apps, schema_editor):
+    """Start each year's counter after the highest existing INV-YYYY-N number."""
+    Invoice = apps.get_model('sales', 'Invoice')
+    InvoiceSequence = apps.get_model('sales', 'InvoiceSequence')
+    pattern = re.compile(r'^INV-(\d{4})-(\d+)$')
+    last_numbers = {}
+    for invoice_number in Invoice.objects.values_list('invoice_number', flat=True).iterator():
+        match = pattern.match(invoice_number)
+        if match:
+            year, number = int(match.group(1)), int(match.group(2))
+            last_numbers[year] = max(last_numbers.get(year, 0), number)
+    InvoiceSequence.objects.bulk_create(
+        InvoiceSequence(year=year, last_number=number) for year, number in last_numbers.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0005_saleitem_warehouse'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField(unique=True)),
+                ('last_number', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
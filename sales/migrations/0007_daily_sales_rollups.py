@@ -0,0 +1,95 @@
+# Generated by Django 5.2.9 on 2026-10-17 03:47
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, ExpressionWrapper, F, Sum
+
+
+def fill_rollups(apps, schema_editor):
+    """Roll up the invoices that already exist, as rollups.rebuild() does."""
+    Invoice = apps.get_model('sales', 'Invoice')
+    SaleItem = apps.get_model('sales', 'SaleItem')
+    DailyCustomerSales = apps.get_model('sales', 'DailyCustomerSales')
+    DailyProductSales = apps.get_model('sales', 'DailyProductSales')
+    DailyStaffSales = apps.get_model('sales', 'DailyStaffSales')
+
+    invoices = Invoice.objects.order_by()
+    DailyCustomerSales.objects.bulk_create(
+        (
+            DailyCustomerSales(date=row['date'], customer_id=row['customer_id'], invoices=row['invoices'], revenue=row['revenue'])
+            for row in invoices.values('date', 'customer_id').annotate(invoices=Count('id'), revenue=Sum('total_amount'))
+        ),
+        batch_size=1000,
+    )
+    DailyStaffSales.objects.bulk_create(
+        (
+            DailyStaffSales(date=row['date'], user_id=row['created_by_id'], invoices=row['invoices'], revenue=row['revenue'])
+            for row in invoices.values('date', 'created_by_id').annotate(invoices=Count('id'), revenue=Sum('total_amount'))
+        ),
+        batch_size=1000,
+    )
+    line_total = ExpressionWrapper(F('quantity') * F('price'), output_field=models.DecimalField(max_digits=12, decimal_places=2))
+    DailyProductSales.objects.bulk_create(
+        (
+            DailyProductSales(date=row['invoice__date'], product_id=row['product_id'], units=row['units'], revenue=row['revenue'], cost=row['cost'])
+            for row in SaleItem.objects.order_by().values('invoice__date', 'product_id').annotate(
+                units=Sum('quantity'), revenue=Sum(line_total), cost=Sum('cost_amount')
+            )
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_stock_reorder_level'),
+        ('sales', '0006_invoice_sequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCustomerSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('invoices', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='sales.customer')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'customer'), name='daily_customer_sales_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('cost', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='inventory.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'product'), name='daily_product_sales_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyStaffSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('invoices', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_sales', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'user'), name='daily_staff_sales_key')],
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,10 @@
 from django.db import models
+from django.utils import timezone
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThan, GreaterThanOrEqual
 from decimal import Decimal
-from inventory.models import Product
+from inventory.models import Product, Stock, StockBatch, StockMovement
+from inventory import costing, ledger
 
 
 class Customer(models.Model):
@@ -14,11 +18,24 @@ class Customer(models.Model):
     
     class Meta:
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['name', 'id'], name='customer_name_idx'),
+            models.Index(fields=['created_at', 'id'], name='customer_created_idx'),
+        ]
     
     def __str__(self):
         return self.name
 
 
+class InvoiceSequence(models.Model):
+    """Counter row handing out gapless invoice numbers for one year."""
+    year = models.PositiveIntegerField(unique=True)
+    last_number = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.year}: {self.last_number}"
+
+
 class Invoice(models.Model):
     """Invoice model with customer, date, discount, and total amount."""
     STATUS_CHOICES = [
@@ -41,47 +58,137 @@ class Invoice(models.Model):
     
     class Meta:
         ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['-date', '-created_at', '-id'], name='invoice_date_idx'),
+            models.Index(fields=['status', '-date', '-created_at', '-id'], name='invoice_status_date_idx'),
+            models.Index(fields=['total_amount', 'id'], name='invoice_total_idx'),
+            # Per-customer account totals and open balances
+            models.Index(fields=['customer', 'status'], name='invoice_customer_status_idx'),
+        ]
     
     def __str__(self):
         return f"Invoice {self.invoice_number} - {self.customer.name}"
     
     def calculate_total(self):
-        """Calculate total amount from sale items minus discount."""
-        subtotal = sum(item.subtotal for item in self.items.all())
+        """Calculate total amount from sale items minus discount, in one SQL aggregate."""
+        subtotal = self.items.aggregate(subtotal=models.Sum(SaleItem.line_total()))['subtotal']
+        if subtotal is None:
+            return None
         return subtotal - self.discount
     
+    @staticmethod
+    def status_for(total, paid):
+        """Payment status for an invoice total and the amount paid so far."""
+        if paid >= total:
+            return 'paid'
+        if paid > 0:
+            return 'partial'
+        return 'unpaid'
+    
+    @staticmethod
+    def status_expression(total, paid=None):
+        """SQL counterpart of status_for, for set-based updates against total and paid expressions."""
+        paid = models.F('amount_paid') if paid is None else paid
+        return models.Case(
+            models.When(GreaterThanOrEqual(paid, total), then=models.Value('paid')),
+            models.When(GreaterThan(paid, 0), then=models.Value('partial')),
+            default=models.Value('unpaid'),
+            output_field=models.CharField()
+        )
+    
+    def recalculate_totals(self):
+        """
+        Recompute total_amount and status from the sale items.
+
+        One aggregate and one UPDATE, run once after the items are saved.
+        Invoices without items keep their current total.
+        """
+        total = self.calculate_total()
+        if total is None:
+            return
+        self.total_amount = total
+        self.status = self.status_for(total, self.amount_paid)
+        self.updated_at = timezone.now()
+        Invoice.objects.filter(pk=self.pk).update(
+            total_amount=self.total_amount, status=self.status, updated_at=self.updated_at
+        )
+    
+    @staticmethod
+    def refresh_payment_totals(invoice_ids):
+        """Recompute amount_paid and status for the given invoices in one grouped UPDATE."""
+        payments = Payment.objects.filter(invoice=models.OuterRef('pk')).order_by().values('invoice')
+        paid = Coalesce(
+            models.Subquery(payments.annotate(total=models.Sum('amount')).values('total')),
+            models.Value(Decimal('0.00')),
+            output_field=models.DecimalField(max_digits=10, decimal_places=2)
+        )
+        return Invoice.objects.filter(pk__in=invoice_ids).update(
+            amount_paid=paid,
+            updated_at=timezone.now(),
+            status=Invoice.status_expression(models.F('total_amount'), paid)
+        )
+    
+    def stock_demand(self):
+        """Units sold per (product_id, warehouse) across the invoice lines."""
+        rows = self.items.order_by().values('product_id', 'warehouse').annotate(units=models.Sum('quantity'))
+        return {(row['product_id'], row['warehouse']): row['units'] for row in rows}
+    
+    def recorded_demand(self):
+        """
+        Units the stock ledger shows as taken for this invoice, per (product_id, warehouse).
+
+        Empty for invoices created before sales deducted stock, so editing or
+        deleting one never returns units that were not taken.
+        """
+        rows = StockMovement.objects.filter(reference=f'invoice:{self.pk}').order_by().values(
+            'product_id', 'warehouse'
+        ).annotate(units=models.Sum('quantity'))
+        return {(row['product_id'], row['warehouse']): -row['units'] for row in rows if row['units']}
+    
+    def sync_stock(self, user=None):
+        """
+        Deduct stock so it matches the current lines.
+
+        Only the difference from recorded_demand() is moved. Raises
+        InsufficientStock, changing nothing, if any source warehouse is short.
+        Must be called inside a transaction.
+        """
+        self._move_stock(self.stock_demand(), self.recorded_demand(), user)
+    
+    def release_stock(self, user=None):
+        """Return every unit the ledger shows as taken for the invoice to its source warehouse."""
+        self._move_stock({}, self.recorded_demand(), user)
+    
+    def _move_stock(self, current, previous, user):
+        sold, returned = [], []
+        for product_id, warehouse in sorted(set(current) | set(previous)):
+            change = previous.get((product_id, warehouse), 0) - current.get((product_id, warehouse), 0)
+            if change < 0:
+                sold.append((product_id, warehouse, change))
+            elif change > 0:
+                returned.append((product_id, warehouse, change))
+        
+        reference = f'invoice:{self.pk}'
+        # Returns first, so units freed by an edit can be sold again on another line
+        if returned:
+            ledger.post_movements(returned, 'sale_return', reference, user)
+        if sold:
+            ledger.post_movements(sold, 'sale', reference, user)
+    
     def update_payment_status(self):
         """Update status based on amount paid."""
-        if self.amount_paid >= self.total_amount:
-            self.status = 'paid'
-        elif self.amount_paid > 0:
-            self.status = 'partial'
-        else:
-            self.status = 'unpaid'
-        self.save(update_fields=['status', 'amount_paid'])
-    
-    def save(self, *args, **kwargs):
-        """Override save to auto-calculate total if items exist."""
-        super().save(*args, **kwargs)
-        # Recalculate total after items are saved
-        if self.items.exists():
-            self.total_amount = self.calculate_total()
-            # Also check payment status in case total changed
-            if self.amount_paid >= self.total_amount:
-                self.status = 'paid'
-            elif self.amount_paid > 0:
-                self.status = 'partial'
-            else:
-                self.status = 'unpaid'
-            super().save(update_fields=['total_amount', 'status'])
+        self.status = self.status_for(self.total_amount, self.amount_paid)
+        self.save(update_fields=['status', 'amount_paid', 'updated_at'])
 
 
 class SaleItem(models.Model):
     """Sale item model representing individual products in an invoice."""
     invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, related_name='items')
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    warehouse = models.CharField(max_length=50, choices=Stock.WAREHOUSE_CHOICES, default='main', help_text='Warehouse the units are shipped from')
     quantity = models.IntegerField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
+    cost_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), help_text='Cost of goods sold')
     
     class Meta:
         ordering = ['id']
@@ -89,10 +196,94 @@ class SaleItem(models.Model):
     def __str__(self):
         return f"{self.product.name} x {self.quantity}"
     
+    @staticmethod
+    def line_total():
+        """quantity * price as an SQL expression."""
+        return models.ExpressionWrapper(
+            models.F('quantity') * models.F('price'),
+            output_field=models.DecimalField(max_digits=14, decimal_places=2)
+        )
+    
     @property
     def subtotal(self):
         """Calculate subtotal for this line item."""
-        return Decimal(str(self.quantity)) * self.price
+        return self.quantity * self.price
+    
+    def apply_costing(self):
+        """Consume stock batches for this line and record its cost of goods sold."""
+        cost, allocations = costing.consume(self.product, self.quantity)
+        SaleItemBatch.objects.bulk_create([
+            SaleItemBatch(sale_item=self, batch=batch, quantity=taken, unit_cost=unit_cost)
+            for batch, taken, unit_cost in allocations
+        ])
+        self.cost_amount = cost
+        SaleItem.objects.filter(pk=self.pk).update(cost_amount=cost)
+    
+    def release_costing(self):
+        """Give consumed quantities back to their batches."""
+        allocations = self.batch_allocations.values_list('batch_id', 'quantity', 'unit_cost')
+        costing.restore(self.product, allocations)
+        self.batch_allocations.all().delete()
+
+
+class SaleItemBatch(models.Model):
+    """Quantity of a stock batch consumed by a sale item."""
+    sale_item = models.ForeignKey(SaleItem, on_delete=models.CASCADE, related_name='batch_allocations')
+    batch = models.ForeignKey(StockBatch, on_delete=models.CASCADE, related_name='sale_allocations')
+    quantity = models.IntegerField()
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=2)
+    
+    def __str__(self):
+        return f"{self.sale_item} <- batch #{self.batch_id} ({self.quantity})"
+
+
+class DailyProductSales(models.Model):
+    """Units, line revenue and cost of goods sold of one product on one invoice date."""
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales')
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    cost = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'product'], name='daily_product_sales_key'),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.product_id}: {self.units} units"
+
+
+class DailyCustomerSales(models.Model):
+    """Invoice count and invoiced total of one customer on one invoice date."""
+    date = models.DateField()
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='daily_sales')
+    invoices = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'customer'], name='daily_customer_sales_key'),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.customer_id}: ${self.revenue}"
+
+
+class DailyStaffSales(models.Model):
+    """Invoice count and invoiced total of the invoices one user created on one invoice date."""
+    date = models.DateField()
+    user = models.ForeignKey('auth.User', on_delete=models.SET_NULL, null=True, related_name='daily_sales')
+    invoices = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'user'], name='daily_staff_sales_key'),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.user_id}: ${self.revenue}"
 
 
 class Payment(models.Model):
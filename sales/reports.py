@@ -0,0 +1,122 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce, Round
+from django.utils import timezone
+from .models import Invoice
+
+
+# (key, label, minimum age in days, maximum age in days or None)
+AGING_BUCKETS = [
+    ('current', 'Current (0-30)', 0, 30),
+    ('days_30', '31-60 days', 31, 60),
+    ('days_60', '61-90 days', 61, 90),
+    ('days_90', '90+ days', 91, None),
+]
+
+AGING_CACHE_TIMEOUT = 60 * 60 * 24
+
+OPEN_STATUSES = ['unpaid', 'partial']
+
+# Last purchase of customers without invoices, so sort keys and cursors are never NULL
+NO_PURCHASE = date.min
+
+
+def _balance(prefix=''):
+    return ExpressionWrapper(
+        F(f'{prefix}total_amount') - F(f'{prefix}amount_paid'),
+        output_field=DecimalField(max_digits=12, decimal_places=2)
+    )
+
+
+def with_account_totals(customers):
+    """
+    Annotate customers with invoice_count, lifetime_revenue, outstanding and
+    last_purchase in the same query, so lists can show, filter and sort on
+    them without a query per row.
+    """
+    zero = Decimal('0.00')
+    money = DecimalField(max_digits=12, decimal_places=2)
+    # Rounded in SQL: SQLite sums decimals as floats, and a cursor holding
+    # 44.06 must compare equal to the row it came from, not to 44.060000000000002
+    return customers.annotate(
+        invoice_count=Count('invoices'),
+        lifetime_revenue=Round(Sum('invoices__total_amount', default=zero), 2, output_field=money),
+        outstanding=Round(
+            Sum(_balance('invoices__'), filter=Q(invoices__status__in=OPEN_STATUSES), default=zero), 2, output_field=money
+        ),
+        last_purchase=Coalesce(Max('invoices__date'), Value(NO_PURCHASE)),
+    )
+
+
+def _bucket_filter(as_of, min_days, max_days):
+    condition = Q(date__lte=as_of - timedelta(days=min_days))
+    if max_days is not None:
+        condition &= Q(date__gte=as_of - timedelta(days=max_days))
+    return condition
+
+
+def _compute_aging(as_of):
+    # One grouped query; the (status, date) invoice index narrows it to open
+    # invoices. Invoices dated after as_of are left out, as no bucket holds them
+    rows = Invoice.objects.filter(status__in=OPEN_STATUSES, date__lte=as_of).values(
+        'customer_id', 'customer__name'
+    ).annotate(
+        total=Sum(_balance()),
+        **{
+            key: Sum(_balance(), filter=_bucket_filter(as_of, min_days, max_days), default=Decimal('0.00'))
+            for key, _, min_days, max_days in AGING_BUCKETS
+        }
+    ).order_by('-total', 'customer__name')
+
+    cents = Decimal('0.01')
+    customers = []
+    totals = {key: Decimal('0.00') for key, *_ in AGING_BUCKETS}
+    totals['total'] = Decimal('0.00')
+    for row in rows:
+        customer = {
+            'customer_id': row['customer_id'],
+            'name': row['customer__name'],
+            'total': row['total'].quantize(cents),
+            'buckets': [row[key].quantize(cents) for key, *_ in AGING_BUCKETS],
+        }
+        customers.append(customer)
+        totals['total'] += customer['total']
+        for (key, *_), amount in zip(AGING_BUCKETS, customer['buckets']):
+            totals[key] += amount
+
+    return {
+        'as_of': as_of,
+        'buckets': [label for _, label, *_ in AGING_BUCKETS],
+        'customers': customers,
+        'totals': [totals[key] for key, *_ in AGING_BUCKETS],
+        'total': totals['total'],
+        'generated_at': timezone.now(),
+    }
+
+
+def _aging_key(as_of):
+    return f'sales:receivables_aging:{as_of.isoformat()}'
+
+
+def invalidate_aging():
+    """Drop today's cached aging report once the current transaction commits."""
+    key = _aging_key(timezone.localdate())
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def receivables_aging(as_of=None, refresh=False):
+    """
+    Outstanding balance (total_amount - amount_paid) per customer across
+    unpaid and partially paid invoices, split into aging buckets by invoice
+    date. Cached for the day.
+    """
+    as_of = as_of or timezone.localdate()
+    key = _aging_key(as_of)
+    report = None if refresh else cache.get(key)
+    if report is None:
+        report = _compute_aging(as_of)
+        cache.set(key, report, AGING_CACHE_TIMEOUT)
+    return report
@@ -0,0 +1,168 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, Q, Sum
+from staff import kpis
+from .models import DailyCustomerSales, DailyProductSales, DailyStaffSales, Invoice, SaleItem
+
+
+REBUILD_CHUNK_DAYS = 31
+
+# rollup -> (model, key field, measures, label fields for summaries)
+ROLLUPS = {
+    'product': (DailyProductSales, 'product_id', ('units', 'revenue', 'cost'), ('product__sku', 'product__name')),
+    'customer': (DailyCustomerSales, 'customer_id', ('invoices', 'revenue'), ('customer__name',)),
+    'staff': (DailyStaffSales, 'user_id', ('invoices', 'revenue'), ('user__username',)),
+}
+
+
+def invoice_contribution(invoice_id):
+    """
+    What one invoice currently adds to the rollups, as
+    {(rollup, date, key): measures}. Empty if the invoice does not exist.
+    """
+    invoice = Invoice.objects.filter(pk=invoice_id).values(
+        'date', 'customer_id', 'created_by_id', 'total_amount'
+    ).first()
+    if invoice is None:
+        return {}
+
+    day = invoice['date']
+    contribution = {
+        ('customer', day, invoice['customer_id']): (1, invoice['total_amount']),
+        ('staff', day, invoice['created_by_id']): (1, invoice['total_amount']),
+    }
+    lines = SaleItem.objects.filter(invoice_id=invoice_id).order_by().values('product_id').annotate(
+        units=Sum('quantity'), revenue=Sum(SaleItem.line_total()), cost=Sum('cost_amount')
+    )
+    for line in lines:
+        contribution[('product', day, line['product_id'])] = (line['units'], line['revenue'], line['cost'])
+    return contribution
+
+
+def _add(rollup, day, key, delta):
+    """
+    Apply delta to one rollup row. Returns False, changing nothing, when the row
+    cannot take it: a decrease for a row that is missing or too small comes from
+    an invoice the rollups never counted, so the day has to be rebuilt instead.
+    """
+    model, field, measures, _ = ROLLUPS[rollup]
+    rows = model.objects.filter(date=day, **{field: key})
+    decrease = any(amount < 0 for amount in delta)
+    if decrease:
+        short = Q()
+        for measure, amount in zip(measures, delta):
+            short |= Q(**{f'{measure}__lt': -amount})
+        if not rows.exists() or rows.filter(short).exists():
+            return False
+    increments = {measure: F(measure) + amount for measure, amount in zip(measures, delta)}
+    if rows.update(**increments):
+        if decrease:
+            # Nothing left on this day once every invoice has moved away
+            rows.filter(**{measure: 0 for measure in measures}).delete()
+        return True
+    try:
+        with transaction.atomic():
+            model.objects.create(date=day, **{field: key}, **dict(zip(measures, delta)))
+    except IntegrityError:
+        # Another writer created the row first; add on top of theirs
+        rows.update(**increments)
+    return True
+
+
+def record_invoice(invoice_id, previous=None):
+    """
+    Bring the rollups up to date after an invoice was created, edited or deleted.
+
+    previous is invoice_contribution() from before the change (None for a new
+    invoice); only the difference is applied, as F() increments on the affected
+    (date, key) rows, so the cost does not depend on how many invoices share a
+    day. A day whose rows never counted the old invoice, such as one created
+    before the rollups existed, is rebuilt from the invoices instead. The
+    creator's KPI sales_amount is adjusted along with the staff rollup. Must
+    be called in the transaction that changed the invoice.
+    """
+    previous = previous or {}
+    current = invoice_contribution(invoice_id)
+    stale_days = set()
+    # A fixed order keeps concurrent writers from deadlocking on the same rows
+    for target in sorted(set(previous) | set(current), key=lambda t: (t[0], t[1], t[2] or 0)):
+        size = len(ROLLUPS[target[0]][2])
+        old = previous.get(target, (0,) * size)
+        new = current.get(target, (0,) * size)
+        delta = [after - before for after, before in zip(new, old)]
+        if any(delta):
+            if not _add(*target, delta):
+                stale_days.add(target[1])
+            if target[0] == 'staff':
+                # The creator's monthly KPI follows the same revenue change
+                kpis.add_sales(target[2], target[1], delta[1])
+    # Rebuilt last, so increments already applied to those days are recomputed too
+    for day in sorted(stale_days):
+        _rebuild_range(day, day)
+
+
+def _rebuild_range(start, end):
+    for model, *_ in ROLLUPS.values():
+        model.objects.filter(date__range=(start, end)).delete()
+
+    invoices = Invoice.objects.filter(date__range=(start, end)).order_by()
+    DailyCustomerSales.objects.bulk_create(
+        DailyCustomerSales(date=row['date'], customer_id=row['customer_id'], invoices=row['invoices'], revenue=row['revenue'])
+        for row in invoices.values('date', 'customer_id').annotate(invoices=Count('id'), revenue=Sum('total_amount'))
+    )
+    DailyStaffSales.objects.bulk_create(
+        DailyStaffSales(date=row['date'], user_id=row['created_by_id'], invoices=row['invoices'], revenue=row['revenue'])
+        for row in invoices.values('date', 'created_by_id').annotate(invoices=Count('id'), revenue=Sum('total_amount'))
+    )
+    lines = SaleItem.objects.filter(invoice__date__range=(start, end)).order_by()
+    DailyProductSales.objects.bulk_create(
+        DailyProductSales(date=row['invoice__date'], product_id=row['product_id'], units=row['units'], revenue=row['revenue'], cost=row['cost'])
+        for row in lines.values('invoice__date', 'product_id').annotate(
+            units=Sum('quantity'), revenue=Sum(SaleItem.line_total()), cost=Sum('cost_amount')
+        )
+    )
+
+
+def rebuild(date_from=None, date_to=None, chunk_days=REBUILD_CHUNK_DAYS):
+    """
+    Recompute the rollups from the invoices, one transaction per chunk_days.
+
+    Without bounds every day that has invoices or rollup rows is rebuilt.
+    Returns the (first, last) days covered, or None if there was nothing to do.
+    """
+    if date_from is None or date_to is None:
+        bounds = [
+            queryset.aggregate(first=Min('date'), last=Max('date'))
+            for queryset in (Invoice.objects.all(), DailyCustomerSales.objects.all(), DailyStaffSales.objects.all())
+        ]
+        firsts = [row['first'] for row in bounds if row['first']]
+        lasts = [row['last'] for row in bounds if row['last']]
+        if not firsts:
+            return None
+        date_from = date_from or min(firsts)
+        date_to = date_to or max(lasts)
+
+    day = date_from
+    while day <= date_to:
+        chunk_end = min(day + timedelta(days=chunk_days - 1), date_to)
+        with transaction.atomic():
+            _rebuild_range(day, chunk_end)
+        day = chunk_end + timedelta(days=1)
+    return date_from, date_to
+
+
+def sales_totals(date_from, date_to):
+    """Invoiced total and invoice count between two dates, read from the customer rollup."""
+    totals = DailyCustomerSales.objects.filter(date__range=(date_from, date_to)).aggregate(
+        revenue=Sum('revenue', default=Decimal('0.00')), invoices=Sum('invoices', default=0)
+    )
+    return totals['revenue'], totals['invoices']
+
+
+def sales_summary(rollup, date_from, date_to):
+    """One row per product, customer or staff member with its measures summed over the days as total_<measure>."""
+    model, field, measures, labels = ROLLUPS[rollup]
+    return model.objects.filter(date__range=(date_from, date_to)).values(field, *labels).annotate(
+        **{f'total_{measure}': Sum(measure) for measure in measures}
+    ).order_by('-total_revenue', field)
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from .models import Invoice
+from . import reports
+
+
+# Sent with invoice_ids after payment totals change through queryset updates, which skip post_save
+payments_changed = Signal()
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+@receiver(payments_changed)
+def invalidate_aging(sender, **kwargs):
+    """Invoice totals, dates and payments all feed the aging report."""
+    reports.invalidate_aging()
@@ -1,3 +1,509 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import shutil
+import tempfile
+import threading
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from core import metrics
+from core.pagination import keyset_paginate
+from inventory.models import Product, Stock, StockBatch
+from inventory import costing, ledger
+from .models import Customer, DailyCustomerSales, DailyProductSales, DailyStaffSales, Invoice, InvoiceSequence, Payment, SaleItem
+from . import importers, numbering, reports, rollups
 
-# Create your tests here.
+
+class InvoiceNumberingTests(TestCase):
+    def test_numbers_are_sequential_per_year(self):
+        with transaction.atomic():
+            first = numbering.next_invoice_number(date(2026, 3, 1))
+            second = numbering.next_invoice_number(date(2026, 3, 2))
+            other_year = numbering.next_invoice_number(date(2027, 1, 1))
+        self.assertEqual(first, 'INV-2026-000001')
+        self.assertEqual(second, 'INV-2026-000002')
+        self.assertEqual(other_year, 'INV-2027-000001')
+
+    def test_rolled_back_number_is_reused(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                numbering.next_invoice_number(date(2026, 5, 1))
+                raise RuntimeError('invoice failed to save')
+        with transaction.atomic():
+            self.assertEqual(numbering.next_invoice_number(date(2026, 5, 1)), 'INV-2026-000001')
+
+
+class ConcurrentInvoiceNumberingTests(TransactionTestCase):
+    THREADS = 8
+    INVOICES_PER_THREAD = 25
+
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            name='Walk-in', email='walkin@example.com', phone='000', address='-'
+        )
+
+    def run_writers(self, writer):
+        errors = []
+        start_gate = threading.Barrier(self.THREADS)
+
+        def run(index):
+            try:
+                start_gate.wait()
+                writer(index)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        pool = [threading.Thread(target=run, args=(i,)) for i in range(self.THREADS)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_parallel_writers_get_gapless_unique_numbers(self):
+        invoice_date = date(2026, 6, 1)
+
+        def writer(index):
+            for n in range(self.INVOICES_PER_THREAD):
+                try:
+                    with transaction.atomic():
+                        Invoice.objects.create(
+                            customer=self.customer,
+                            invoice_number=numbering.next_invoice_number(invoice_date),
+                            date=invoice_date
+                        )
+                        # Some invoices fail after taking a number; it must be handed out again
+                        if n % 5 == index % 5:
+                            raise RuntimeError('rolled back')
+                except RuntimeError:
+                    pass
+
+        self.run_writers(writer)
+
+        numbers = list(Invoice.objects.values_list('invoice_number', flat=True))
+        committed = self.THREADS * self.INVOICES_PER_THREAD * 4 // 5
+        self.assertEqual(len(numbers), committed)
+        self.assertEqual(len(set(numbers)), committed)
+        self.assertEqual(
+            sorted(numbers),
+            [numbering.format_invoice_number(2026, n) for n in range(1, committed + 1)]
+        )
+        self.assertEqual(InvoiceSequence.objects.get(year=2026).last_number, committed)
+
+    def test_parallel_block_allocation_never_duplicates(self):
+        block = numbering.NumberBlock(size=7)
+        taken = []
+
+        def writer(index):
+            for _ in range(self.INVOICES_PER_THREAD):
+                taken.append(block.take(date(2026, 7, 1)))
+
+        self.run_writers(writer)
+
+        total = self.THREADS * self.INVOICES_PER_THREAD
+        self.assertEqual(len(set(taken)), total)
+        self.assertEqual(
+            sorted(taken),
+            [numbering.format_invoice_number(2026, n) for n in range(1, total + 1)]
+        )
+
+
+class InvoicePrintTests(TestCase):
+    def setUp(self):
+        self.document_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.document_dir)
+        override = override_settings(INVOICE_DOCUMENT_DIR=self.document_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.client.force_login(User.objects.create_user('clerk'))
+        customer = Customer.objects.create(
+            name='Walk-in', email='walkin@example.com', phone='000', address='-'
+        )
+        self.invoice = Invoice.objects.create(
+            customer=customer, invoice_number='INV-2026-000001', date=date(2026, 6, 1),
+            total_amount=Decimal('100.00')
+        )
+        self.url = reverse('invoice_print', args=[self.invoice.pk])
+
+    def test_unchanged_invoice_is_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'INV-2026-000001')
+
+        repeat = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+
+    def test_payment_changes_the_document(self):
+        etag = self.client.get(self.url)['ETag']
+        Payment.objects.create(invoice=self.invoice, amount=Decimal('40.00'), date=date(2026, 6, 2))
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, '$60.00')
+
+
+class InvoiceCostingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('seller')
+        self.client.force_login(self.user)
+        self.customer = Customer.objects.create(name='Walk-in', email='walkin@example.com', phone='000', address='-')
+        self.product = Product.objects.create(name='Bolt', sku='BOLT', price=Decimal('10.00'), length=1, width=1, height=1)
+        with transaction.atomic():
+            for day, unit_cost in ((1, '2.00'), (2, '4.00')):
+                batch = StockBatch.objects.create(product=self.product, quantity=5, remaining_quantity=5,
+                                                  unit_cost=Decimal(unit_cost), received_date=date(2026, 1, day))
+                costing.record_receipt(batch)
+            ledger.post_movement(self.product, 'main', 10, 'receipt')
+
+    def post_invoice(self, url, quantity, item=None):
+        return self.client.post(url, {
+            'customer': self.customer.pk, 'date': '2026-06-01', 'discount': '0',
+            'items-TOTAL_FORMS': 1, 'items-INITIAL_FORMS': int(item is not None), 'items-MIN_NUM_FORMS': 1, 'items-MAX_NUM_FORMS': 1000,
+            'items-0-id': item.pk if item else '', 'items-0-product': self.product.pk, 'items-0-warehouse': 'main',
+            'items-0-quantity': quantity, 'items-0-price': '10.00',
+        })
+
+    def state(self):
+        return (
+            Stock.objects.get(product=self.product, warehouse='main').quantity,
+            list(self.product.batches.order_by('received_date').values_list('remaining_quantity', flat=True)),
+        )
+
+    def test_invoice_lines_consume_and_return_batches(self):
+        self.post_invoice(reverse('invoice_create'), 7)
+        invoice = Invoice.objects.get()
+        item = invoice.items.get()
+        self.assertEqual(item.cost_amount, Decimal('18.00'))
+        self.assertEqual(sorted(item.batch_allocations.values_list('quantity', 'unit_cost')),
+                         [(2, Decimal('4.00')), (5, Decimal('2.00'))])
+        self.assertEqual(self.state(), (3, [0, 3]))
+
+        # An edit returns the old allocations before costing the new quantity
+        self.post_invoice(reverse('invoice_update', args=[invoice.pk]), 3, item)
+        item.refresh_from_db()
+        self.assertEqual(item.cost_amount, Decimal('6.00'))
+        self.assertEqual(self.state(), (7, [2, 5]))
+
+        self.client.post(reverse('invoice_delete', args=[invoice.pk]))
+        self.assertEqual(self.state(), (10, [5, 5]))
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.open_units, self.product.open_value), (10, Decimal('30.00')))
+
+    def test_legacy_invoices_return_only_what_they_took(self):
+        # Created before sales deducted stock: no ledger movements, no batch allocations
+        legacy = Invoice.objects.create(customer=self.customer, invoice_number='INV-0', date=date(2026, 5, 1))
+        item = SaleItem.objects.create(invoice=legacy, product=self.product, quantity=4, price=Decimal('10.00'))
+
+        self.post_invoice(reverse('invoice_update', args=[legacy.pk]), 3, item)
+        self.assertEqual(self.state(), (7, [2, 5]))
+        self.client.post(reverse('invoice_delete', args=[legacy.pk]))
+        self.assertEqual(self.state(), (10, [5, 5]))
+
+        legacy = Invoice.objects.create(customer=self.customer, invoice_number='INV-00', date=date(2026, 5, 1))
+        SaleItem.objects.create(invoice=legacy, product=self.product, quantity=4, price=Decimal('10.00'))
+        self.client.post(reverse('invoice_delete', args=[legacy.pk]))
+        self.assertEqual(self.state(), (10, [5, 5]))
+
+    def test_oversold_invoice_changes_nothing(self):
+        response = self.post_invoice(reverse('invoice_create'), 11)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Invoice.objects.exists())
+        self.assertEqual(self.state(), (10, [5, 5]))
+
+
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('seller')
+        self.customers = [
+            Customer.objects.create(name=name, email=f'{name}@example.com', phone='000', address='-')
+            for name in ('alpha', 'beta')
+        ]
+        self.products = [
+            Product.objects.create(name=name, sku=name.upper(), price=Decimal('10.00'), length=1, width=1, height=1)
+            for name in ('bolt', 'nut')
+        ]
+
+    def create_invoice(self, number, day, customer, lines):
+        invoice = Invoice.objects.create(
+            customer=customer, invoice_number=number, date=day, created_by=self.user
+        )
+        for product, quantity in lines:
+            SaleItem.objects.create(invoice=invoice, product=product, quantity=quantity, price=product.price)
+        invoice.recalculate_totals()
+        rollups.record_invoice(invoice.pk)
+        return invoice
+
+    def snapshot(self):
+        return (
+            sorted(DailyProductSales.objects.values_list('date', 'product_id', 'units', 'revenue', 'cost')),
+            sorted(DailyCustomerSales.objects.values_list('date', 'customer_id', 'invoices', 'revenue')),
+            sorted(DailyStaffSales.objects.values_list('date', 'user_id', 'invoices', 'revenue')),
+        )
+
+    def test_incremental_updates_match_a_rebuild(self):
+        bolt, nut = self.products
+        first = self.create_invoice('INV-1', date(2026, 6, 1), self.customers[0], [(bolt, 2), (nut, 1)])
+        second = self.create_invoice('INV-2', date(2026, 6, 1), self.customers[0], [(bolt, 3)])
+        self.create_invoice('INV-3', date(2026, 6, 2), self.customers[1], [(nut, 4)])
+
+        # Move an invoice to another day and customer and change its lines
+        previous = rollups.invoice_contribution(first.pk)
+        Invoice.objects.filter(pk=first.pk).update(date=date(2026, 6, 2), customer=self.customers[1])
+        first.items.filter(product=nut).delete()
+        first.recalculate_totals()
+        rollups.record_invoice(first.pk, previous)
+
+        previous = rollups.invoice_contribution(second.pk)
+        second.delete()
+        rollups.record_invoice(second.pk, previous)
+
+        incremental = self.snapshot()
+        rollups.rebuild()
+        self.assertEqual(incremental, self.snapshot())
+        self.assertEqual(rollups.sales_totals(date(2026, 6, 1), date(2026, 6, 2)), (Decimal('60.00'), 2))
+        self.assertFalse(DailyCustomerSales.objects.filter(date=date(2026, 6, 1)).exists())
+
+
+    def test_invoices_the_rollups_never_counted_rebuild_their_day(self):
+        bolt, nut = self.products
+        # Created before the rollups existed, so never recorded
+        legacy = Invoice.objects.create(customer=self.customers[0], invoice_number='INV-0', date=date(2026, 6, 1), created_by=self.user)
+        SaleItem.objects.create(invoice=legacy, product=bolt, quantity=4, price=bolt.price)
+        legacy.recalculate_totals()
+        self.create_invoice('INV-1', date(2026, 6, 1), self.customers[0], [(bolt, 1)])
+
+        previous = rollups.invoice_contribution(legacy.pk)
+        legacy.delete()
+        rollups.record_invoice(legacy.pk, previous)
+
+        self.assertEqual(sorted(DailyCustomerSales.objects.values_list('customer_id', 'invoices', 'revenue')),
+                         [(self.customers[0].pk, 1, Decimal('10.00'))])
+        self.assertEqual(list(DailyProductSales.objects.values_list('product_id', 'units')), [(bolt.pk, 1)])
+        incremental = self.snapshot()
+        rollups.rebuild()
+        self.assertEqual(incremental, self.snapshot())
+
+
+class InvoiceTotalsTests(TestCase):
+    def setUp(self):
+        customer = Customer.objects.create(name='Walk-in', email='walkin@example.com', phone='000', address='-')
+        products = [
+            Product.objects.create(name=name, sku=name.upper(), price=Decimal(price), length=1, width=1, height=1)
+            for name, price in (('bolt', '0.10'), ('nut', '0.20'), ('gear', '19.99'))
+        ]
+        self.invoices = []
+        for i in range(6):
+            invoice = Invoice.objects.create(customer=customer, invoice_number=f'INV-{i}', date=date(2026, 6, 1 + i),
+                                             discount=Decimal('0.05') * i, amount_paid=Decimal('10.00') * (i % 3))
+            for quantity, product in enumerate(products[:1 + i % 3], 1):
+                SaleItem.objects.create(invoice=invoice, product=product, quantity=quantity, price=product.price)
+            self.invoices.append(invoice)
+        self.empty = Invoice.objects.create(customer=customer, invoice_number='INV-X', date=date(2026, 6, 1), total_amount=Decimal('7.00'))
+
+    def expected(self):
+        return {
+            invoice.pk: sum((item.quantity * item.price for item in invoice.items.all()), Decimal('0.00')) - invoice.discount
+            for invoice in Invoice.objects.exclude(pk=self.empty.pk)
+        }
+
+    def test_recalculate_totals_is_one_aggregate_and_one_update(self):
+        invoice = self.invoices[5]
+        with self.assertNumQueries(2):
+            invoice.recalculate_totals()
+        self.assertEqual(Invoice.objects.get(pk=invoice.pk).total_amount, self.expected()[invoice.pk])
+
+    def test_command_corrects_drifted_totals_in_one_update(self):
+        for invoice in self.invoices:
+            invoice.recalculate_totals()
+        rollups.rebuild()
+        Invoice.objects.filter(pk__in=[self.invoices[1].pk, self.invoices[4].pk]).update(total_amount=Decimal('999.99'), status='paid')
+
+        output = io.StringIO()
+        call_command('recompute_invoice_totals', stdout=output)
+
+        self.assertIn('(2 totals corrected)', output.getvalue())
+        totals = dict(Invoice.objects.values_list('pk', 'total_amount'))
+        self.assertEqual({pk: totals[pk] for pk in self.expected()}, self.expected())
+        self.assertEqual(totals[self.empty.pk], Decimal('7.00'))
+        for invoice in Invoice.objects.all():
+            self.assertEqual(invoice.status, Invoice.status_for(invoice.total_amount, invoice.amount_paid))
+        self.assertEqual(rollups.sales_totals(date(2026, 6, 1), date(2026, 6, 30))[0], sum(self.expected().values()) + Decimal('7.00'))
+
+        # With nothing drifted, the whole run is a count and one UPDATE, however many invoices there are
+        with CaptureQueriesContext(connection) as captured:
+            call_command('recompute_invoice_totals', stdout=io.StringIO())
+        statements = [query['sql'] for query in captured if 'SAVEPOINT' not in query['sql']]
+        self.assertEqual(len(statements), 2)
+        self.assertTrue(statements[1].startswith('UPDATE "sales_invoice"'))
+
+
+class CustomerAccountTotalsTests(TestCase):
+    def test_totals_are_annotated_in_one_query(self):
+        owing, settled, new = [
+            Customer.objects.create(name=name, email=f'{name}@example.com', phone='000', address='-')
+            for name in ('owing', 'settled', 'new')
+        ]
+        Invoice.objects.create(customer=owing, invoice_number='INV-1', date=date(2026, 5, 1),
+                               total_amount=Decimal('100.00'), amount_paid=Decimal('30.00'), status='partial')
+        Invoice.objects.create(customer=owing, invoice_number='INV-2', date=date(2026, 6, 1),
+                               total_amount=Decimal('50.00'), status='unpaid')
+        Invoice.objects.create(customer=settled, invoice_number='INV-3', date=date(2026, 4, 1),
+                               total_amount=Decimal('80.00'), amount_paid=Decimal('80.00'), status='paid')
+
+        with self.assertNumQueries(1):
+            rows = {
+                customer.name: (customer.invoice_count, customer.lifetime_revenue, customer.outstanding, customer.last_purchase)
+                for customer in reports.with_account_totals(Customer.objects.all())
+            }
+        self.assertEqual(rows['owing'], (2, Decimal('150.00'), Decimal('120.00'), date(2026, 6, 1)))
+        self.assertEqual(rows['settled'], (1, Decimal('80.00'), Decimal('0.00'), date(2026, 4, 1)))
+        self.assertEqual(rows['new'], (0, Decimal('0.00'), Decimal('0.00'), reports.NO_PURCHASE))
+
+        owing_more = reports.with_account_totals(Customer.objects.all()).filter(outstanding__gt=Decimal('100.00'))
+        self.assertEqual([customer.name for customer in owing_more], ['owing'])
+
+    def test_paging_by_totals_has_no_duplicates_or_gaps(self):
+        # Sums like 0.10 + 0.20 are inexact as floats; ties exercise the pk tie-breaker
+        amounts = [('0.10', '0.20'), ('0.30',), ('0.10', '0.20'), ('14.02', '15.02', '15.02'), ('44.06',), ('0.70', '0.10', '0.20')]
+        number = 0
+        for i in range(12):
+            customer = Customer.objects.create(name=f'c{i}', email=f'c{i}@example.com', phone='000', address='-')
+            for total in amounts[i % len(amounts)]:
+                number += 1
+                Invoice.objects.create(customer=customer, invoice_number=f'INV-{number}', date=date(2026, 6, 1),
+                                       total_amount=Decimal(total), status='unpaid')
+
+        customers = reports.with_account_totals(Customer.objects.all())
+        for sort in ('outstanding', '-outstanding', 'lifetime_revenue', '-lifetime_revenue'):
+            expected = list(customers.order_by(sort, '-pk' if sort.startswith('-') else 'pk').values_list('pk', flat=True))
+            seen, cursor = [], None
+            # Bounded, so a cursor that re-selects its own row fails instead of looping
+            for _ in range(len(expected)):
+                page = keyset_paginate(customers, [sort], cursor, per_page=4)
+                seen.extend(customer.pk for customer in page)
+                if not page.has_next:
+                    break
+                cursor = page.next_cursor
+            self.assertEqual(seen, expected, sort)
+
+
+class ReceivablesAgingTests(TestCase):
+    def test_buckets_sum_to_the_total(self):
+        as_of = date(2026, 6, 30)
+        customer = Customer.objects.create(name='owing', email='owing@example.com', phone='000', address='-')
+        # Age in days -> balance; 30 and 31 straddle the first bucket boundary, -5 is dated after as_of
+        ages = {0: '10.00', 30: '20.00', 31: '40.00', 75: '80.00', 91: '160.00', 400: '320.00', -5: '640.00'}
+        for number, (age, amount) in enumerate(ages.items()):
+            Invoice.objects.create(customer=customer, invoice_number=f'INV-{number}', date=as_of - timedelta(days=age),
+                                   total_amount=Decimal(amount) + 5, amount_paid=Decimal('5.00'), status='partial')
+        Invoice.objects.create(customer=customer, invoice_number='INV-paid', date=as_of,
+                               total_amount=Decimal('999.00'), amount_paid=Decimal('999.00'), status='paid')
+
+        report = reports.receivables_aging(as_of, refresh=True)
+
+        [row] = report['customers']
+        self.assertEqual(row['buckets'], [Decimal('30.00'), Decimal('40.00'), Decimal('80.00'), Decimal('480.00')])
+        self.assertEqual(row['total'], sum(row['buckets']))
+        self.assertEqual(report['totals'], row['buckets'])
+        self.assertEqual(report['total'], Decimal('630.00'))
+
+
+class StatementImportTests(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user('seller')
+        self.customer = Customer.objects.create(name='owing', email='owing@example.com', phone='000', address='-')
+        self.invoice = Invoice.objects.create(customer=self.customer, invoice_number='INV-1', date=timezone.localdate(),
+                                              total_amount=Decimal('100.00'), created_by=self.seller)
+
+    def import_lines(self, *lines, chunk_size=1000):
+        stream = io.StringIO('\n'.join(['date,amount,invoice_number,reference,method', *lines]))
+        with self.captureOnCommitCallbacks(execute=True):
+            return importers.import_statement(stream, 'csv', chunk_size=chunk_size)
+
+    def test_lines_are_matched_recorded_and_not_repeated(self):
+        other = Invoice.objects.create(customer=self.customer, invoice_number='INV-2', date=date(2026, 6, 1),
+                                       total_amount=Decimal('50.00'))
+        lines = [
+            '2026-06-02,60.00,INV-1,BANK-1,card',
+            '2026-06-02,50.00,,INV-2,',
+            '2026-06-03,40.00,INV-1,BANK-2,',
+            '2026-06-03,10.00,INV-9,BANK-3,',
+            '2026-06-03,-5.00,INV-1,BANK-4,',
+            '2026-06-03,5.00,INV-1,BANK-5,barter',
+        ]
+
+        report = self.import_lines(*lines, chunk_size=2)
+
+        self.assertEqual((report.rows, report.imported), (6, 3))
+        self.assertEqual(report.unmatched, [(5, 'INV-9', Decimal('10.00'))])
+        self.assertEqual([line for line, _ in report.errors], [6, 7])
+        self.invoice.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.invoice.amount_paid, self.invoice.status), (Decimal('100.00'), 'paid'))
+        self.assertEqual((other.amount_paid, other.status), (Decimal('50.00'), 'paid'))
+        self.assertEqual(Payment.objects.get(reference='BANK-1').method, 'card')
+
+        # Re-running the statement records nothing twice
+        again = self.import_lines(*lines[:3])
+        self.assertEqual((again.imported, again.rejected), (0, 3))
+        self.assertEqual(Payment.objects.count(), 3)
+
+    def test_import_refreshes_cached_reports(self):
+        def recent():
+            return list(Invoice.objects.values_list('status', flat=True))
+
+        self.assertEqual(reports.receivables_aging()['total'], Decimal('100.00'))
+        self.assertEqual(metrics.cached_metric('recent_invoices', recent, scope=f'user-{self.seller.pk}'), ['unpaid'])
+
+        report = self.import_lines(f'{timezone.localdate()},40.00,INV-1,BANK-1,')
+
+        self.assertEqual(report.imported, 1)
+        self.assertEqual(reports.receivables_aging()['total'], Decimal('60.00'))
+        self.assertEqual(metrics.cached_metric('recent_invoices', recent, scope=f'user-{self.seller.pk}'), ['partial'])
+
+
+class InvoiceExportTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('accountant'))
+        self.customer = Customer.objects.create(name='Smith, "Jr"', email='smith@example.com', phone='000', address='-')
+        other = Customer.objects.create(name='other', email='other@example.com', phone='000', address='-')
+        product = Product.objects.create(name='Bolt', sku='BOLT', price=Decimal('10.00'), length=1, width=1, height=1)
+        for number, day, customer in (('INV-1', date(2026, 6, 1), self.customer), ('INV-2', date(2026, 6, 9), self.customer),
+                                      ('INV-3', date(2026, 6, 2), other)):
+            invoice = Invoice.objects.create(customer=customer, invoice_number=number, date=day)
+            SaleItem.objects.create(invoice=invoice, product=product, quantity=2, price=Decimal('10.00'))
+            invoice.recalculate_totals()
+        Payment.objects.create(invoice=Invoice.objects.get(invoice_number='INV-1'), amount=Decimal('5.00'), date=date(2026, 6, 3))
+
+    def export(self, kind, **params):
+        response = self.client.get(reverse('invoice_export', args=[kind]), params)
+        body = b''.join(response.streaming_content)
+        if params.get('gzip'):
+            self.assertEqual(response['Content-Type'], 'application/gzip')
+            body = gzip.decompress(body)
+        return list(csv.reader(io.StringIO(body.decode('utf-8'))))
+
+    def test_exports_stream_filtered_csv(self):
+        rows = self.export('invoices', date_from='2026-06-01', date_to='2026-06-05', customer=self.customer.pk)
+        self.assertEqual(rows[0][:3], ['invoice_number', 'date', 'customer'])
+        self.assertEqual([row[:3] for row in rows[1:]], [['INV-1', '2026-06-01', 'Smith, "Jr"']])
+        self.assertEqual(rows[1][-2:], ['20.00', '5.00'])
+
+        lines = self.export('lines', customer=self.customer.pk, gzip=1)
+        self.assertEqual([(row[0], row[3], row[6]) for row in lines[1:]], [('INV-1', 'BOLT', '2'), ('INV-2', 'BOLT', '2')])
+        self.assertEqual([row[0] for row in self.export('payments')[1:]], ['INV-1'])
+
+    def test_unknown_kind_is_not_found(self):
+        self.assertEqual(self.client.get(reverse('invoice_export', args=['customers'])).status_code, 404)
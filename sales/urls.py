@@ -9,10 +9,17 @@ urlpatterns = [
     # Invoice URLs
     path('invoices/', views.invoice_list, name='invoice_list'),
     path('invoices/add/', views.invoice_create, name='invoice_create'),
+    path('invoices/export/<str:kind>/', views.invoice_export, name='invoice_export'),
     path('invoices/<int:pk>/', views.invoice_detail, name='invoice_detail'),
+    path('invoices/<int:pk>/print/', views.invoice_print, name='invoice_print'),
     path('invoices/<int:pk>/edit/', views.invoice_update, name='invoice_update'),
     path('invoices/<int:pk>/delete/', views.invoice_delete, name='invoice_delete'),
     
     # Payment URLs
     path('invoices/<int:invoice_id>/payment/', views.payment_create, name='payment_create'),
+    path('payments/import/', views.statement_import, name='statement_import'),
+    
+    # Report URLs
+    path('reports/aging/', views.receivables_aging, name='receivables_aging'),
+    path('reports/sales/', views.sales_summary, name='sales_summary'),
 ]
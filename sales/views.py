@@ -1,15 +1,57 @@
+import csv
+import io
 from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth.decorators import login_required, permission_required
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db import transaction
-from .models import Customer, Invoice, SaleItem, Payment
-from .forms import CustomerForm, InvoiceForm, SaleItemFormSet, PaymentForm
+from django.utils import timezone
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from inventory import services
+from core.pagination import date_range, decimal_range, keyset_paginate, sort_ordering
+from .models import Customer, Invoice
+from .forms import CustomerForm, InvoiceForm, SaleItemFormSet, PaymentForm, StatementImportForm
+from .importers import STATEMENT_FIELDS, import_statement
+from . import documents, exports, numbering, reports, rollups
+
+CUSTOMER_SORTS = ['name', 'email', 'created_at', 'invoice_count', 'lifetime_revenue', 'outstanding', 'last_purchase']
+INVOICE_SORTS = ['invoice_number', 'date', 'total_amount']
+
 
 @login_required
 def customer_list(request):
-    customers = Customer.objects.all()
+    # Account totals come from the same grouped query as the customers
+    customers = reports.with_account_totals(Customer.objects.all())
+    
+    # Filter on the account totals, e.g. customers owing more than a given amount
+    outstanding_min, outstanding_max = decimal_range(request.GET, 'outstanding_min', 'outstanding_max')
+    revenue_min, revenue_max = decimal_range(request.GET, 'revenue_min', 'revenue_max')
+    purchased_from, purchased_to = date_range(request.GET, 'purchased_from', 'purchased_to')
+    filters = {
+        'outstanding__gte': outstanding_min,
+        'outstanding__lte': outstanding_max,
+        'lifetime_revenue__gte': revenue_min,
+        'lifetime_revenue__lte': revenue_max,
+        'last_purchase__gte': purchased_from,
+        'last_purchase__lte': purchased_to,
+    }
+    customers = customers.filter(**{lookup: value for lookup, value in filters.items() if value is not None})
+    
+    sort = request.GET.get('sort')
+    ordering = sort_ordering(sort, CUSTOMER_SORTS, Customer._meta.ordering)
+    page = keyset_paginate(customers, ordering, request.GET.get('cursor'))
+    
     context = {
-        'customers': customers,
+        'customers': page.object_list,
+        'page': page,
+        'outstanding_min': outstanding_min,
+        'outstanding_max': outstanding_max,
+        'revenue_min': revenue_min,
+        'revenue_max': revenue_max,
+        'purchased_from': purchased_from,
+        'purchased_to': purchased_to,
+        'sort': sort,
         'title': 'Customers'
     }
     return render(request, 'sales/customer_list.html', context)
@@ -34,8 +76,32 @@ def customer_create(request):
 @login_required
 def invoice_list(request):
     invoices = Invoice.objects.select_related('customer').all()
+    
+    # Filter by status
+    status = request.GET.get('status')
+    if status:
+        invoices = invoices.filter(status=status)
+    
+    # Filter by invoice date and customer
+    date_from, date_to = date_range(request.GET)
+    customer = request.GET.get('customer')
+    invoices = invoices.filter(**exports.export_filters(date_from, date_to, customer if customer and customer.isdigit() else None))
+    
+    sort = request.GET.get('sort')
+    ordering = sort_ordering(sort, INVOICE_SORTS, Invoice._meta.ordering)
+    page = keyset_paginate(invoices, ordering, request.GET.get('cursor'))
+    
     context = {
-        'invoices': invoices,
+        'invoices': page.object_list,
+        'page': page,
+        'status_choices': Invoice.STATUS_CHOICES,
+        'current_status': status,
+        'date_from': date_from,
+        'date_to': date_to,
+        'customer_choices': Customer.objects.order_by('name').values_list('id', 'name'),
+        'current_customer': customer,
+        'export_kinds': list(exports.EXPORTS),
+        'sort': sort,
         'title': 'Invoices'
     }
     return render(request, 'sales/invoice_list.html', context)
@@ -47,17 +113,28 @@ def invoice_create(request):
         formset = SaleItemFormSet(request.POST)
         
         if form.is_valid() and formset.is_valid():
-            with transaction.atomic():
-                invoice = form.save(commit=False)
-                invoice.created_by = request.user
-                invoice.save()
-                
-                formset.instance = invoice
-                formset.save()
-                
-                # Trigger total calculation
-                invoice.save()
-                
+            try:
+                with transaction.atomic():
+                    invoice = form.save(commit=False)
+                    invoice.created_by = request.user
+                    invoice.invoice_number = numbering.next_invoice_number(invoice.date)
+                    invoice.save()
+                    
+                    formset.instance = invoice
+                    formset.save()
+                    
+                    # Deduct the sold units from their source warehouses
+                    invoice.sync_stock(user=request.user)
+                    
+                    # Consume stock batches and record cost of goods sold
+                    for item in invoice.items.select_related('product'):
+                        item.apply_costing()
+                    
+                    invoice.recalculate_totals()
+                    rollups.record_invoice(invoice.pk)
+            except services.InsufficientStock as e:
+                messages.error(request, str(e))
+            else:
                 messages.success(request, 'Invoice created successfully.')
                 return redirect('invoice_detail', pk=invoice.pk)
     else:
@@ -79,10 +156,28 @@ def invoice_update(request, pk):
         formset = SaleItemFormSet(request.POST, instance=invoice)
         
         if form.is_valid() and formset.is_valid():
-            with transaction.atomic():
-                form.save()
-                formset.save()
-                invoice.save() # Recalculate total
+            try:
+                with transaction.atomic():
+                    previous_rollup = rollups.invoice_contribution(invoice.pk)
+                    
+                    # Put previously consumed batches back before re-costing the lines
+                    for item in invoice.items.all():
+                        item.release_costing()
+                    
+                    form.save()
+                    formset.save()
+                    
+                    # Move only the difference between what the ledger recorded and the new lines
+                    invoice.sync_stock(request.user)
+                    
+                    for item in invoice.items.select_related('product'):
+                        item.apply_costing()
+                    
+                    invoice.recalculate_totals()
+                    rollups.record_invoice(invoice.pk, previous_rollup)
+            except services.InsufficientStock as e:
+                messages.error(request, str(e))
+            else:
                 messages.success(request, 'Invoice updated successfully.')
                 return redirect('invoice_detail', pk=invoice.pk)
     else:
@@ -96,6 +191,26 @@ def invoice_update(request, pk):
     }
     return render(request, 'sales/invoice_form.html', context)
 
+@login_required
+def invoice_export(request, kind):
+    """Stream invoices, their lines or their payments as CSV, optionally gzipped."""
+    if kind not in exports.EXPORTS:
+        raise Http404('Unknown export')
+    
+    date_from, date_to = date_range(request.GET)
+    customer = request.GET.get('customer')
+    filters = exports.export_filters(date_from, date_to, customer if customer and customer.isdigit() else None)
+    
+    chunks = exports.csv_chunks(exports.export_rows(kind, filters))
+    filename = f'{kind}.csv'
+    if request.GET.get('gzip'):
+        chunks = exports.gzip_chunks(chunks)
+        filename += '.gz'
+    
+    response = StreamingHttpResponse(chunks, content_type='application/gzip' if filename.endswith('.gz') else 'text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
 @login_required
 def invoice_detail(request, pk):
     invoice = get_object_or_404(Invoice, pk=pk)
@@ -110,11 +225,29 @@ def invoice_detail(request, pk):
     }
     return render(request, 'sales/invoice_detail.html', context)
 
+def _invoice_print_etag(request, pk):
+    return documents.invoice_document_key(pk)
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_invoice_print_etag)
+def invoice_print(request, pk):
+    # condition() has already answered 304 when the browser's copy is current
+    invoice = get_object_or_404(Invoice.objects.select_related('customer', 'created_by'), pk=pk)
+    _, content = documents.get_document(invoice)
+    return HttpResponse(content, content_type='text/html; charset=utf-8')
+
 @login_required
 def invoice_delete(request, pk):
     invoice = get_object_or_404(Invoice, pk=pk)
     if request.method == 'POST':
-        invoice.delete()
+        with transaction.atomic():
+            previous_rollup = rollups.invoice_contribution(invoice.pk)
+            invoice.release_stock(request.user)
+            for item in invoice.items.all():
+                item.release_costing()
+            invoice.delete()
+            rollups.record_invoice(pk, previous_rollup)
         messages.success(request, 'Invoice deleted successfully.')
         return redirect('invoice_list')
     
@@ -145,3 +278,76 @@ def payment_create(request, invoice_id):
         'title': 'Record Payment'
     }
     return render(request, 'sales/payment_form.html', context)
+
+@login_required
+def statement_import(request):
+    """View to record payments in bulk from an uploaded bank statement."""
+    if request.method == 'POST':
+        form = StatementImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            stream = io.TextIOWrapper(request.FILES['file'].file, encoding='utf-8', newline='')
+            report = import_statement(stream, form.cleaned_data['format'], user=request.user)
+            
+            for line_number, key, amount in report.unmatched[:10]:
+                messages.warning(request, f'Line {line_number}: no invoice matches "{key}" (${amount})')
+            for line_number, message in report.errors[:10]:
+                messages.warning(request, f'Line {line_number}: {message}')
+            messages.success(
+                request,
+                f'Recorded {report.imported} of {report.rows} payments '
+                f'({len(report.unmatched)} unmatched, {report.rejected} rejected).'
+            )
+            return redirect('invoice_list')
+    else:
+        form = StatementImportForm()
+    
+    context = {
+        'form': form,
+        'fields': STATEMENT_FIELDS,
+        'title': 'Import Bank Statement'
+    }
+    return render(request, 'sales/statement_import_form.html', context)
+
+@login_required
+def receivables_aging(request):
+    """Accounts-receivable aging per customer, as a page or CSV download."""
+    report = reports.receivables_aging(refresh=bool(request.GET.get('refresh')))
+    
+    if request.GET.get('format') == 'csv':
+        response = HttpResponse(content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="ar-aging-{report["as_of"].isoformat()}.csv"'
+        writer = csv.writer(response)
+        writer.writerow(['Customer', *report['buckets'], 'Total'])
+        for customer in report['customers']:
+            writer.writerow([customer['name'], *customer['buckets'], customer['total']])
+        writer.writerow(['Total', *report['totals'], report['total']])
+        return response
+    
+    context = {
+        'report': report,
+        'title': 'Receivables Aging'
+    }
+    return render(request, 'sales/receivables_aging.html', context)
+
+@login_required
+def sales_summary(request):
+    """Sales per product, customer or staff member over a date range, read from the daily rollups."""
+    by = request.GET.get('by')
+    if by not in rollups.ROLLUPS:
+        by = 'product'
+    date_from, date_to = date_range(request.GET)
+    today = timezone.localdate()
+    date_from = date_from or today.replace(day=1)
+    date_to = date_to or today
+    
+    rows = rollups.sales_summary(by, date_from, date_to)
+    
+    context = {
+        'rows': rows,
+        'by': by,
+        'groupings': list(rollups.ROLLUPS),
+        'date_from': date_from,
+        'date_to': date_to,
+        'title': 'Sales Summary'
+    }
+    return render(request, 'sales/sales_summary.html', context)
@@ -0,0 +1,99 @@
+from datetime import date
+from decimal import Decimal
+from django.db.models import F, Sum
+from django.utils import timezone
+from sales.models import Invoice
+from .models import KPI, StaffProfile
+
+
+# Roles that get a KPI row created automatically once they sell something
+SALES_ROLES = ['sales']
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def monthly_sales(month):
+    """{staff profile id: invoiced total} for the invoices created in a month, in one grouped query."""
+    invoices = Invoice.objects.filter(
+        date__gte=month, date__lt=next_month(month), created_by__profile__isnull=False
+    ).order_by()
+    return dict(
+        invoices.values('created_by__profile').annotate(total=Sum('total_amount')).values_list('created_by__profile', 'total')
+    )
+
+
+def _carried_targets(staff_ids, month):
+    """Each staff member's most recent target before month, for KPI rows created automatically."""
+    targets = {}
+    earlier = KPI.objects.filter(staff_id__in=staff_ids, month__lt=month).order_by('staff_id', '-month')
+    for staff_id, target in earlier.values_list('staff_id', 'target_sales'):
+        targets.setdefault(staff_id, target)
+    return targets
+
+
+def recompute_months(first, last):
+    """
+    Recompute KPI.sales_amount for every month from first to last from the invoices.
+
+    One grouped query per month; existing KPI rows are written back with
+    bulk_update and rows are created for sales staff who sold without having
+    one. Returns the number of KPI rows written.
+    """
+    written = 0
+    month = month_start(first)
+    while month <= last:
+        sales = monthly_sales(month)
+        now = timezone.now()
+
+        kpis = list(KPI.objects.filter(month=month))
+        for kpi in kpis:
+            kpi.sales_amount = sales.pop(kpi.staff_id, Decimal('0.00'))
+            kpi.updated_at = now
+        KPI.objects.bulk_update(kpis, ['sales_amount', 'updated_at'])
+
+        missing = list(StaffProfile.objects.filter(pk__in=sales, role__in=SALES_ROLES).values_list('pk', flat=True))
+        targets = _carried_targets(missing, month)
+        KPI.objects.bulk_create([
+            KPI(staff_id=staff_id, month=month, sales_amount=sales[staff_id], target_sales=targets.get(staff_id, Decimal('0.00')))
+            for staff_id in missing
+        ])
+
+        written += len(kpis) + len(missing)
+        month = next_month(month)
+    return written
+
+
+def add_sales(user_id, day, amount):
+    """
+    Add amount to the KPI of the user's staff profile for the month of day.
+
+    Used as invoice totals change, as one F() increment. A sales role's first
+    sale of a month creates its row from that staff member's invoices; other
+    roles only move rows that already exist. Must be called in the
+    transaction that changed the invoice.
+    """
+    if user_id is None or not amount:
+        return
+    staff = StaffProfile.objects.filter(user_id=user_id).values_list('pk', 'role').first()
+    if staff is None:
+        return
+    staff_id, role = staff
+    month = month_start(day)
+    updated = KPI.objects.filter(staff_id=staff_id, month=month).update(
+        sales_amount=F('sales_amount') + amount, updated_at=timezone.now()
+    )
+    if updated or role not in SALES_ROLES:
+        return
+    # The invoices already include this change, so they give the whole month
+    invoices = Invoice.objects.filter(created_by_id=user_id, date__gte=month, date__lt=next_month(month)).order_by()
+    KPI.objects.create(
+        staff_id=staff_id, month=month,
+        sales_amount=invoices.aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00'),
+        target_sales=_carried_targets([staff_id], month).get(staff_id, Decimal('0.00'))
+    )
@@ -0,0 +1,42 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Min
+from sales.models import Invoice
+from staff import kpis
+
+
+def parse_month(value):
+    try:
+        year, month = (int(part) for part in value.split('-'))
+        return date(year, month, 1)
+    except ValueError:
+        raise CommandError(f'Invalid month: {value}')
+
+
+class Command(BaseCommand):
+    help = 'Recompute KPI sales amounts from the invoices each staff member created'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='month_from', help='First month, YYYY-MM (default: month of the earliest invoice)')
+        parser.add_argument('--to', dest='month_to', help='Last month, YYYY-MM (default: current month)')
+
+    def handle(self, *args, **options):
+        if options['month_from']:
+            first = parse_month(options['month_from'])
+        else:
+            earliest = Invoice.objects.aggregate(first=Min('date'))['first']
+            if earliest is None:
+                self.stdout.write('No invoices to compute KPIs from')
+                return
+            first = kpis.month_start(earliest)
+        last = parse_month(options['month_to']) if options['month_to'] else kpis.month_start(date.today())
+        if first > last:
+            raise CommandError('--from must not be after --to')
+
+        with transaction.atomic():
+            written = kpis.recompute_months(first, last)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Recomputed {written} KPIs from {first:%Y-%m} to {last:%Y-%m}'
+        ))
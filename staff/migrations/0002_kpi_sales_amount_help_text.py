@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-17 03:51
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='kpi',
+            name='sales_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Invoiced total of the invoices the staff member created, kept up to date automatically', max_digits=12),
+        ),
+    ]
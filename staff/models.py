@@ -33,7 +33,8 @@ class KPI(models.Model):
     """KPI model tracking staff performance metrics."""
     staff = models.ForeignKey(StaffProfile, on_delete=models.CASCADE, related_name='kpis')
     month = models.DateField(help_text='First day of the month')
-    sales_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    sales_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'),
+                                       help_text='Invoiced total of the invoices the staff member created, kept up to date automatically')
     target_sales = models.DecimalField(max_digits=12, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
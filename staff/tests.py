@@ -1,3 +1,61 @@
+from datetime import date
+from decimal import Decimal
+from django.contrib.auth.models import User
 from django.test import TestCase
+from sales.models import Customer, Invoice
+from sales import rollups
+from .models import KPI, StaffProfile
+from . import kpis
 
-# Create your tests here.
+
+class KPISalesTests(TestCase):
+    def setUp(self):
+        self.seller = User.objects.create_user('seller')
+        self.profile = StaffProfile.objects.create(user=self.seller, role='sales')
+        self.customer = Customer.objects.create(name='Walk-in', email='walkin@example.com', phone='000', address='-')
+
+    def create_invoice(self, number, day, total):
+        invoice = Invoice.objects.create(
+            customer=self.customer, invoice_number=number, date=day,
+            total_amount=Decimal(total), created_by=self.seller
+        )
+        rollups.record_invoice(invoice.pk)
+        return invoice
+
+    def test_invoice_changes_update_the_monthly_kpi(self):
+        KPI.objects.create(staff=self.profile, month=date(2026, 5, 1), target_sales=Decimal('500.00'))
+        self.create_invoice('INV-1', date(2026, 6, 3), '100.00')
+        second = self.create_invoice('INV-2', date(2026, 6, 20), '40.00')
+
+        june = KPI.objects.get(staff=self.profile, month=date(2026, 6, 1))
+        self.assertEqual(june.sales_amount, Decimal('140.00'))
+        # A row created automatically carries the previous month's target
+        self.assertEqual(june.target_sales, Decimal('500.00'))
+
+        previous = rollups.invoice_contribution(second.pk)
+        Invoice.objects.filter(pk=second.pk).update(total_amount=Decimal('25.00'))
+        rollups.record_invoice(second.pk, previous)
+        june.refresh_from_db()
+        self.assertEqual(june.sales_amount, Decimal('125.00'))
+
+    def test_backfill_overwrites_manual_figures(self):
+        self.create_invoice('INV-1', date(2026, 6, 3), '100.00')
+        KPI.objects.filter(month=date(2026, 6, 1)).update(sales_amount=Decimal('9999.00'))
+        KPI.objects.create(staff=self.profile, month=date(2026, 7, 1), sales_amount=Decimal('50.00'), target_sales=Decimal('1.00'))
+
+        self.assertEqual(kpis.recompute_months(date(2026, 6, 1), date(2026, 7, 1)), 2)
+        self.assertEqual(
+            dict(KPI.objects.values_list('month', 'sales_amount')),
+            {date(2026, 6, 1): Decimal('100.00'), date(2026, 7, 1): Decimal('0.00')}
+        )
+
+    def test_other_roles_without_a_row_cost_no_recompute(self):
+        accountant = User.objects.create_user('accountant')
+        StaffProfile.objects.create(user=accountant, role='accountant')
+        self.create_invoice('INV-1', date(2026, 6, 3), '100.00')
+
+        # Profile lookup and the increment that matched no row
+        with self.assertNumQueries(2):
+            kpis.add_sales(accountant.pk, date(2026, 6, 4), Decimal('80.00'))
+        self.assertFalse(KPI.objects.filter(staff__user=accountant).exists())
+        self.assertEqual(KPI.objects.get(staff=self.profile).sales_amount, Decimal('100.00'))